@@ -20,6 +20,7 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 from app.core.base import Base
 from app.auth.models import User  # Import all models here to ensure they are registered
+from app.audit.models import AuditLog
 target_metadata = Base.metadata
 
 # other values from the config, defined by the needs of env.py,
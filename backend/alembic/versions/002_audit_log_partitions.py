@@ -0,0 +1,122 @@
+"""audit_logs monthly partitioning
+
+Revision ID: 002_audit_log_partitions
+Revises: 001_initial
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.audit.partitions import month_start, next_month, period_name
+
+# revision identifiers, used by Alembic.
+revision = '002_audit_log_partitions'
+down_revision = '001_initial'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 2
+LEGACY_TABLE = 'audit_logs_unpartitioned'
+COPIED_COLUMNS = (
+    'id', 'event_id', 'hospital_id', 'user_id', 'action', 'resource_type', 'resource_id',
+    'details', 'ip_address', 'timestamp',
+)
+
+
+def _set_aside_existing_table(bind) -> list:
+    """
+    Deployments created before this revision already have a plain audit_logs table
+    (from create_all). Rename it out of the way and free its index names; returns the
+    columns to copy into the new table, or [] when there is nothing to convert.
+    """
+    inspector = sa.inspect(bind)
+    if not inspector.has_table('audit_logs'):
+        return []
+    columns = {column['name'] for column in inspector.get_columns('audit_logs')}
+    for index in inspector.get_indexes('audit_logs'):
+        op.drop_index(index['name'], table_name='audit_logs')
+    op.rename_table('audit_logs', LEGACY_TABLE)
+    return [column for column in COPIED_COLUMNS if column in columns]
+
+
+def _copy_existing_rows(bind, columns: list) -> None:
+    targets = ", ".join(columns)
+    sources = ", ".join(
+        # The old model allowed a NULL timestamp; the partition key cannot be NULL
+        "COALESCE(timestamp, CURRENT_TIMESTAMP)" if column == 'timestamp' else column for column in columns
+    )
+    if 'timestamp' not in columns:
+        targets += ", timestamp"
+        sources += ", CURRENT_TIMESTAMP"
+    op.execute(f"INSERT INTO audit_logs ({targets}) SELECT {sources} FROM {LEGACY_TABLE}")
+    if bind.dialect.name == "postgresql":
+        op.execute(
+            "SELECT setval(pg_get_serial_sequence('audit_logs', 'id'), "
+            "COALESCE((SELECT MAX(id) FROM audit_logs), 0) + 1, false)"
+        )
+    op.drop_table(LEGACY_TABLE)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    existing_columns = _set_aside_existing_table(bind)
+    if bind.dialect.name == "postgresql":
+        # Native declarative partitioning: the primary key and unique keys must include
+        # the partition column, hence (id, timestamp) and (event_id, timestamp).
+        op.execute("""
+            CREATE TABLE audit_logs (
+                id SERIAL NOT NULL,
+                event_id VARCHAR,
+                hospital_id VARCHAR NOT NULL,
+                user_id VARCHAR NOT NULL,
+                action VARCHAR NOT NULL,
+                resource_type VARCHAR,
+                resource_id VARCHAR,
+                details JSON,
+                ip_address VARCHAR,
+                timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                PRIMARY KEY (id, timestamp),
+                CONSTRAINT uq_audit_logs_event_id_timestamp UNIQUE (event_id, timestamp)
+            ) PARTITION BY RANGE (timestamp)
+        """)
+        op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+        period = month_start(datetime.utcnow())
+        for _ in range(MONTHS_AHEAD + 1):
+            op.execute(
+                f"CREATE TABLE {period_name(period)} PARTITION OF audit_logs "
+                f"FOR VALUES FROM ('{period.isoformat()}') TO ('{next_month(period).isoformat()}')"
+            )
+            period = next_month(period)
+    else:
+        op.create_table('audit_logs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('event_id', sa.String(), nullable=True),
+            sa.Column('hospital_id', sa.String(), nullable=False),
+            sa.Column('user_id', sa.String(), nullable=False),
+            sa.Column('action', sa.String(), nullable=False),
+            sa.Column('resource_type', sa.String(), nullable=True),
+            sa.Column('resource_id', sa.String(), nullable=True),
+            sa.Column('details', sa.JSON(), nullable=True),
+            sa.Column('ip_address', sa.String(), nullable=True),
+            sa.Column('timestamp', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('event_id', 'timestamp', name='uq_audit_logs_event_id_timestamp')
+        )
+    # Indexes on the parent cascade to every partition on Postgres
+    op.create_index('ix_audit_logs_hospital_id_timestamp', 'audit_logs', ['hospital_id', 'timestamp'], unique=False)
+    op.create_index(op.f('ix_audit_logs_hospital_id'), 'audit_logs', ['hospital_id'], unique=False)
+    op.create_index(op.f('ix_audit_logs_user_id'), 'audit_logs', ['user_id'], unique=False)
+    op.create_index(op.f('ix_audit_logs_action'), 'audit_logs', ['action'], unique=False)
+    op.create_index(op.f('ix_audit_logs_resource_type'), 'audit_logs', ['resource_type'], unique=False)
+    op.create_index(op.f('ix_audit_logs_resource_id'), 'audit_logs', ['resource_id'], unique=False)
+    if existing_columns:
+        # Rows older than the pre-created partitions land in the DEFAULT partition
+        _copy_existing_rows(bind, existing_columns)
+
+
+def downgrade() -> None:
+    # Dropping the parent drops every partition on Postgres
+    op.drop_table('audit_logs')
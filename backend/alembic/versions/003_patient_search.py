@@ -0,0 +1,43 @@
+"""patient search indexes
+
+Revision ID: 003_patient_search
+Revises: 002_audit_log_partitions
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.patients.models import PG_SEARCH_DDL, SEARCH_TABLE, SQLITE_SEARCH_DDL, SQLITE_SEARCH_DROP
+
+# revision identifiers, used by Alembic.
+revision = '003_patient_search'
+down_revision = '002_audit_log_partitions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table('patients'):
+        # Fresh database: create_all builds patients with its search indexes
+        return
+    if bind.dialect.name == "postgresql":
+        for statement in PG_SEARCH_DDL:
+            op.execute(statement)
+        return
+    for statement in SQLITE_SEARCH_DDL:
+        op.execute(statement)
+    # Index the rows that already exist; the triggers only see later writes
+    op.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index('ix_patients_search_phone', table_name='patients')
+        op.drop_index('ix_patients_search_name', table_name='patients')
+        return
+    for trigger in ("ai", "ad", "au"):
+        op.execute(f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_{trigger}")
+    for statement in SQLITE_SEARCH_DROP:
+        op.execute(statement)
@@ -0,0 +1,101 @@
+"""exact invoice amounts and maintained balances
+
+Revision ID: 004_invoice_money_cents
+Revises: 003_patient_search
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.billing.models import OUTSTANDING_SQL
+
+# revision identifiers, used by Alembic.
+revision = '004_invoice_money_cents'
+down_revision = '003_patient_search'
+branch_labels = None
+depends_on = None
+
+# Float dollar columns that become BIGINT cents (app.core.money.Money)
+MONEY_COLUMNS = {
+    'payments': ('amount',),
+    'insurance_claims': ('claimed_amount',),
+    'invoices': ('total_amount', 'tax_amount', 'discount_amount', 'final_amount'),
+}
+
+RECOMPUTE_STATUS = """
+    UPDATE invoices SET status = CASE
+        WHEN status = 'cancelled' THEN status
+        WHEN amount_paid >= final_amount THEN 'paid'
+        WHEN amount_paid > 0 THEN 'partial'
+        ELSE 'unpaid'
+    END
+"""
+
+
+def _rescale(table: str, columns: tuple, to_cents: bool) -> None:
+    # Values are rescaled in place first; the type change then only casts whole numbers
+    op.execute("UPDATE {} SET {}".format(table, ", ".join(
+        f"{column} = ROUND({column} * 100)" if to_cents else f"{column} = {column} / 100.0" for column in columns
+    )))
+
+
+def _retype(batch, columns: tuple, to_cents: bool) -> None:
+    for column in columns:
+        if to_cents:
+            batch.alter_column(column, type_=sa.BigInteger(), existing_type=sa.Float(),
+                               postgresql_using=f"{column}::bigint")
+        else:
+            batch.alter_column(column, type_=sa.Float(), existing_type=sa.BigInteger())
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('invoices'):
+        # Fresh database: create_all builds the billing tables with the new columns
+        return
+    if 'amount_paid' in {column['name'] for column in inspector.get_columns('invoices')}:
+        # Already created by create_all with the new columns
+        return
+
+    for table in ('payments', 'insurance_claims'):
+        if inspector.has_table(table):
+            _rescale(table, MONEY_COLUMNS[table], to_cents=True)
+            with op.batch_alter_table(table) as batch:
+                _retype(batch, MONEY_COLUMNS[table], to_cents=True)
+
+    op.execute("UPDATE invoices SET final_amount = 0 WHERE final_amount IS NULL")
+    _rescale('invoices', MONEY_COLUMNS['invoices'], to_cents=True)
+    with op.batch_alter_table('invoices') as batch:
+        _retype(batch, MONEY_COLUMNS['invoices'], to_cents=True)
+        batch.alter_column('final_amount', existing_type=sa.BigInteger(), nullable=False)
+        batch.add_column(sa.Column('amount_paid', sa.BigInteger(), nullable=False, server_default='0'))
+        batch.add_column(sa.Column(
+            'balance', sa.BigInteger(), sa.Computed('final_amount - amount_paid', persisted=True)
+        ))
+
+    # Running totals from the payments already recorded, then statuses that match them
+    if inspector.has_table('payments'):
+        op.execute("""
+            UPDATE invoices SET amount_paid = COALESCE(
+                (SELECT SUM(payments.amount) FROM payments WHERE payments.invoice_id = invoices.id), 0
+            )
+        """)
+    op.execute(RECOMPUTE_STATUS)
+
+    op.create_index('ix_invoices_hospital_id_patient_id_balance', 'invoices',
+                    ['hospital_id', 'patient_id', 'balance'], unique=False)
+    op.create_index('ix_invoices_outstanding_hospital_id_id', 'invoices', ['hospital_id', 'id'], unique=False,
+                    postgresql_where=sa.text(OUTSTANDING_SQL), sqlite_where=sa.text(OUTSTANDING_SQL))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_invoices_outstanding_hospital_id_id', table_name='invoices')
+    op.drop_index('ix_invoices_hospital_id_patient_id_balance', table_name='invoices')
+    with op.batch_alter_table('invoices') as batch:
+        batch.drop_column('balance')
+        batch.drop_column('amount_paid')
+    for table, columns in MONEY_COLUMNS.items():
+        _rescale(table, columns, to_cents=False)
+        with op.batch_alter_table(table) as batch:
+            _retype(batch, columns, to_cents=False)
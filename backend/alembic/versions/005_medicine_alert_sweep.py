@@ -0,0 +1,52 @@
+"""medicines.updated_at and alert sweep indexes
+
+Revision ID: 005_medicine_alert_sweep
+Revises: 004_invoice_money_cents
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.pharmacy.models import Medicine, StockAlert
+
+# revision identifiers, used by Alembic.
+revision = '005_medicine_alert_sweep'
+down_revision = '004_invoice_money_cents'
+branch_labels = None
+depends_on = None
+
+# Range scans of the alert sweep
+SWEEP_INDEXES = ('ix_medicines_expiry_date', 'ix_medicines_updated_at')
+# Added to the model earlier (keyset pagination, FEFO allocation) without a revision of their own
+MODEL_INDEXES = ('ix_medicines_hospital_id_id', 'ix_medicines_hospital_id_name_expiry_date')
+
+
+def _columns(name: str) -> list:
+    index = next(index for index in Medicine.__table__.indexes if index.name == name)
+    return [column.name for column in index.columns]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table('medicines'):
+        # Fresh database: create_all builds medicines and stock_alerts as modelled
+        return
+    if 'updated_at' not in {column['name'] for column in inspector.get_columns('medicines')}:
+        op.add_column('medicines', sa.Column('updated_at', sa.DateTime(), nullable=True))
+        # Existing batches count as changed now; the sweeper's first run is a full sweep anyway
+        op.execute("UPDATE medicines SET updated_at = CURRENT_TIMESTAMP")
+    existing = {index['name'] for index in inspector.get_indexes('medicines')}
+    for name in SWEEP_INDEXES + MODEL_INDEXES:
+        if name not in existing:
+            op.create_index(name, 'medicines', _columns(name), unique=False)
+    StockAlert.__table__.create(bind, checkfirst=True)
+
+
+def downgrade() -> None:
+    op.drop_table('stock_alerts')
+    for name in SWEEP_INDEXES:
+        op.drop_index(name, table_name='medicines')
+    with op.batch_alter_table('medicines') as batch:
+        batch.drop_column('updated_at')
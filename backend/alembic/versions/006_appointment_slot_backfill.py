@@ -0,0 +1,65 @@
+"""appointment_slots for bookings made before the slot unique key
+
+Revision ID: 006_appointment_slot_backfill
+Revises: 005_medicine_alert_sweep
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.appointments.booking import slot_keys
+from app.appointments.models import Appointment, AppointmentSlot, AppointmentStatus
+
+# revision identifiers, used by Alembic.
+revision = '006_appointment_slot_backfill'
+down_revision = '005_medicine_alert_sweep'
+branch_labels = None
+depends_on = None
+
+CHUNK_SIZE = 5000
+
+
+def _insert_ignoring_held_granules(dialect_name: str):
+    # Two legacy bookings may share a granule (they were only checked by the Python
+    # probe); the first one keeps it, the rest of the second one's granules are held
+    dialect = postgresql if dialect_name == "postgresql" else sqlite
+    return dialect.insert(AppointmentSlot).on_conflict_do_nothing(index_elements=['doctor_id', 'slot_start'])
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table('appointments'):
+        # Fresh database: nothing booked yet
+        return
+    AppointmentSlot.__table__.create(bind, checkfirst=True)
+
+    appointments = Appointment.__table__
+    slots = AppointmentSlot.__table__
+    # Scheduled appointments that hold no granule yet; reruns skip what is already backfilled
+    unslotted = (
+        sa.select(appointments.c.id, appointments.c.doctor_id, appointments.c.appointment_datetime,
+                  appointments.c.hospital_id)
+        .where(appointments.c.status == AppointmentStatus.SCHEDULED.value)
+        .where(~sa.exists().where(slots.c.appointment_id == appointments.c.id))
+        .order_by(appointments.c.id)
+    )
+    statement = _insert_ignoring_held_granules(bind.dialect.name)
+    rows = []
+    for appointment in bind.execute(unslotted).all():
+        rows.extend(
+            {"appointment_id": appointment.id, "doctor_id": appointment.doctor_id,
+             "slot_start": slot_start, "hospital_id": appointment.hospital_id}
+            for slot_start in slot_keys(appointment.appointment_datetime)
+        )
+        if len(rows) >= CHUNK_SIZE:
+            bind.execute(statement, rows)
+            rows = []
+    if rows:
+        bind.execute(statement, rows)
+
+
+def downgrade() -> None:
+    # The granules are derived data; keeping them is harmless and the slot guard needs them
+    pass
@@ -0,0 +1,51 @@
+"""stock_movements ledger with opening balances
+
+Revision ID: 007_stock_movement_ledger
+Revises: 006_appointment_slot_backfill
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.pharmacy.models import Medicine, StockMovement, StockMovementReason
+
+# revision identifiers, used by Alembic.
+revision = '007_stock_movement_ledger'
+down_revision = '006_appointment_slot_backfill'
+branch_labels = None
+depends_on = None
+
+LEDGER_INDEX = 'ix_stock_movements_hospital_id_medicine_id_id'
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table('medicines'):
+        # Fresh database: create_all builds stock_movements as modelled
+        return
+    if not inspector.has_table('stock_movements'):
+        StockMovement.__table__.create(bind)
+    elif LEDGER_INDEX not in {index['name'] for index in inspector.get_indexes('stock_movements')}:
+        op.create_index(LEDGER_INDEX, 'stock_movements', ['hospital_id', 'medicine_id', 'id'], unique=False)
+
+    # One opening row per batch with stock and no ledger yet, so every ledger
+    # sums to its batch's quantity; reruns skip batches already opened
+    medicines = Medicine.__table__
+    movements = StockMovement.__table__
+    opening = (
+        sa.select(
+            medicines.c.id, medicines.c.quantity, medicines.c.quantity,
+            sa.literal(StockMovementReason.RECEIVED.value), medicines.c.hospital_id, sa.func.current_timestamp(),
+        )
+        .where(medicines.c.quantity > 0)
+        .where(~sa.exists().where(movements.c.medicine_id == medicines.c.id))
+    )
+    bind.execute(movements.insert().from_select(
+        ['medicine_id', 'change', 'quantity_after', 'reason', 'hospital_id', 'created_at'], opening
+    ))
+
+
+def downgrade() -> None:
+    op.drop_table('stock_movements')
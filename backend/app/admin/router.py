@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import List
+from app.admin import schemas
+from app.auth.deps import get_current_user
+from app.auth.models import User, UserRole
+from app.core.request_metrics import request_metrics
+
+router = APIRouter()
+
+def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.role != UserRole.ADMIN.value:
+        raise HTTPException(status_code=403, detail="Only admins can view request metrics")
+    return current_user
+
+@router.get("/latency", response_model=schemas.LatencyReport)
+async def get_latency(current_user: User = Depends(require_admin)):
+    """
+    p50/p95/p99 latency of the caller's hospital on this replica since it started,
+    per route and status and overall. Slowest p99 first. All-tenant route
+    percentiles are only exported to operators, at /metrics.
+    """
+    return request_metrics.latency_report(current_user.hospital_id)
+
+@router.get("/slow-requests", response_model=List[schemas.SlowRequest])
+async def get_slow_requests(current_user: User = Depends(require_admin)):
+    """
+    Most recent requests of the caller's hospital slower than SLOW_REQUEST_THRESHOLD_MS,
+    newest first, with their SQL statements and DB/application time split.
+    """
+    return [
+        sample for sample in request_metrics.slow_requests()
+        if sample["hospital_id"] == current_user.hospital_id
+    ]
@@ -0,0 +1,39 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class LatencySummary(BaseModel):
+    count: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+class RouteLatency(LatencySummary):
+    method: str
+    route: str
+    status: int
+
+class TenantLatency(LatencySummary):
+    hospital_id: str
+
+class LatencyReport(BaseModel):
+    routes: List[RouteLatency]
+    tenants: List[TenantLatency]
+
+class SlowQuery(BaseModel):
+    sql: str
+    ms: float
+
+class SlowRequest(BaseModel):
+    at: str
+    method: str
+    route: str
+    path: str
+    status: int
+    hospital_id: Optional[str] = None
+    duration_ms: float
+    db_ms: float
+    app_ms: float
+    statements: int
+    queries: List[SlowQuery]
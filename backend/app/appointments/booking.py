@@ -0,0 +1,186 @@
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from sqlalchemy import select, exists, and_, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.appointments import models
+from app.patients.models import Patient
+from app.doctors.models import Doctor, DoctorAvailability
+
+if TYPE_CHECKING:
+    from app.doctors.schedule import ScheduleIndex
+
+# Appointments are 30 minute slots; two bookings conflict when they overlap, i.e. start
+# less than this apart
+SLOT_MINUTES = 30
+CONFLICT_WINDOW = timedelta(minutes=SLOT_MINUTES)
+# Appointments start on this grid. Each one holds the granules its 30 minutes touch in
+# appointment_slots (SLOT_MINUTES // SLOT_GRANULE_MINUTES of them when on the grid), so a
+# new booking conflicts with an existing one exactly when they share a granule.
+SLOT_GRANULE_MINUTES = 5
+SLOT_GRANULE = timedelta(minutes=SLOT_GRANULE_MINUTES)
+
+PATIENT_NOT_FOUND = "Patient not found"
+DOCTOR_NOT_FOUND = "Doctor not found"
+UNAVAILABLE_DETAIL = "Doctor is not available at the requested time"
+CONFLICT_DETAIL = "Doctor has a conflicting appointment"
+SLOT_CONSTRAINT = "uq_appointment_slots_doctor_slot"
+
+# (status_code, detail) in the order they are reported
+BookingError = Tuple[int, str]
+
+
+def booking_checks_query(
+    hospital_id: str,
+    patient_id: int,
+    doctor_id: int,
+    appointment_datetime: datetime,
+    exclude_appointment_id: Optional[int] = None,
+    conflict_probe: bool = True,
+):
+    """
+    One SELECT returning four booleans: patient exists, doctor exists, doctor is
+    available at that time, and a conflicting scheduled appointment exists. Each
+    EXISTS probe is served by an index, so the whole check is a single round trip.
+    With `conflict_probe=False` the conflict probe is left out.
+    """
+    day_of_week = appointment_datetime.weekday()
+    appt_time = appointment_datetime.time()
+
+    conflict = and_(
+        models.Appointment.doctor_id == doctor_id,
+        models.Appointment.status == models.AppointmentStatus.SCHEDULED.value,
+        models.Appointment.appointment_datetime > appointment_datetime - CONFLICT_WINDOW,
+        models.Appointment.appointment_datetime < appointment_datetime + CONFLICT_WINDOW,
+    )
+    if exclude_appointment_id is not None:
+        conflict = and_(conflict, models.Appointment.id != exclude_appointment_id)
+
+    probes = [
+        exists().where(Patient.id == patient_id, Patient.hospital_id == hospital_id).label("patient_found"),
+        exists().where(Doctor.id == doctor_id, Doctor.hospital_id == hospital_id).label("doctor_found"),
+        exists().where(
+            DoctorAvailability.doctor_id == doctor_id,
+            DoctorAvailability.day_of_week == day_of_week,
+            DoctorAvailability.is_available == True,
+            DoctorAvailability.start_time <= appt_time,
+            DoctorAvailability.end_time > appt_time,
+        ).label("doctor_available"),
+    ]
+    if conflict_probe:
+        probes.append(exists().where(conflict).label("has_conflict"))
+    return select(*probes)
+
+
+async def validate_booking(
+    db: AsyncSession,
+    hospital_id: str,
+    patient_id: int,
+    doctor_id: int,
+    appointment_datetime: datetime,
+    exclude_appointment_id: Optional[int] = None,
+    schedule: Optional["ScheduleIndex"] = None,
+) -> List[BookingError]:
+    """
+    Return every reason the booking is invalid (empty list when it can be made).
+
+    With a schedule index, the conflict probe is answered from memory; the
+    existence and availability checks always hit the database, since the slot
+    unique key guards overlaps but nothing else guards the doctor's hours. A
+    conflict reported by the index is confirmed with the full query, so a stale
+    entry cannot reject a valid booking either.
+    """
+    use_index = schedule is not None and schedule.enabled and exclude_appointment_id is None
+    row = (await db.execute(booking_checks_query(
+        hospital_id, patient_id, doctor_id, appointment_datetime, exclude_appointment_id,
+        conflict_probe=not use_index,
+    ))).one()
+    patient_found, doctor_found, doctor_available = row.patient_found, row.doctor_found, row.doctor_available
+    has_conflict = False if use_index else row.has_conflict
+
+    if use_index and doctor_found:
+        index_available, has_conflict = await schedule.check(db, doctor_id, appointment_datetime)
+        if has_conflict:
+            has_conflict = (await db.execute(booking_checks_query(
+                hospital_id, patient_id, doctor_id, appointment_datetime
+            ))).one().has_conflict
+            if not has_conflict:
+                schedule.forget(doctor_id, appointment_datetime)
+        if index_available != doctor_available:
+            schedule.forget(doctor_id, appointment_datetime)
+
+    errors: List[BookingError] = []
+    if not patient_found:
+        errors.append((404, PATIENT_NOT_FOUND))
+    if not doctor_found:
+        errors.append((404, DOCTOR_NOT_FOUND))
+    elif not doctor_available:
+        errors.append((400, UNAVAILABLE_DETAIL))
+    if doctor_found and has_conflict:
+        errors.append((409, CONFLICT_DETAIL))
+    return errors
+
+
+def on_slot_grid(value: datetime) -> bool:
+    return value.minute % SLOT_GRANULE_MINUTES == 0 and value.second == 0 and value.microsecond == 0
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Datetime columns are naive; aware inputs are compared as naive UTC."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def floor_to_granule(value: datetime) -> datetime:
+    return value - timedelta(minutes=value.minute % SLOT_GRANULE_MINUTES, seconds=value.second,
+                             microseconds=value.microsecond)
+
+
+def slot_keys(appointment_datetime: datetime) -> List[datetime]:
+    """
+    Granule start times covered by an appointment: every granule its 30 minutes
+    touch. Off-grid (legacy) bookings hold one granule more than on-grid ones, so
+    that a new booking shares a granule with them exactly when the two overlap,
+    the same rule as the CONFLICT_WINDOW probe.
+    """
+    appointment_datetime = naive_utc(appointment_datetime)
+    end = appointment_datetime + timedelta(minutes=SLOT_MINUTES)
+    keys = []
+    granule = floor_to_granule(appointment_datetime)
+    while granule < end:
+        keys.append(granule)
+        granule += SLOT_GRANULE
+    return keys
+
+
+async def claim_slots(db: AsyncSession, appointment: models.Appointment) -> None:
+    """
+    Reserve the appointment's granules. Flushes, so a concurrent booking that got
+    there first surfaces here as an IntegrityError on uq_appointment_slots_doctor_slot
+    (see `is_slot_conflict`); the caller rolls back and reports a conflict. Only scheduled appointments hold slots.
+    """
+    await db.flush()
+    if appointment.status != models.AppointmentStatus.SCHEDULED.value:
+        return
+    db.add_all([
+        models.AppointmentSlot(
+            appointment_id=appointment.id,
+            doctor_id=appointment.doctor_id,
+            slot_start=slot_start,
+            hospital_id=appointment.hospital_id,
+        )
+        for slot_start in slot_keys(appointment.appointment_datetime)
+    ])
+    await db.flush()
+
+
+def is_slot_conflict(error: IntegrityError) -> bool:
+    """True when the error is the slot unique key rejecting an overlapping booking."""
+    message = str(error.orig)
+    # Postgres names the constraint; SQLite lists its columns
+    return SLOT_CONSTRAINT in message or "appointment_slots.doctor_id, appointment_slots.slot_start" in message
+
+
+async def release_slots(db: AsyncSession, appointment_id: int) -> None:
+    await db.execute(delete(models.AppointmentSlot).where(models.AppointmentSlot.appointment_id == appointment_id))
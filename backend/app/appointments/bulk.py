@@ -0,0 +1,244 @@
+"""
+Bulk and recurring appointment booking.
+
+A batch is validated with a fixed number of set-based queries (patients, doctors,
+availability windows, existing bookings in the batch's time range) and checked in
+memory, including conflicts between entries of the same batch. Accepted entries
+are written with multi-row INSERTs in chunks, together with their slot claims, and
+the whole batch produces a single aggregated audit event.
+
+`bulk_book` is an async generator of progress events so the router can either
+return the final summary or stream every event as NDJSON for large uploads.
+"""
+import bisect
+from datetime import datetime, time, timedelta
+from typing import Any, AsyncIterator, Dict, List, Set, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.appointments import models, schemas
+from app.appointments.booking import (
+    CONFLICT_DETAIL,
+    CONFLICT_WINDOW,
+    DOCTOR_NOT_FOUND,
+    PATIENT_NOT_FOUND,
+    UNAVAILABLE_DETAIL,
+    is_slot_conflict,
+    slot_keys,
+)
+from app.core.audit import log_audit_event
+from app.doctors.models import Doctor, DoctorAvailability
+from app.doctors.schedule import schedule_index
+from app.patients.models import Patient
+
+INSERT_CHUNK_SIZE = 500
+BATCH_REJECTED = "Not booked: other entries in this all-or-nothing batch were rejected"
+
+
+class BulkBookingConflict(Exception):
+    """A concurrent booking took one of the batch's slots between validation and insert."""
+
+
+def expand_recurrence(rule: schemas.RecurrenceRule) -> List[schemas.AppointmentCreate]:
+    """Concrete appointments of a series, capped at BULK_MAX_ITEMS."""
+    limit = min(rule.count or schemas.BULK_MAX_ITEMS, schemas.BULK_MAX_ITEMS)
+    start, until = rule.start, rule.until
+
+    def occurrences():
+        if rule.frequency == schemas.RecurrenceFrequency.DAILY:
+            step = 0
+            while True:
+                yield start + timedelta(days=step * rule.interval)
+                step += 1
+        weekdays = sorted(set(rule.weekdays or [start.weekday()]))
+        week_start = datetime.combine(start.date() - timedelta(days=start.weekday()), start.time())
+        while True:
+            for weekday in weekdays:
+                occurrence = week_start + timedelta(days=weekday)
+                if occurrence >= start:
+                    yield occurrence
+            week_start += timedelta(weeks=rule.interval)
+
+    items = []
+    for occurrence in occurrences():
+        if len(items) >= limit or (until is not None and occurrence > until):
+            break
+        items.append(schemas.AppointmentCreate(
+            patient_id=rule.patient_id,
+            doctor_id=rule.doctor_id,
+            appointment_datetime=occurrence,
+            reason=rule.reason,
+            notes=rule.notes,
+        ))
+    return items
+
+
+async def validate_bulk(
+    db: AsyncSession,
+    hospital_id: str,
+    items: List[schemas.AppointmentCreate],
+) -> List[List[str]]:
+    """
+    Same rules as a single booking, for every entry at once. Entries are checked in
+    order, so when two entries of the batch overlap the earlier one wins.
+    """
+    if not items:
+        return []
+    # Naive UTC already (schemas._booking_time)
+    times = [item.appointment_datetime for item in items]
+    patient_ids = {item.patient_id for item in items}
+    doctor_ids = {item.doctor_id for item in items}
+
+    found_patients: Set[int] = set((await db.execute(
+        select(Patient.id).where(Patient.hospital_id == hospital_id).where(Patient.id.in_(patient_ids))
+    )).scalars())
+    found_doctors: Set[int] = set((await db.execute(
+        select(Doctor.id).where(Doctor.hospital_id == hospital_id).where(Doctor.id.in_(doctor_ids))
+    )).scalars())
+
+    windows: Dict[Tuple[int, int], List[Tuple[time, time]]] = {}
+    for doctor_id, day_of_week, start_time, end_time in await db.execute(
+        select(
+            DoctorAvailability.doctor_id,
+            DoctorAvailability.day_of_week,
+            DoctorAvailability.start_time,
+            DoctorAvailability.end_time,
+        )
+        .where(DoctorAvailability.doctor_id.in_(found_doctors))
+        .where(DoctorAvailability.is_available == True)
+    ):
+        windows.setdefault((doctor_id, day_of_week), []).append((start_time, end_time))
+
+    # Sorted start times of scheduled bookings per doctor, existing ones first
+    booked: Dict[int, List[datetime]] = {}
+    for doctor_id, booked_at in await db.execute(
+        select(models.Appointment.doctor_id, models.Appointment.appointment_datetime)
+        .where(models.Appointment.doctor_id.in_(found_doctors))
+        .where(models.Appointment.status == models.AppointmentStatus.SCHEDULED.value)
+        .where(models.Appointment.appointment_datetime > min(times) - CONFLICT_WINDOW)
+        .where(models.Appointment.appointment_datetime < max(times) + CONFLICT_WINDOW)
+        .order_by(models.Appointment.doctor_id, models.Appointment.appointment_datetime)
+    ):
+        booked.setdefault(doctor_id, []).append(booked_at)
+
+    results = []
+    for item, when in zip(items, times):
+        errors = []
+        if item.patient_id not in found_patients:
+            errors.append(PATIENT_NOT_FOUND)
+        if item.doctor_id not in found_doctors:
+            errors.append(DOCTOR_NOT_FOUND)
+        else:
+            slots = windows.get((item.doctor_id, when.weekday()), ())
+            if not any(start <= when.time() < end for start, end in slots):
+                errors.append(UNAVAILABLE_DETAIL)
+            starts = booked.setdefault(item.doctor_id, [])
+            # Strictly within CONFLICT_WINDOW either side, as in booking_checks_query
+            position = bisect.bisect_right(starts, when - CONFLICT_WINDOW)
+            if position < len(starts) and starts[position] < when + CONFLICT_WINDOW:
+                errors.append(CONFLICT_DETAIL)
+            elif not errors and item.status == schemas.AppointmentStatus.SCHEDULED:
+                bisect.insort(starts, when)
+        results.append(errors)
+    return results
+
+
+async def _insert_accepted(
+    db: AsyncSession,
+    hospital_id: str,
+    accepted: List[Tuple[int, schemas.AppointmentCreate]],
+) -> AsyncIterator[Tuple[int, int]]:
+    """Multi-row INSERT of appointments and their slot claims; yields (item index, new id)."""
+    for offset in range(0, len(accepted), INSERT_CHUNK_SIZE):
+        chunk = accepted[offset:offset + INSERT_CHUNK_SIZE]
+        rows = [
+            {
+                **item.model_dump(exclude={"status"}),
+                "status": item.status.value,
+                "hospital_id": hospital_id,
+            }
+            for _, item in chunk
+        ]
+        ids = (await db.execute(
+            insert(models.Appointment).returning(models.Appointment.id, sort_by_parameter_order=True),
+            rows,
+        )).scalars().all()
+
+        slot_rows = [
+            {"appointment_id": appointment_id, "doctor_id": row["doctor_id"], "slot_start": slot_start, "hospital_id": hospital_id}
+            for appointment_id, row in zip(ids, rows)
+            if row["status"] == models.AppointmentStatus.SCHEDULED.value
+            for slot_start in slot_keys(row["appointment_datetime"])
+        ]
+        if slot_rows:
+            try:
+                await db.execute(insert(models.AppointmentSlot), slot_rows)
+            except IntegrityError as error:
+                if not is_slot_conflict(error):
+                    raise
+                raise BulkBookingConflict()
+        for (index, _), appointment_id in zip(chunk, ids):
+            yield index, appointment_id
+
+
+async def bulk_book(
+    db: AsyncSession,
+    hospital_id: str,
+    user_id: str,
+    request: schemas.BulkAppointmentCreate,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Validate and book a batch, yielding progress events:
+    `validated`, one `inserted` per chunk, then `done` with the per-item results.
+    Raises BulkBookingConflict (after rolling back) if a concurrent booking won a slot.
+    """
+    items = request.items if request.items is not None else expand_recurrence(request.recurrence)
+    errors = await validate_bulk(db, hospital_id, items)
+    accepted = [(index, item) for index, item in enumerate(items) if not errors[index]]
+    if request.all_or_nothing and len(accepted) < len(items):
+        for index, _ in accepted:
+            errors[index] = [BATCH_REJECTED]
+        accepted = []
+    yield {"event": "validated", "total": len(items), "valid": len(accepted)}
+
+    created: Dict[int, int] = {}
+    try:
+        async for index, appointment_id in _insert_accepted(db, hospital_id, accepted):
+            created[index] = appointment_id
+            if len(created) % INSERT_CHUNK_SIZE == 0 or len(created) == len(accepted):
+                yield {"event": "inserted", "done": len(created), "total": len(accepted)}
+    except BulkBookingConflict:
+        await db.rollback()
+        raise
+
+    if created:
+        await log_audit_event(
+            db=db,
+            user_id=user_id,
+            action="BULK_CREATE_APPOINTMENTS",
+            resource_type="Appointment",
+            details={
+                "created": len(created),
+                "rejected": len(items) - len(created),
+                "appointment_ids": sorted(created.values()),
+                "recurrence": request.recurrence.model_dump(mode="json") if request.recurrence else None,
+            },
+            hospital_id=hospital_id,
+        )
+        await db.commit()
+        for doctor_id in {items[index].doctor_id for index in created}:
+            await schedule_index.invalidate_doctor(doctor_id)
+
+    results = [
+        {
+            "index": index,
+            "appointment_datetime": item.appointment_datetime,
+            "status": "created" if index in created else "rejected",
+            "appointment_id": created.get(index),
+            "errors": errors[index],
+        }
+        for index, item in enumerate(items)
+    ]
+    yield {"event": "done", "created": len(created), "rejected": len(items) - len(created), "results": results}
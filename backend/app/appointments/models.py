@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Enum as SQLAEnum, Text
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Enum as SQLAEnum, Text, Index, UniqueConstraint
 from app.core.base import Base, HospitalIdMixin
 import enum
 
@@ -10,6 +10,12 @@ class AppointmentStatus(str, enum.Enum):
 
 class Appointment(Base, HospitalIdMixin):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # Backs keyset pagination: WHERE hospital_id = ? AND id > ? ORDER BY id
+        Index("ix_appointments_hospital_id_id", "hospital_id", "id"),
+        # Booking conflict probe: doctor_id = ? AND status = 'scheduled' AND datetime in window
+        Index("ix_appointments_doctor_status_datetime", "doctor_id", "status", "appointment_datetime"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
@@ -18,3 +24,19 @@ class Appointment(Base, HospitalIdMixin):
     reason = Column(String)
     status = Column(String, default=AppointmentStatus.SCHEDULED.value)
     notes = Column(Text)
+
+class AppointmentSlot(Base, HospitalIdMixin):
+    """
+    One row per booking granule held by a scheduled appointment. The unique key on
+    (doctor_id, slot_start) lets the database, not the application, reject a second
+    booking that overlaps an existing one, on Postgres and SQLite alike.
+    """
+    __tablename__ = "appointment_slots"
+    __table_args__ = (
+        UniqueConstraint("doctor_id", "slot_start", name="uq_appointment_slots_doctor_slot"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    appointment_id = Column(Integer, ForeignKey("appointments.id", ondelete="CASCADE"), nullable=False, index=True)
+    doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
+    slot_start = Column(DateTime, nullable=False)
@@ -1,79 +1,78 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
-from typing import List
-from datetime import timedelta
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional
+from datetime import datetime
 from app.core.database import get_db
+from app.core.pagination import PageParams, apply_filters, paginate
 from app.appointments import models, schemas
 from app.auth.deps import get_current_user
 from app.auth.models import User
 from app.core.audit import log_audit_event
-from app.patients.models import Patient
-from app.doctors.models import Doctor, DoctorAvailability
+from app.appointments.booking import CONFLICT_DETAIL, claim_slots, is_slot_conflict, release_slots, validate_booking
+from app.doctors.schedule import schedule_index
+from app.appointments.bulk import BulkBookingConflict, bulk_book
 
 router = APIRouter()
 
+BULK_CONFLICT_DETAIL = "A concurrent booking took one of the requested slots; nothing was booked, retry the batch"
+
+def booking_exception(errors) -> HTTPException:
+    # Errors come in precedence order (not found, unavailable, conflict); every reason is reported
+    return HTTPException(
+        status_code=errors[0][0],
+        detail="; ".join(detail for _, detail in errors),
+    )
+
+async def hold_slots(db: AsyncSession, db_appointment: models.Appointment) -> None:
+    # The slot unique key is the real guard against double booking; the conflict probe in
+    # validate_booking only gives a friendlier error in the common, uncontended case.
+    try:
+        await claim_slots(db, db_appointment)
+    except IntegrityError as error:
+        if not is_slot_conflict(error):
+            raise
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=CONFLICT_DETAIL)
+
+async def sync_schedule(before, after: Optional[models.Appointment]) -> None:
+    # Called once the change has committed; `before` is (doctor_id, datetime, status)
+    scheduled = models.AppointmentStatus.SCHEDULED.value
+    now = (after.doctor_id, after.appointment_datetime, after.status) if after is not None else None
+    if before == now:
+        return
+    if before is not None and before[2] == scheduled:
+        await schedule_index.released(before[0], before[1])
+    if now is not None and now[2] == scheduled:
+        await schedule_index.booked(now[0], now[1])
+
 @router.post("/", response_model=schemas.AppointmentResponse)
 async def create_appointment(
     appointment: schemas.AppointmentCreate, 
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # 1. Validate Patient
-    patient_result = await db.execute(
-        select(Patient)
-        .where(Patient.id == appointment.patient_id)
-        .where(Patient.hospital_id == current_user.hospital_id)
-    )
-    if not patient_result.scalars().first():
-        raise HTTPException(status_code=404, detail="Patient not found")
-    
-    # 2. Validate Doctor
-    doctor_result = await db.execute(
-        select(Doctor)
-        .where(Doctor.id == appointment.doctor_id)
-        .where(Doctor.hospital_id == current_user.hospital_id)
-    )
-    if not doctor_result.scalars().first():
-        raise HTTPException(status_code=404, detail="Doctor not found")
-    
-    # 3. Check Doctor Availability
-    day_of_week = appointment.appointment_datetime.weekday()
-    appt_time = appointment.appointment_datetime.time()
-    
-    availability_result = await db.execute(
-        select(DoctorAvailability)
-        .where(DoctorAvailability.doctor_id == appointment.doctor_id)
-        .where(DoctorAvailability.day_of_week == day_of_week)
-        .where(DoctorAvailability.is_available == True)
-        .where(DoctorAvailability.start_time <= appt_time)
-        .where(DoctorAvailability.end_time > appt_time)
-    )
-    if not availability_result.scalars().first():
-        raise HTTPException(
-            status_code=400, 
-            detail="Doctor is not available at the requested time"
-        )
-    
-    # 4. Check for conflicts (30 minute window)
-    window_start = appointment.appointment_datetime - timedelta(minutes=29)
-    window_end = appointment.appointment_datetime + timedelta(minutes=29)
-    
-    conflict_result = await db.execute(
-        select(models.Appointment)
-        .where(models.Appointment.doctor_id == appointment.doctor_id)
-        .where(models.Appointment.status == models.AppointmentStatus.SCHEDULED.value)
-        .where(models.Appointment.appointment_datetime > window_start)
-        .where(models.Appointment.appointment_datetime < window_end)
+    # Patient, doctor, availability and conflict checks in one round trip
+    errors = await validate_booking(
+        db,
+        hospital_id=current_user.hospital_id,
+        patient_id=appointment.patient_id,
+        doctor_id=appointment.doctor_id,
+        appointment_datetime=appointment.appointment_datetime,
+        schedule=schedule_index,
     )
-    if conflict_result.scalars().first():
-        raise HTTPException(status_code=400, detail="Doctor has a conflicting appointment")
+    if errors:
+        raise booking_exception(errors)
 
     db_appointment = models.Appointment(
         **appointment.model_dump(),
         hospital_id=current_user.hospital_id
     )
     db.add(db_appointment)
+    await hold_slots(db, db_appointment)
     
     await log_audit_event(
         db=db,
@@ -85,18 +84,61 @@ async def create_appointment(
     )
     
     await db.commit()
-    await db.refresh(db_appointment)
+    await sync_schedule(None, db_appointment)
     return db_appointment
 
+@router.post("/bulk", response_model=schemas.BulkAppointmentResponse)
+async def bulk_create_appointments(
+    request: schemas.BulkAppointmentCreate,
+    stream: bool = Query(False, description="Stream NDJSON progress events instead of a single response"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    events = bulk_book(db, current_user.hospital_id, str(current_user.id), request)
+    if not stream:
+        try:
+            async for event in events:
+                summary = event
+        except BulkBookingConflict:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=BULK_CONFLICT_DETAIL)
+        return summary
+
+    async def body():
+        # As with exports, the request session is reused after dependency teardown and closed here
+        try:
+            async for event in events:
+                yield json.dumps(event, default=str) + "\n"
+        except BulkBookingConflict:
+            yield json.dumps({"event": "error", "status": status.HTTP_409_CONFLICT, "detail": BULK_CONFLICT_DETAIL}) + "\n"
+        finally:
+            await db.close()
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
 @router.get("/", response_model=List[schemas.AppointmentResponse])
 async def list_appointments(
+    response: Response,
+    page: PageParams = Depends(),
+    patient_id: Optional[int] = None,
+    doctor_id: Optional[int] = None,
+    status: Optional[schemas.AppointmentStatus] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(models.Appointment).where(models.Appointment.hospital_id == current_user.hospital_id)
-    )
-    return result.scalars().all()
+    query = select(models.Appointment).where(models.Appointment.hospital_id == current_user.hospital_id)
+    query = apply_filters(query, models.Appointment, {
+        "patient_id": patient_id,
+        "doctor_id": doctor_id,
+        "status": status.value if status else None,
+    })
+    if date_from:
+        query = query.where(models.Appointment.appointment_datetime >= date_from)
+    if date_to:
+        query = query.where(models.Appointment.appointment_datetime < date_to)
+    items, _ = await paginate(db, query, models.Appointment, page, response)
+    return items
 
 @router.get("/{appointment_id}", response_model=schemas.AppointmentResponse)
 async def get_appointment(
@@ -130,11 +172,28 @@ async def update_appointment(
     if not db_appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     
+    before = (db_appointment.doctor_id, db_appointment.appointment_datetime, db_appointment.status)
     update_data = appointment_in.model_dump(exclude_unset=True)
+    rescheduled = "appointment_datetime" in update_data or "status" in update_data
+    if rescheduled and update_data.get("status", db_appointment.status) == models.AppointmentStatus.SCHEDULED.value:
+        # A moved or reinstated booking must fit the doctor's hours and not overlap another one
+        errors = await validate_booking(
+            db,
+            hospital_id=current_user.hospital_id,
+            patient_id=db_appointment.patient_id,
+            doctor_id=db_appointment.doctor_id,
+            appointment_datetime=update_data.get("appointment_datetime", db_appointment.appointment_datetime),
+            exclude_appointment_id=appointment_id,
+        )
+        if errors:
+            raise booking_exception(errors)
     for field, value in update_data.items():
         setattr(db_appointment, field, value)
     
     db.add(db_appointment)
+    if rescheduled:
+        await release_slots(db, appointment_id)
+        await hold_slots(db, db_appointment)
     
     await log_audit_event(
         db=db,
@@ -147,7 +206,7 @@ async def update_appointment(
     )
     
     await db.commit()
-    await db.refresh(db_appointment)
+    await sync_schedule(before, db_appointment)
     return db_appointment
 
 @router.delete("/{appointment_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -165,6 +224,8 @@ async def delete_appointment(
     if not db_appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     
+    before = (db_appointment.doctor_id, db_appointment.appointment_datetime, db_appointment.status)
+    await release_slots(db, appointment_id)
     await db.delete(db_appointment)
     
     await log_audit_event(
@@ -177,4 +238,5 @@ async def delete_appointment(
     )
     
     await db.commit()
+    await sync_schedule(before, None)
     return None
@@ -1,7 +1,18 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
+from app.appointments.booking import SLOT_GRANULE_MINUTES, naive_utc, on_slot_grid
+
+
+def _booking_time(value: Optional[datetime]) -> Optional[datetime]:
+    # Every booking path (single, bulk, recurring, reschedule) stores and checks naive UTC
+    if value is None:
+        return None
+    value = naive_utc(value)
+    if not on_slot_grid(value):
+        raise ValueError(f"appointment_datetime must fall on a {SLOT_GRANULE_MINUTES}-minute boundary")
+    return value
 
 class AppointmentStatus(str, Enum):
     SCHEDULED = "scheduled"
@@ -18,7 +29,10 @@ class AppointmentBase(BaseModel):
     notes: Optional[str] = None
 
 class AppointmentCreate(AppointmentBase):
-    pass
+    @field_validator("appointment_datetime")
+    @classmethod
+    def check_slot_grid(cls, value):
+        return _booking_time(value)
 
 class AppointmentUpdate(BaseModel):
     appointment_datetime: Optional[datetime] = None
@@ -26,7 +40,74 @@ class AppointmentUpdate(BaseModel):
     status: Optional[AppointmentStatus] = None
     notes: Optional[str] = None
 
+    @field_validator("appointment_datetime")
+    @classmethod
+    def check_slot_grid(cls, value):
+        return _booking_time(value)
+
 class AppointmentResponse(AppointmentBase):
     id: int
     hospital_id: str
     model_config = ConfigDict(from_attributes=True)
+
+# Bulk and recurring booking
+
+BULK_MAX_ITEMS = 5000
+
+class RecurrenceFrequency(str, Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+
+class RecurrenceRule(BaseModel):
+    """A series like "every Monday and Thursday at 09:00 for 12 weeks" (a subset of iCalendar RRULE)."""
+    patient_id: int
+    doctor_id: int
+    start: datetime
+    frequency: RecurrenceFrequency = RecurrenceFrequency.WEEKLY
+    interval: int = Field(1, ge=1, le=52)
+    weekdays: Optional[List[int]] = Field(None, description="0-6 (Monday-Sunday); weekly series only")
+    count: Optional[int] = Field(None, ge=1, le=BULK_MAX_ITEMS)
+    until: Optional[datetime] = None
+    reason: Optional[str] = None
+    notes: Optional[str] = None
+
+    @field_validator("start")
+    @classmethod
+    def check_slot_grid(cls, value):
+        return _booking_time(value)
+
+    @field_validator("until")
+    @classmethod
+    def check_until(cls, value):
+        return naive_utc(value) if value is not None else None
+
+    @model_validator(mode="after")
+    def check_bounds(self):
+        if self.count is None and self.until is None:
+            raise ValueError("Either count or until is required")
+        if self.weekdays is not None and any(day < 0 or day > 6 for day in self.weekdays):
+            raise ValueError("weekdays must be between 0 and 6")
+        return self
+
+class BulkAppointmentCreate(BaseModel):
+    items: Optional[List[AppointmentCreate]] = Field(None, max_length=BULK_MAX_ITEMS)
+    recurrence: Optional[RecurrenceRule] = None
+    all_or_nothing: bool = False
+
+    @model_validator(mode="after")
+    def check_source(self):
+        if (self.items is None) == (self.recurrence is None):
+            raise ValueError("Provide exactly one of items or recurrence")
+        return self
+
+class BulkItemResult(BaseModel):
+    index: int
+    appointment_datetime: datetime
+    status: str  # "created" or "rejected"
+    appointment_id: Optional[int] = None
+    errors: List[str] = []
+
+class BulkAppointmentResponse(BaseModel):
+    created: int
+    rejected: int
+    results: List[BulkItemResult]
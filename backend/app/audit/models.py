@@ -1,15 +1,27 @@
-from sqlalchemy import Column, String, Integer, DateTime, JSON, Text
+from sqlalchemy import Column, String, Integer, DateTime, JSON, Text, Index, UniqueConstraint
 from app.core.base import Base, HospitalIdMixin
 from datetime import datetime, timezone
 
 class AuditLog(Base, HospitalIdMixin):
+    """
+    On Postgres this table is created by migration 002 as a monthly RANGE-partitioned
+    table on `timestamp` (see app.audit.partitions); on SQLite it is the "hot" table and
+    closed months are rolled into per-period tables.
+    """
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # Time-window scans per tenant: WHERE hospital_id = ? AND timestamp BETWEEN ...
+        Index("ix_audit_logs_hospital_id_timestamp", "hospital_id", "timestamp"),
+        # Partitioned tables require unique keys to include the partition column
+        UniqueConstraint("event_id", "timestamp", name="uq_audit_logs_event_id_timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(String, nullable=True) # Set by the batched writer so spool replays are idempotent
     user_id = Column(String, index=True, nullable=False)
     action = Column(String, index=True, nullable=False) # e.g., "LOGIN", "VIEW_PATIENT", "UPDATE_BILLING"
     resource_type = Column(String, index=True) # e.g., "Patient", "Appointment"
     resource_id = Column(String, index=True)
     details = Column(JSON) # Detailed context about the action
     ip_address = Column(String)
-    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    timestamp = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
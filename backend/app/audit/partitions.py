@@ -0,0 +1,192 @@
+"""
+Monthly storage periods for audit_logs.
+
+Postgres: `audit_logs` is a native RANGE-partitioned table (migration 002) with one
+partition per month named `audit_logs_pYYYYMM` plus a DEFAULT partition. Queries go
+to the parent and rely on partition pruning; retention detaches and drops whole
+partitions instead of running a large DELETE.
+
+SQLite: no native partitioning, so `audit_logs` holds the current (hot) period and
+`roll_closed_periods` moves every closed month into its own `audit_logs_pYYYYMM`
+table. Range queries union the hot table with the period tables overlapping the
+window; retention drops period tables.
+"""
+import gzip
+import json
+import os
+import re
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, JSON, String, Table, MetaData, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.audit.models import AuditLog
+
+PARENT_TABLE = AuditLog.__tablename__
+PERIOD_PATTERN = re.compile(rf"^{PARENT_TABLE}_p(\d{{4}})(\d{{2}})$")
+
+
+def month_start(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def next_month(value: date) -> date:
+    return date(value.year + (value.month == 12), value.month % 12 + 1, 1)
+
+
+def previous_month(value: date) -> date:
+    return date(value.year - (value.month == 1), (value.month - 2) % 12 + 1, 1)
+
+
+def period_name(period: date) -> str:
+    return f"{PARENT_TABLE}_p{period.year:04d}{period.month:02d}"
+
+
+def parse_period(name: str) -> Optional[date]:
+    match = PERIOD_PATTERN.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def period_table(name: str) -> Table:
+    """Lightweight Table for a period table; it has the same columns as audit_logs."""
+    return Table(
+        name,
+        MetaData(),
+        Column("id", Integer),
+        Column("event_id", String),
+        Column("hospital_id", String),
+        Column("user_id", String),
+        Column("action", String),
+        Column("resource_type", String),
+        Column("resource_id", String),
+        Column("details", JSON),
+        Column("ip_address", String),
+        Column("timestamp", DateTime),
+    )
+
+
+async def list_periods(conn: AsyncConnection) -> List[Tuple[date, str]]:
+    """Existing monthly partitions (Postgres) or period tables (SQLite), oldest first."""
+    if conn.dialect.name == "postgresql":
+        result = await conn.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :parent"
+        ), {"parent": PARENT_TABLE})
+    else:
+        result = await conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE :prefix"
+        ), {"prefix": f"{PARENT_TABLE}_p%"})
+    periods = []
+    for (name,) in result:
+        period = parse_period(name)
+        if period is not None:
+            periods.append((period, name))
+    return sorted(periods)
+
+
+async def ensure_partitions(conn: AsyncConnection, now: datetime, months_ahead: int = 2) -> List[str]:
+    """Create the partitions for the current month and the next `months_ahead` (Postgres only)."""
+    if conn.dialect.name != "postgresql":
+        return []
+    created = []
+    existing = {name for _, name in await list_periods(conn)}
+    period = month_start(now)
+    for _ in range(months_ahead + 1):
+        name = period_name(period)
+        if name not in existing:
+            await conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{period.isoformat()}') TO ('{next_month(period).isoformat()}')"
+            ))
+            created.append(name)
+        period = next_month(period)
+    return created
+
+
+async def roll_closed_periods(conn: AsyncConnection, now: datetime) -> List[str]:
+    """SQLite fallback: move rows from closed months out of the hot table into period tables."""
+    if conn.dialect.name == "postgresql":
+        return []
+    current = month_start(now)
+    result = await conn.execute(text(
+        f"SELECT MIN(timestamp) FROM {PARENT_TABLE} WHERE timestamp < :current"
+    ), {"current": datetime.combine(current, datetime.min.time())})
+    oldest = result.scalar()
+    if oldest is None:
+        return []
+    if isinstance(oldest, str):
+        oldest = datetime.fromisoformat(oldest)
+
+    rolled = []
+    period = month_start(oldest)
+    while period < current:
+        name = period_name(period)
+        bounds = {
+            "start": datetime.combine(period, datetime.min.time()),
+            "end": datetime.combine(next_month(period), datetime.min.time()),
+        }
+        await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} AS SELECT * FROM {PARENT_TABLE} WHERE 0"))
+        await conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{name}_hospital_id_timestamp ON {name} (hospital_id, timestamp)"
+        ))
+        moved = await conn.execute(text(
+            f"INSERT INTO {name} SELECT * FROM {PARENT_TABLE} WHERE timestamp >= :start AND timestamp < :end"
+        ), bounds)
+        if moved.rowcount:
+            await conn.execute(text(
+                f"DELETE FROM {PARENT_TABLE} WHERE timestamp >= :start AND timestamp < :end"
+            ), bounds)
+            rolled.append(name)
+        period = next_month(period)
+    return rolled
+
+
+async def tables_for_window(conn: AsyncConnection, start: Optional[datetime], end: Optional[datetime]) -> List[Table]:
+    """Tables a range query must read. Postgres prunes partitions itself, so only the parent."""
+    tables = [AuditLog.__table__]
+    if conn.dialect.name == "postgresql":
+        return tables
+    for period, name in await list_periods(conn):
+        period_start = datetime.combine(period, datetime.min.time())
+        period_end = datetime.combine(next_month(period), datetime.min.time())
+        if (end is None or period_start < end) and (start is None or period_end > start):
+            tables.append(period_table(name))
+    return tables
+
+
+async def _archive(conn: AsyncConnection, name: str, archive_dir: str) -> str:
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.ndjson.gz")
+    result = await conn.stream(text(f"SELECT * FROM {name} ORDER BY id"))
+    with gzip.open(path, "wt", encoding="utf-8") as archive:
+        async for row in result.mappings():
+            archive.write(json.dumps(dict(row), default=str) + "\n")
+    return path
+
+
+async def drop_periods_before(
+    conn: AsyncConnection,
+    cutoff: date,
+    archive_dir: Optional[str] = None,
+) -> List[str]:
+    """
+    Drop every monthly period that ends on or before `cutoff`, optionally archiving
+    it to `<archive_dir>/<name>.ndjson.gz` first. Dropping a partition/table is a
+    metadata operation, unlike deleting millions of rows.
+    """
+    dropped = []
+    for period, name in await list_periods(conn):
+        if next_month(period) > cutoff:
+            continue
+        if archive_dir:
+            await _archive(conn, name, archive_dir)
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        await conn.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+    return dropped
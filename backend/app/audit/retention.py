@@ -0,0 +1,62 @@
+"""
+Audit log partition maintenance.
+
+Creates upcoming monthly partitions (Postgres), rolls closed months into period
+tables (SQLite), and drops or archives periods older than the retention window.
+Meant to run daily, e.g. from a Kubernetes CronJob:
+
+    python -m app.audit.retention --retain-months 24 --archive-dir /archive/audit
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.audit import partitions
+
+logger = logging.getLogger(__name__)
+
+
+def retention_cutoff(now: datetime, retain_months: int):
+    """First day of the oldest month that is kept."""
+    period = partitions.month_start(now)
+    for _ in range(retain_months - 1):
+        period = partitions.previous_month(period)
+    return period
+
+
+async def run_maintenance(
+    engine: AsyncEngine,
+    retain_months: int,
+    archive_dir: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, List[str]]:
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    async with engine.begin() as conn:
+        created = await partitions.ensure_partitions(conn, now)
+        rolled = await partitions.roll_closed_periods(conn, now)
+        dropped = await partitions.drop_periods_before(conn, retention_cutoff(now, retain_months), archive_dir)
+    return {"created": created, "rolled": rolled, "dropped": dropped}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--retain-months", type=int, required=True, help="Number of monthly periods to keep, including the current one")
+    parser.add_argument("--archive-dir", help="Write each dropped period to <dir>/<partition>.ndjson.gz first")
+    args = parser.parse_args()
+    if args.retain_months < 1:
+        parser.error("--retain-months must be at least 1")
+
+    from app.core.database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    summary = asyncio.run(run_maintenance(engine, args.retain_months, args.archive_dir))
+    for key, names in summary.items():
+        logger.info("%s: %s", key, ", ".join(names) or "-")
+
+
+if __name__ == "__main__":
+    main()
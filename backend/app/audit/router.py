@@ -1,13 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
+from sqlalchemy import select, and_, or_, union_all
+from typing import List, Optional, Tuple
+from datetime import datetime
 from app.core.database import get_db
-from app.audit import models, schemas
+from app.core.pagination import NEXT_CURSOR_HEADER, PageParams, encode_cursor_payload
+from app.audit import partitions, schemas
+from app.auth.deps import get_current_user
+from app.auth.models import User
 
 router = APIRouter()
 
+def _cursor_position(cursor: Optional[dict]) -> Optional[Tuple[datetime, int]]:
+    """(timestamp, id) of the last row returned, from a cursor issued by this endpoint."""
+    if cursor is None:
+        return None
+    try:
+        return datetime.fromisoformat(cursor["ts"]), cursor["id"]
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def _window_query(table, hospital_id: str, filters: dict, start, end, after: Optional[Tuple[datetime, int]]):
+    query = select(*[table.c[column] for column in schemas.AUDIT_COLUMNS]).where(table.c.hospital_id == hospital_id)
+    for field, value in filters.items():
+        if value is not None:
+            query = query.where(table.c[field] == value)
+    if start:
+        query = query.where(table.c.timestamp >= start)
+    if end:
+        query = query.where(table.c.timestamp < end)
+    if after:
+        # Keyset on (timestamp, id) descending: rows strictly after the last one returned
+        last_ts, last_id = after
+        query = query.where(or_(
+            table.c.timestamp < last_ts,
+            and_(table.c.timestamp == last_ts, table.c.id < last_id),
+        ))
+    return query
+
 @router.get("/", response_model=List[schemas.AuditLogResponse])
-async def list_audit_logs(hospital_id: str, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(models.AuditLog).where(models.AuditLog.hospital_id == hospital_id))
-    return result.scalars().all()
+async def list_audit_logs(
+    response: Response,
+    page: PageParams = Depends(),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    action: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    resource_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Newest-first audit trail for the caller's hospital within [start, end).
+    Served by the (hospital_id, timestamp) index and, for long histories, only the
+    monthly partitions overlapping the window.
+    """
+    after = _cursor_position(page.cursor)
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    filters = {"action": action, "resource_type": resource_type, "resource_id": resource_id, "user_id": user_id}
+    tables = await partitions.tables_for_window(await db.connection(), start, end)
+    queries = [_window_query(table, current_user.hospital_id, filters, start, end, after) for table in tables]
+
+    if len(queries) == 1:
+        source = queries[0].subquery()
+    else:
+        source = union_all(*queries).subquery()
+    query = (
+        select(source)
+        .order_by(source.c.timestamp.desc(), source.c.id.desc())
+        .limit(page.limit + 1)
+    )
+    rows = (await db.execute(query)).mappings().all()
+
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor_payload({"id": last["id"], "ts": last["timestamp"].isoformat()})
+    return rows
@@ -2,6 +2,9 @@ from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 from typing import Optional, Any
 
+# Columns returned by the audit query API (shared by audit_logs and its period tables)
+AUDIT_COLUMNS = ("id", "hospital_id", "user_id", "action", "resource_type", "resource_id", "details", "ip_address", "timestamp")
+
 class AuditLogBase(BaseModel):
     user_id: str
     action: str
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Columns copied into the cache. hashed_password is deliberately left out.
+PRINCIPAL_FIELDS = ("id", "email", "full_name", "is_active", "role", "hospital_id")
+INVALIDATION_CHANNEL = "hmtp:principal-invalidate"
+
+CacheKey = Tuple[str, str]
+
+
+def principal_key(hospital_id: str, email: str) -> CacheKey:
+    return (str(hospital_id), email)
+
+
+class TTLLRUCache:
+    """Bounded in-process cache; entries expire after `ttl` seconds and the least recently used are evicted first."""
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[CacheKey, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: CacheKey, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: CacheKey) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisPrincipalBackend:
+    """
+    Shared second-level cache so backend replicas agree on principals.
+    Invalidations are published so every replica drops its local copy immediately.
+    """
+    def __init__(self, url: str, ttl: int):
+        import redis.asyncio as redis  # optional dependency
+
+        self._redis = redis.from_url(url, decode_responses=True)
+        self.ttl = ttl
+
+    @staticmethod
+    def _redis_key(key: CacheKey) -> str:
+        return f"hmtp:principal:{key[0]}:{key[1]}"
+
+    async def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        raw = await self._redis.get(self._redis_key(key))
+        return json.loads(raw) if raw else None
+
+    async def set(self, key: CacheKey, value: Dict[str, Any]) -> None:
+        await self._redis.set(self._redis_key(key), json.dumps(value), ex=self.ttl)
+
+    async def invalidate(self, key: CacheKey) -> None:
+        await self._redis.delete(self._redis_key(key))
+        await self._redis.publish(INVALIDATION_CHANNEL, json.dumps(list(key)))
+
+    async def listen(self, local: TTLLRUCache) -> None:
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(INVALIDATION_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    hospital_id, email = json.loads(message["data"])
+                    local.delete(principal_key(hospital_id, email))
+        finally:
+            await pubsub.unsubscribe(INVALIDATION_CHANNEL)
+            await pubsub.close()
+
+
+def _build_shared_backend() -> Optional[RedisPrincipalBackend]:
+    if not settings.REDIS_URL:
+        return None
+    try:
+        return RedisPrincipalBackend(settings.REDIS_URL, settings.PRINCIPAL_CACHE_TTL)
+    except ImportError:
+        logger.warning("REDIS_URL is set but the redis package is not installed; principal cache is process-local")
+        return None
+
+
+class PrincipalCache:
+    """Two-level cache of authenticated users: process-local LRU in front of an optional Redis backend."""
+    def __init__(self, maxsize: int, ttl: int, shared: Optional[RedisPrincipalBackend] = None):
+        self.enabled = maxsize > 0 and ttl > 0
+        self.local = TTLLRUCache(maxsize, ttl)
+        self.shared = shared if self.enabled else None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def get(self, hospital_id: str, email: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        key = principal_key(hospital_id, email)
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            try:
+                value = await self.shared.get(key)
+            except Exception:
+                logger.exception("Shared principal cache read failed")
+                value = None
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    async def set(self, user: Any) -> Dict[str, Any]:
+        value = {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+        if not self.enabled:
+            return value
+        key = principal_key(value["hospital_id"], value["email"])
+        self.local.set(key, value)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, value)
+            except Exception:
+                logger.exception("Shared principal cache write failed")
+        return value
+
+    async def invalidate(self, hospital_id: str, email: str) -> None:
+        key = principal_key(hospital_id, email)
+        self.local.delete(key)
+        if self.shared is not None:
+            # Called after the change has committed; other replicas fall back on the TTL
+            try:
+                await self.shared.invalidate(key)
+            except Exception:
+                logger.exception("Shared principal cache invalidation failed")
+
+    def start(self) -> None:
+        if self.shared is not None and self._listener is None:
+            self._listener = asyncio.create_task(self.shared.listen(self.local))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+    shared=_build_shared_backend(),
+)
@@ -1,33 +1,65 @@
 from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core import database, config
 from app.auth import models, schemas, security
+from app.core.middleware import get_request_claims
+from app.auth.cache import principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{config.settings.API_V1_STR}/auth/login")
 
 from app.core.database import get_db
 
+async def get_token_claims(
+    request: Request,
+    token: str = Depends(oauth2_scheme)
+) -> dict:
+    """
+    Verified claims for the bearer token. Reuses the claims MultiTenantMiddleware
+    already decoded for this request and only falls back to decoding when the
+    middleware did not run (or the token failed verification there).
+    """
+    claims = get_request_claims(request, token)
+    if claims is not None:
+        return claims
+    try:
+        return security.decode_access_token(token)
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
 async def get_current_user(
     db: AsyncSession = Depends(get_db),
-    token: str = Depends(oauth2_scheme)
+    payload: dict = Depends(get_token_claims)
 ) -> models.User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, config.settings.SECRET_KEY, algorithms=[config.settings.ALGORITHM])
-        email: str = payload.get("sub")
-        hospital_id: str = payload.get("hospital_id")
-        if email is None or hospital_id is None:
-            raise credentials_exception
-        token_data = schemas.TokenData(email=email)
-    except JWTError:
+    email: str = payload.get("sub")
+    hospital_id: str = payload.get("hospital_id")
+    if email is None or hospital_id is None:
         raise credentials_exception
+    token_data = schemas.TokenData(email=email)
+
+    inactive_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Inactive user",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    cached = await principal_cache.get(hospital_id, token_data.email)
+    if cached is not None:
+        if not cached["is_active"]:
+            raise inactive_exception
+        # Transient instance: never attached to this request's session
+        return models.User(**cached)
     
     from sqlalchemy import select
     result = await db.execute(
@@ -39,6 +71,10 @@ async def get_current_user(
     
     if user is None:
         raise credentials_exception
+    await principal_cache.set(user)
+    # Checked on every request, so deactivating a user revokes their outstanding tokens
+    if not user.is_active:
+        raise inactive_exception
     return user
 
 async def get_hospital_id(current_user: models.User = Depends(get_current_user)) -> str:
@@ -1,3 +1,4 @@
+import time
 from datetime import timedelta
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -6,9 +7,18 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.auth import models, schemas, security, deps
+from app.auth.cache import principal_cache
+from app.core.audit import log_audit_event
 
 router = APIRouter()
 
+def password_hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/register", response_model=schemas.UserResponse)
 async def register(
     user_in: schemas.UserCreate,
@@ -25,16 +35,20 @@ async def register(
             detail="The user with this email already exists in the system.",
         )
     
+    try:
+        hashed_password = await security.get_password_hash_async(user_in.password)
+    except security.PasswordHasherBusy:
+        raise password_hasher_busy()
+
     user = models.User(
         email=user_in.email,
-        hashed_password=security.get_password_hash(user_in.password),
+        hashed_password=hashed_password,
         full_name=user_in.full_name,
         role=user_in.role,
         hospital_id=user_in.hospital_id
     )
     db.add(user)
     await db.commit()
-    await db.refresh(user)
     return user
 
 @router.post("/login", response_model=schemas.Token)
@@ -45,10 +59,27 @@ async def login_access_token(
     """
     OAuth2 compatible token login, get an access token for future requests
     """
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        token = await _authenticate(form_data, db)
+        outcome = "success"
+        return token
+    except HTTPException as exc:
+        outcome = "busy" if exc.status_code == status.HTTP_503_SERVICE_UNAVAILABLE else "rejected"
+        raise
+    finally:
+        security.login_seconds.observe(time.perf_counter() - started, outcome=outcome)
+
+async def _authenticate(form_data: OAuth2PasswordRequestForm, db: AsyncSession) -> dict:
     result = await db.execute(select(models.User).filter(models.User.email == form_data.username))
     user = result.scalars().first()
     
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    try:
+        password_ok = user is not None and await security.verify_password_async(form_data.password, user.hashed_password)
+    except security.PasswordHasherBusy:
+        raise password_hasher_busy()
+    if not password_ok:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     
     if not user.is_active:
@@ -72,3 +103,46 @@ async def read_users_me(current_user: models.User = Depends(deps.get_current_use
     Get current user.
     """
     return current_user
+
+@router.put("/users/{user_id}", response_model=schemas.UserResponse)
+async def update_user(
+    user_id: int,
+    user_in: schemas.UserUpdate,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Update a user's profile, role or active flag (admins only).
+    Drops the user from the principal cache so the change applies on their next request.
+    """
+    if current_user.role != models.UserRole.ADMIN.value:
+        raise HTTPException(status_code=403, detail="Only admins can update users")
+
+    result = await db.execute(
+        select(models.User)
+        .filter(models.User.id == user_id)
+        .filter(models.User.hospital_id == current_user.hospital_id)
+    )
+    user = result.scalars().first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    update_data = user_in.model_dump(exclude_unset=True, mode="json")
+    for field, value in update_data.items():
+        setattr(user, field, value)
+
+    db.add(user)
+
+    await log_audit_event(
+        db=db,
+        user_id=str(current_user.id),
+        action="UPDATE_USER",
+        resource_type="User",
+        resource_id=str(user_id),
+        details=update_data,
+        hospital_id=current_user.hospital_id
+    )
+
+    await db.commit()
+    await principal_cache.invalidate(user.hospital_id, user.email)
+    return user
@@ -1,10 +1,37 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union
+from typing import Any, Callable, Dict, Union
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.metrics import Histogram, register_collector
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+# bcrypt releases the GIL, so a small dedicated pool keeps hashing off the event loop
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+_password_jobs = 0  # running + queued; only touched from the event loop thread
+
+password_hash_seconds = Histogram(
+    "hmtp_auth_password_hash_seconds",
+    "bcrypt hash/verify latency including time queued for a worker",
+)
+login_seconds = Histogram(
+    "hmtp_auth_login_seconds",
+    "End-to-end latency of POST /auth/login by outcome",
+)
+register_collector(password_hash_seconds.render)
+register_collector(login_seconds.render)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing pool already has PASSWORD_HASH_MAX_PENDING jobs."""
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -12,6 +39,26 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def _run_password_job(operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+    global _password_jobs
+    if _password_jobs >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise PasswordHasherBusy()
+    _password_jobs += 1
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_executor, fn, *args)
+    finally:
+        _password_jobs -= 1
+        password_hash_seconds.observe(time.perf_counter() - started, operation=operation)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Non-blocking verify_password. Raises PasswordHasherBusy when saturated."""
+    return await _run_password_job("verify", verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Non-blocking get_password_hash. Raises PasswordHasherBusy when saturated."""
+    return await _run_password_job("hash", get_password_hash, password)
+
 def create_access_token(
     subject: Union[str, Any], 
     hospital_id: str, 
@@ -31,3 +78,7 @@ def create_access_token(
     }
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """Verify the signature and expiry of an access token and return its claims. Raises JWTError."""
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
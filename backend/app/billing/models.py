@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Integer, DateTime, Float, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text, Index, Computed, literal_column, text
 from app.core.base import Base, HospitalIdMixin
+from app.core.money import Money, ZERO
 from datetime import datetime, timezone
 import enum
 
@@ -9,26 +10,43 @@ class InvoiceStatus(str, enum.Enum):
     PARTIAL = "partial"
     CANCELLED = "cancelled"
 
+# Invoices still owed. Spelled out literally (no bound parameters) so that SQLite matches
+# queries using OUTSTANDING below to the partial index
+OUTSTANDING_SQL = "balance > 0 AND status != 'cancelled'"
+
 class Invoice(Base, HospitalIdMixin):
     __tablename__ = "invoices"
+    __table_args__ = (
+        # A patient's balance: WHERE hospital_id = ? AND patient_id = ?, summed from the index alone
+        Index("ix_invoices_hospital_id_patient_id_balance", "hospital_id", "patient_id", "balance"),
+        # Outstanding invoices of a hospital, keyset-paginated; holds only the unsettled ones
+        Index("ix_invoices_outstanding_hospital_id_id", "hospital_id", "id",
+              postgresql_where=text(OUTSTANDING_SQL), sqlite_where=text(OUTSTANDING_SQL)),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
     appointment_id = Column(Integer, ForeignKey("appointments.id"), nullable=True)
-    total_amount = Column(Float, default=0.0)
-    tax_amount = Column(Float, default=0.0)
-    discount_amount = Column(Float, default=0.0)
-    final_amount = Column(Float, default=0.0)
+    total_amount = Column(Money, default=ZERO)
+    tax_amount = Column(Money, default=ZERO)
+    discount_amount = Column(Money, default=ZERO)
+    final_amount = Column(Money, nullable=False, default=ZERO)
+    # Sum of the invoice's payments, incremented in the same UPDATE that records each one
+    # (app.billing.payments), so balance and status never need an aggregation over payments
+    amount_paid = Column(Money, nullable=False, default=ZERO)
+    balance = Column(Money, Computed("final_amount - amount_paid", persisted=True))
     status = Column(String, default=InvoiceStatus.UNPAID.value)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     due_date = Column(DateTime)
 
+OUTSTANDING = (Invoice.balance > literal_column("0")) & (Invoice.status != literal_column("'cancelled'"))
+
 class Payment(Base, HospitalIdMixin):
     __tablename__ = "payments"
 
     id = Column(Integer, primary_key=True, index=True)
     invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=False)
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     payment_method = Column(String) # Cash, Card, UPI, Insurance
     transaction_id = Column(String, unique=True, index=True)
     payment_date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
@@ -40,7 +58,7 @@ class InsuranceClaim(Base, HospitalIdMixin):
     invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=False)
     policy_number = Column(String, index=True, nullable=False)
     provider_name = Column(String, index=True, nullable=False)
-    claimed_amount = Column(Float, nullable=False)
+    claimed_amount = Column(Money, nullable=False)
     status = Column(String, default="pending")
     claim_date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     notes = Column(Text)
@@ -0,0 +1,86 @@
+"""
+Applying payments to invoices.
+
+An invoice carries the running total of its payments (amount_paid) and a
+generated balance (final_amount - amount_paid). A payment is applied with one
+conditional UPDATE, before its Payment row is inserted in the same transaction:
+
+    UPDATE invoices SET amount_paid = amount_paid + :amount,
+                        status = CASE WHEN final_amount <= amount_paid + :amount THEN 'paid' ELSE 'partial' END
+    WHERE id = :invoice AND hospital_id = :tenant AND status != 'cancelled' AND balance >= :amount
+
+The row lock taken by the UPDATE serializes concurrent payments on the same
+invoice, so none are lost. The balance can never go negative, and the status
+always matches the amounts. Outstanding balances are then read straight from
+invoices (see ix_invoices_hospital_id_patient_id_balance and the
+ix_invoices_outstanding_hospital_id_id partial index) instead of summing
+payments.
+"""
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import bindparam, case, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.billing.models import Invoice, InvoiceStatus
+from app.core.money import Money
+
+INVOICE_NOT_FOUND = "Invoice not found"
+INVOICE_CANCELLED = "Invoice is cancelled"
+OVERPAYMENT = "Payment exceeds the outstanding balance"
+
+
+class PaymentError(Exception):
+    """A payment that cannot be applied; carries the HTTP status to report."""
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+_amount = bindparam("amount", type_=Money())
+_APPLY = (
+    update(Invoice)
+    .where(Invoice.id == bindparam("invoice"))
+    .where(Invoice.hospital_id == bindparam("tenant"))
+    .where(Invoice.status != InvoiceStatus.CANCELLED.value)
+    .where(Invoice.balance >= _amount)
+    .values(
+        amount_paid=Invoice.amount_paid + _amount,
+        status=case(
+            (Invoice.final_amount <= Invoice.amount_paid + _amount, InvoiceStatus.PAID.value),
+            else_=InvoiceStatus.PARTIAL.value,
+        ),
+    )
+    .returning(Invoice.id, Invoice.final_amount, Invoice.amount_paid, Invoice.balance, Invoice.status)
+    # Refresh a copy of the invoice already loaded in the session, if any
+    .execution_options(synchronize_session="fetch")
+)
+
+
+def initial_status(final_amount: Decimal) -> str:
+    """Status of an invoice before any payment; nothing is owed on a zero invoice."""
+    return InvoiceStatus.PAID.value if final_amount <= 0 else InvoiceStatus.UNPAID.value
+
+
+async def _payment_failure(db: AsyncSession, hospital_id: str, invoice_id: int) -> PaymentError:
+    status = await db.scalar(
+        select(Invoice.status).where(Invoice.id == invoice_id).where(Invoice.hospital_id == hospital_id)
+    )
+    if status is None:
+        return PaymentError(404, INVOICE_NOT_FOUND)
+    if status == InvoiceStatus.CANCELLED.value:
+        return PaymentError(400, INVOICE_CANCELLED)
+    return PaymentError(400, OVERPAYMENT)
+
+
+async def apply_payment(db: AsyncSession, hospital_id: str, invoice_id: int, amount: Decimal) -> Any:
+    """
+    Add `amount` to the invoice's amount_paid and move its status, without
+    committing. Returns the invoice's new amounts (id, final_amount,
+    amount_paid, balance, status); raises PaymentError if it cannot be applied.
+    """
+    row = (await db.execute(_APPLY, {"invoice": invoice_id, "tenant": hospital_id, "amount": amount})).first()
+    if row is None:
+        raise await _payment_failure(db, hospital_id, invoice_id)
+    return row
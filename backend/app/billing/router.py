@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
+from sqlalchemy import func, select
+from typing import List, Optional
 from app.core.database import get_db
-from app.billing import models, schemas
+from app.core.pagination import PageParams, apply_filters, paginate
+from app.billing import models, payments, schemas
 from app.auth.deps import get_current_user
 from app.auth.models import User
 from app.core.audit import log_audit_event
@@ -19,6 +20,7 @@ async def create_invoice(
 ):
     db_invoice = models.Invoice(
         **invoice.model_dump(),
+        status=payments.initial_status(invoice.final_amount),
         hospital_id=current_user.hospital_id
     )
     db.add(db_invoice)
@@ -33,7 +35,6 @@ async def create_invoice(
     )
     
     await db.commit()
-    await db.refresh(db_invoice)
     return db_invoice
 
 @router.get("/invoices/patient/{patient_id}", response_model=List[schemas.InvoiceResponse])
@@ -49,6 +50,38 @@ async def get_patient_invoices(
     )
     return result.scalars().all()
 
+@router.get("/invoices/outstanding", response_model=List[schemas.InvoiceResponse])
+async def list_outstanding_invoices(
+    response: Response,
+    page: PageParams = Depends(),
+    patient_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Invoices with a balance left, oldest first; served from a partial index of unsettled invoices."""
+    query = (
+        select(models.Invoice)
+        .where(models.Invoice.hospital_id == current_user.hospital_id)
+        .where(models.OUTSTANDING)
+    )
+    query = apply_filters(query, models.Invoice, {"patient_id": patient_id})
+    items, _ = await paginate(db, query, models.Invoice, page, response)
+    return items
+
+@router.get("/patients/{patient_id}/balance", response_model=schemas.PatientBalanceResponse)
+async def get_patient_balance(
+    patient_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    row = (await db.execute(
+        select(func.coalesce(func.sum(models.Invoice.balance), 0), func.count())
+        .where(models.Invoice.hospital_id == current_user.hospital_id)
+        .where(models.Invoice.patient_id == patient_id)
+        .where(models.OUTSTANDING)
+    )).one()
+    return {"patient_id": patient_id, "outstanding": row[0], "invoices": row[1]}
+
 # Payment Endpoints
 @router.post("/payments/", response_model=schemas.PaymentResponse)
 async def create_payment(
@@ -56,15 +89,11 @@ async def create_payment(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # Verify invoice exists and belongs to the same hospital
-    invoice_result = await db.execute(
-        select(models.Invoice)
-        .where(models.Invoice.id == payment.invoice_id)
-        .where(models.Invoice.hospital_id == current_user.hospital_id)
-    )
-    invoice = invoice_result.scalars().first()
-    if not invoice:
-        raise HTTPException(status_code=404, detail="Invoice not found")
+    # Moves the invoice's amount_paid, balance and status in the same transaction
+    try:
+        invoice = await payments.apply_payment(db, current_user.hospital_id, payment.invoice_id, payment.amount)
+    except payments.PaymentError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.detail)
 
     db_payment = models.Payment(
         **payment.model_dump(),
@@ -72,22 +101,16 @@ async def create_payment(
     )
     db.add(db_payment)
     
-    # Simple logic: Update invoice status if fully paid
-    # In a real system, we'd check total payments vs final_amount
-    invoice.status = models.InvoiceStatus.PAID.value
-    db.add(invoice)
-    
     await log_audit_event(
         db=db,
         user_id=str(current_user.id),
         action="CREATE_PAYMENT",
         resource_type="Payment",
-        details=payment.model_dump(),
+        details={**payment.model_dump(), "invoice_balance": invoice.balance, "invoice_status": invoice.status},
         hospital_id=current_user.hospital_id
     )
     
     await db.commit()
-    await db.refresh(db_payment)
     return db_payment
 
 # Insurance Endpoints
@@ -122,5 +145,4 @@ async def create_insurance_claim(
     )
     
     await db.commit()
-    await db.refresh(db_claim)
     return db_claim
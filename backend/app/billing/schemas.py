@@ -1,34 +1,41 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from typing import Optional, List
+from app.core.money import MoneyAmount, ZERO
 
 class InvoiceBase(BaseModel):
     patient_id: int
     appointment_id: Optional[int] = None
-    total_amount: float = 0.0
-    tax_amount: float = 0.0
-    discount_amount: float = 0.0
-    final_amount: float = 0.0
-    status: str = "unpaid"
+    total_amount: MoneyAmount = ZERO
+    tax_amount: MoneyAmount = ZERO
+    discount_amount: MoneyAmount = ZERO
+    final_amount: MoneyAmount = ZERO
     due_date: Optional[datetime] = None
 
 class InvoiceCreate(InvoiceBase):
     pass
 
 class InvoiceUpdate(BaseModel):
-    status: Optional[str] = None
-    total_amount: Optional[float] = None
-    final_amount: Optional[float] = None
+    # status and final_amount are derived from payments (app.billing.payments), never set directly
+    total_amount: Optional[MoneyAmount] = None
 
 class InvoiceResponse(InvoiceBase):
     id: int
     hospital_id: str
+    amount_paid: MoneyAmount
+    balance: MoneyAmount
+    status: str  # unpaid -> partial -> paid, as payments are applied
     created_at: datetime
     model_config = ConfigDict(from_attributes=True)
 
+class PatientBalanceResponse(BaseModel):
+    patient_id: int
+    outstanding: MoneyAmount
+    invoices: int  # invoices with a balance left
+
 class PaymentBase(BaseModel):
     invoice_id: int
-    amount: float
+    amount: MoneyAmount = Field(..., gt=0)
     payment_method: Optional[str] = None
     transaction_id: Optional[str] = None
     notes: Optional[str] = None
@@ -40,7 +47,7 @@ class InsuranceClaimBase(BaseModel):
     invoice_id: int
     policy_number: str
     provider_name: str
-    claimed_amount: float
+    claimed_amount: MoneyAmount
     status: str = "pending" # pending, approved, rejected
 
 class InsuranceClaimCreate(InsuranceClaimBase):
@@ -1,10 +1,32 @@
+import uuid
+from datetime import datetime, timezone
 from typing import Any, Optional
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from app.audit.models import AuditLog
+from app.core.config import settings
 from app.core.middleware import get_current_hospital_id
+from app.core.audit_writer import get_audit_writer
 
 from fastapi.encoders import jsonable_encoder
 
+_PENDING = "audit_events"
+
+
+@event.listens_for(Session, "after_commit")
+def _submit_pending(session: Session) -> None:
+    # Only events whose transaction committed reach the writer
+    for pending in session.info.pop(_PENDING, ()):
+        get_audit_writer().submit(pending)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending(session: Session, transaction) -> None:
+    # Rolled back or closed without committing (a commit has already taken them)
+    if transaction.parent is None:
+        session.info.pop(_PENDING, None)
+
 async def log_audit_event(
     db: AsyncSession,
     user_id: str,
@@ -13,17 +35,37 @@ async def log_audit_event(
     resource_id: Optional[str] = None,
     details: Optional[Any] = None,
     ip_address: Optional[str] = None,
-    hospital_id: Optional[str] = None
+    hospital_id: Optional[str] = None,
+    strict: bool = False
 ) -> None:
     """
     Utility function to log an audit event.
     If hospital_id is not provided, it attempts to fetch it from the request context.
+
+    With AUDIT_MODE="async" the event is handed to the batched background writer
+    instead of the caller's session, once the caller's transaction commits; a
+    rollback discards it. `strict=True`, or an action listed in
+    AUDIT_STRICT_ACTIONS, keeps the row in the caller's transaction.
     """
     if not hospital_id:
         hospital_id = get_current_hospital_id()
     
     # Ensure details are JSON serializable (handles dates, etc.)
     safe_details = jsonable_encoder(details) if details else None
+
+    if settings.AUDIT_MODE == "async" and not strict and action not in settings.AUDIT_STRICT_ACTIONS:
+        db.sync_session.info.setdefault(_PENDING, []).append({
+            "event_id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "hospital_id": hospital_id,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "details": safe_details,
+            "ip_address": ip_address,
+            "timestamp": datetime.now(timezone.utc),
+        })
+        return
     
     db_audit = AuditLog(
         user_id=user_id,
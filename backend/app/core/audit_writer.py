@@ -0,0 +1,266 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.audit.models import AuditLog
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _insert_ignore_duplicates(dialect_name: str):
+    """Multi-row INSERT that skips events already written (replay after a crash)."""
+    if dialect_name == "postgresql":
+        return postgresql.insert(AuditLog).on_conflict_do_nothing(index_elements=["event_id", "timestamp"])
+    if dialect_name == "sqlite":
+        return sqlite.insert(AuditLog).on_conflict_do_nothing(index_elements=["event_id", "timestamp"])
+    raise NotImplementedError(f"Batched audit writes are not supported on {dialect_name}")
+
+
+def _encode(event: Dict[str, Any]) -> str:
+    return json.dumps({**event, "timestamp": event["timestamp"].isoformat()}, separators=(",", ":"))
+
+
+def _decode(line: str) -> Dict[str, Any]:
+    event = json.loads(line)
+    event["timestamp"] = datetime.fromisoformat(event["timestamp"])
+    return event
+
+
+class AuditWriter:
+    """
+    Asynchronous, batched audit log pipeline.
+
+    Every event is appended to a spool file (a write-ahead journal, written by a
+    dedicated thread so the event loop never waits on disk) and queued in memory.
+    A background task drains the queue and bulk-inserts batches in one
+    transaction each. Once everything queued has been committed and nothing was
+    spilled, the spool is truncated. If the process dies, `recover()` replays the
+    spool on the next start; inserts are keyed on `event_id`, so replaying
+    already-committed events is a no-op. When the in-memory queue is full the
+    event only lives in the spool and is picked up by the next replay, so callers
+    never block on audit I/O.
+
+    A replay first renames the spool aside and reads the renamed file, so events
+    spooled while the replay is being written start a new spool and are never
+    truncated away.
+    """
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        spool_path: str,
+        queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        fsync: bool = False,
+    ):
+        self.session_factory = session_factory
+        self.spool_path = spool_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=queue_size)
+        self._spool_lock = threading.Lock()
+        self._spool_file = None
+        # One thread, so spool lines keep submission order
+        self._spool_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audit-spool")
+        self._spilled = False
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped_to_spool = 0
+
+    # Producer side
+
+    def submit(self, event: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(event)
+            spilled = False
+        except asyncio.QueueFull:
+            spilled = True
+            self.dropped_to_spool += 1
+        self._spool_executor.submit(self._append_to_spool, event, spilled)
+
+    def _append_to_spool(self, event: Dict[str, Any], spilled: bool = False) -> None:
+        with self._spool_lock:
+            if self._spool_file is None:
+                directory = os.path.dirname(os.path.abspath(self.spool_path))
+                os.makedirs(directory, exist_ok=True)
+                self._spool_file = open(self.spool_path, "a", encoding="utf-8")
+            self._spool_file.write(_encode(event) + "\n")
+            self._spool_file.flush()
+            if self.fsync:
+                os.fsync(self._spool_file.fileno())
+            # Flagged only once the line is in the spool the next replay will read
+            if spilled:
+                self._spilled = True
+
+    async def spooled(self) -> None:
+        """Wait until every event submitted so far is in the spool file."""
+        await asyncio.wrap_future(self._spool_executor.submit(lambda: None))
+
+    # Consumer side
+
+    async def _write_batch(self, events: List[Dict[str, Any]]) -> None:
+        async with self.session_factory() as session:
+            statement = _insert_ignore_duplicates(session.bind.dialect.name)
+            for start in range(0, len(events), self.batch_size):
+                await session.execute(statement, events[start:start + self.batch_size])
+            await session.commit()
+        self.written += len(events)
+
+    def _drain_queue(self) -> List[Dict[str, Any]]:
+        events = []
+        while len(events) < self.batch_size:
+            try:
+                events.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return events
+
+    @property
+    def _replay_path(self) -> str:
+        return self.spool_path + ".replay"
+
+    def _close_spool(self) -> None:
+        if self._spool_file is not None:
+            self._spool_file.close()
+            self._spool_file = None
+
+    def _truncate_spool(self) -> None:
+        """Empty the spool, unless it holds spilled events that were never queued."""
+        with self._spool_lock:
+            if self._spilled:
+                return
+            self._close_spool()
+            open(self.spool_path, "w").close()
+
+    def _rotate_spool(self) -> None:
+        """Move the spool to the replay file; events spooled from now on start a new spool."""
+        with self._spool_lock:
+            self._close_spool()
+            # Spills after this point land in the new spool and flag it again
+            self._spilled = False
+            if not os.path.exists(self.spool_path):
+                return
+            if not os.path.exists(self._replay_path):
+                os.replace(self.spool_path, self._replay_path)
+                return
+            # An earlier replay failed: keep its events and add the new ones
+            with open(self._replay_path, "ab") as replay, open(self.spool_path, "rb") as spool:
+                if replay.tell() and not self._ends_with_newline(self._replay_path):
+                    replay.write(b"\n")
+                shutil.copyfileobj(spool, replay)
+            os.remove(self.spool_path)
+
+    @staticmethod
+    def _ends_with_newline(path: str) -> bool:
+        with open(path, "rb") as handle:
+            handle.seek(-1, os.SEEK_END)
+            return handle.read(1) == b"\n"
+
+    def _read_replay(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self._replay_path):
+            return []
+        with open(self._replay_path, encoding="utf-8") as spool:
+            events = []
+            for line in spool:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    events.append(_decode(line))
+                except ValueError:
+                    # A torn final line from a crash mid-write
+                    logger.warning("Skipping unreadable audit spool line")
+            return events
+
+    async def flush(self) -> None:
+        """Write everything queued (and anything that only made it to the spool)."""
+        await self.spooled()
+        while True:
+            events = self._drain_queue()
+            if not events:
+                break
+            await self._write_batch(events)
+        if self._spilled or os.path.exists(self._replay_path):
+            await self.recover()
+        elif self.queue.empty():
+            self._truncate_spool()
+
+    async def recover(self) -> int:
+        """Replay the spool file into the database, then delete the replayed copy."""
+        await self.spooled()
+        self._rotate_spool()
+        events = self._read_replay()
+        if events:
+            try:
+                await self._write_batch(events)
+            except BaseException:
+                # The replay file stays; make the next flush retry it
+                self._spilled = True
+                raise
+        if os.path.exists(self._replay_path):
+            os.remove(self._replay_path)
+        return len(events)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                first = await self.queue.get()
+                # Give concurrent requests a moment to fill the batch
+                await asyncio.sleep(self.flush_interval)
+                await self._write_batch([first] + self._drain_queue())
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Events are still in the spool; the next successful flush replays them
+                logger.exception("Audit batch write failed")
+                self._spilled = True
+
+    async def start(self) -> None:
+        if self._task is None:
+            recovered = await self.recover()
+            if recovered:
+                logger.info("Recovered %d audit events from %s", recovered, self.spool_path)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            # A batch may have been in flight when cancelled; replay the spool to be safe
+            self._spilled = True
+        await self.flush()
+
+
+_writer: Optional[AuditWriter] = None
+
+
+def get_audit_writer() -> AuditWriter:
+    global _writer
+    if _writer is None:
+        from app.core.database import AsyncSessionLocal
+
+        _writer = AuditWriter(
+            session_factory=AsyncSessionLocal,
+            spool_path=settings.AUDIT_SPOOL_PATH,
+            queue_size=settings.AUDIT_QUEUE_SIZE,
+            batch_size=settings.AUDIT_BATCH_SIZE,
+            flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+            fsync=settings.AUDIT_SPOOL_FSYNC,
+        )
+    return _writer
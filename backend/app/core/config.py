@@ -1,9 +1,10 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Hospital Management Technology Platform (HMTP)"
     API_V1_STR: str = "/api/v1"
+    DEBUG: bool = False  # adds X-DB-Statements / X-DB-Time-Ms to every response
     
     # Database
     POSTGRES_USER: str = "postgres"
@@ -13,11 +14,60 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = "hmtp_db"
     DATABASE_URL: Optional[str] = "sqlite+aiosqlite:///./hmtp.db"
 
+    # Connection pool (ignored for SQLite). Size so that
+    # replicas * uvicorn workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays below Postgres max_connections.
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # seconds
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # asyncpg prepared statements per connection; 0 behind pgbouncer
+    DB_SQLITE_BUSY_TIMEOUT: float = 30.0  # seconds a SQLite writer waits for the database lock
+
     # Security
     SECRET_KEY: str = "YOUR_SUPER_SECRET_KEY_HERE_CHANGE_IN_PRODUCTION" # TODO: Change this
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 90
 
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64  # running + queued jobs before login/register return 503
+
+    # Cache of authenticated users, keyed by (hospital_id, email). TTL 0 disables it.
+    PRINCIPAL_CACHE_TTL: int = 60  # seconds
+    PRINCIPAL_CACHE_SIZE: int = 10000
+
+    # In-memory per-doctor, per-day schedule bitmaps used by booking checks. Size 0 disables it.
+    SCHEDULE_INDEX_SIZE: int = 50000  # doctor-days
+    SCHEDULE_INDEX_TTL: int = 300  # seconds; backstop for missed cross-replica invalidations
+
+    # Audit logging. "sync" writes audit rows in the caller's transaction; "async" hands them
+    # to the batched background writer. Actions in AUDIT_STRICT_ACTIONS are always synchronous.
+    AUDIT_MODE: str = "sync"
+    AUDIT_STRICT_ACTIONS: List[str] = ["DISPENSE_MEDICINE", "CREATE_PAYMENT", "UPDATE_USER"]
+    AUDIT_QUEUE_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL: float = 0.5  # seconds to wait for a batch to fill
+    AUDIT_SPOOL_PATH: str = "./audit_spool.jsonl"
+    AUDIT_SPOOL_FSYNC: bool = False
+
+    # Request latency histograms and slow-request sampling (see /api/v1/admin/latency)
+    LATENCY_MAX_TENANTS: int = 1000  # tenants tracked individually; the rest share one series
+    SLOW_REQUEST_THRESHOLD_MS: float = 500.0
+    SLOW_REQUEST_BUFFER_SIZE: int = 200  # most recent slow requests kept in memory
+    SLOW_REQUEST_MAX_STATEMENTS: int = 50  # SQL statements kept per request for the samples
+
+    # Pharmacy alerts (see GET /api/v1/pharmacy/alerts). Interval 0 disables the in-process sweeper,
+    # e.g. when `python -m app.pharmacy.alerts` runs as a separate worker.
+    PHARMACY_ALERT_SWEEP_INTERVAL: float = 60.0  # seconds
+    PHARMACY_LOW_STOCK_THRESHOLD: int = 10  # unexpired units of a product
+    PHARMACY_EXPIRY_WARNING_DAYS: int = 90
+
+    # Redis (optional). When set, the principal cache is shared across replicas.
+    REDIS_URL: Optional[str] = None
+
     @property
     def async_database_url(self) -> str:
         if self.DATABASE_URL:
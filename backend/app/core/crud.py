@@ -0,0 +1,30 @@
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def update_returning(
+    db: AsyncSession,
+    model: Any,
+    obj_id: int,
+    hospital_id: str,
+    values: Dict[str, Any],
+    *options: Any,
+) -> Optional[Any]:
+    """
+    Apply `values` to one tenant-scoped row and load it back in the same statement
+    (UPDATE ... WHERE id = ? AND hospital_id = ? RETURNING *), replacing the usual
+    SELECT, UPDATE and post-commit refresh. Returns None when no row matched. With
+    nothing to change it is a plain SELECT. Loader `options` (e.g. selectinload) apply
+    to the returned object.
+    """
+    criteria = (model.id == obj_id, model.hospital_id == hospital_id)
+    if values:
+        statement = update(model).where(*criteria).values(**values).returning(model)
+    else:
+        statement = select(model).where(*criteria)
+    if options:
+        statement = statement.options(*options)
+    result = await db.execute(statement.execution_options(populate_existing=True))
+    return result.scalars().first()
@@ -1,8 +1,121 @@
+import threading
+import time
+from typing import Any, Dict, Iterable
+from sqlalchemy import event, exc
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.metrics import Histogram, register_collector, render_gauge
 
-engine = create_async_engine(settings.async_database_url, echo=True)
+
+class PoolStats:
+    """Process-wide counters for connection pool behaviour."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.wait_histogram = Histogram(
+            "hmtp_db_pool_acquire_seconds",
+            "Time spent waiting to acquire a connection from the pool",
+        )
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        self.wait_histogram.observe(seconds)
+
+    def incr(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait for a connection."""
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.incr("timeouts")
+            raise
+        finally:
+            pool_stats.record_wait(time.perf_counter() - started)
+
+
+def _engine_options() -> Dict[str, Any]:
+    options: Dict[str, Any] = {
+        "echo": settings.DB_ECHO,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.async_database_url.startswith("sqlite"):
+        # SQLite (local dev / tests) uses SQLAlchemy's default pool for the driver. Writers
+        # queue on the database lock, so give them longer than the 5s driver default.
+        options["connect_args"] = {"timeout": settings.DB_SQLITE_BUSY_TIMEOUT}
+        return options
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        connect_args={"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+    )
+    return options
+
+
+engine = create_async_engine(settings.async_database_url, **_engine_options())
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_stats.incr("checkouts")
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    # A queue pool reports overflow() > 0 only while connections beyond pool_size exist
+    overflow = getattr(engine.sync_engine.pool, "overflow", None)
+    if overflow is not None and overflow() > 0:
+        pool_stats.incr("overflow_events")
+
+
+def pool_status() -> Dict[str, Any]:
+    pool = engine.sync_engine.pool
+    status: Dict[str, Any] = {
+        "pool_class": type(pool).__name__,
+        "checkouts_total": pool_stats.checkouts,
+        "overflow_events_total": pool_stats.overflow_events,
+        "acquire_timeouts_total": pool_stats.timeouts,
+        "acquire_wait_seconds_total": round(pool_stats.wait_seconds_total, 6),
+        "acquire_wait_seconds_max": round(pool_stats.wait_seconds_max, 6),
+    }
+    for name in ("size", "checkedout", "checkedin", "overflow"):
+        method = getattr(pool, name, None)
+        if method is not None:
+            status[name] = method()
+    return status
+
+
+def _collect_pool_metrics() -> Iterable[str]:
+    status = pool_status()
+    for key in ("size", "checkedout", "checkedin", "overflow"):
+        if key in status:
+            yield from render_gauge(f"hmtp_db_pool_{key}", f"Connection pool {key}", status[key])
+    yield from render_gauge("hmtp_db_pool_checkouts_total", "Connections checked out of the pool", status["checkouts_total"], "counter")
+    yield from render_gauge("hmtp_db_pool_overflow_events_total", "Connections opened beyond pool_size", status["overflow_events_total"], "counter")
+    yield from render_gauge("hmtp_db_pool_acquire_timeouts_total", "Pool checkouts that hit pool_timeout", status["acquire_timeouts_total"], "counter")
+    yield from pool_stats.wait_histogram.render()
+
+
+register_collector(_collect_pool_metrics)
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
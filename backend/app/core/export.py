@@ -0,0 +1,132 @@
+import csv
+import io
+import json
+import zlib
+from enum import Enum
+from typing import Any, AsyncIterator, List, Type
+
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_FETCH_SIZE = 1000
+# Flush to the client once this many bytes are buffered
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class ExportParams:
+    """Dependency for the query parameters shared by every export endpoint."""
+    def __init__(
+        self,
+        format: ExportFormat = ExportFormat.NDJSON,
+        gzip: bool = Query(False, description="Compress the stream on the fly (.gz download)"),
+        after_id: int = Query(0, ge=0, description="Resume after the last id received"),
+    ):
+        self.format = format
+        self.gzip = gzip
+        self.after_id = after_id
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"))
+    return value
+
+
+async def _encode_rows(rows: AsyncIterator[Any], schema: Type[BaseModel], export_format: ExportFormat) -> AsyncIterator[str]:
+    fields: List[str] = list(schema.model_fields)
+    if export_format == ExportFormat.CSV:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        async for row in rows:
+            data = schema.model_validate(row).model_dump(mode="json")
+            writer.writerow([_csv_value(data[field]) for field in fields])
+            if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        lines: List[str] = []
+        size = 0
+        async for row in rows:
+            line = schema.model_validate(row).model_dump_json() + "\n"
+            lines.append(line)
+            size += len(line)
+            if size >= EXPORT_CHUNK_BYTES:
+                yield "".join(lines)
+                lines, size = [], 0
+        yield "".join(lines)
+
+
+async def _gzip(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    async for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def _encode(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    async for chunk in chunks:
+        if chunk:
+            yield chunk.encode()
+
+
+def stream_export(
+    db: AsyncSession,
+    query: Select,
+    schema: Type[BaseModel],
+    params: ExportParams,
+    filename: str,
+    scalars: bool = True,
+) -> StreamingResponse:
+    """
+    Stream `query` to the client as NDJSON or CSV with constant memory.
+
+    Rows come from a server-side cursor (`yield_per`), are serialized through
+    `schema`, and are flushed in ~64KB chunks, optionally gzip-compressed. The
+    query must be ordered by id so a client can resume with `after_id`.
+
+    FastAPI tears down yield dependencies before the body streams, so the request
+    session has already been closed by then; the generator transparently reopens
+    it and closes it again once the export finishes.
+    """
+    async def rows() -> AsyncIterator[Any]:
+        try:
+            statement = query.execution_options(yield_per=EXPORT_FETCH_SIZE)
+            if scalars:
+                result = await db.stream_scalars(statement)
+                async for row in result:
+                    yield row
+            else:
+                result = await db.stream(statement)
+                async for row in result.mappings():
+                    yield dict(row)
+        finally:
+            await db.close()
+
+    chunks = _encode_rows(rows(), schema, params.format)
+    if params.format == ExportFormat.CSV:
+        media_type, extension = "text/csv", "csv"
+    else:
+        media_type, extension = "application/x-ndjson", "ndjson"
+    if params.gzip:
+        body, media_type, extension = _gzip(chunks), "application/gzip", f"{extension}.gz"
+    else:
+        body = _encode(chunks)
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+    )
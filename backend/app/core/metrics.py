@@ -0,0 +1,94 @@
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Default latency buckets in seconds (Prometheus convention)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    """
+    Minimal Prometheus-style histogram with cumulative buckets.
+    Kept dependency-free so the backend image does not need prometheus_client.
+    """
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label key -> [bucket counts..., +Inf count], sum
+        self._series: Dict[LabelKey, List] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        self.observe_key(tuple(sorted(labels.items())), value)
+
+    def observe_key(self, key: LabelKey, value: float) -> None:
+        """`observe` for hot paths: `key` is the label pairs already sorted by name."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f"{self.name}_bucket{format_labels(key, [('le', repr(bound))])} {cumulative}"
+            cumulative += counts[-1]
+            yield f"{self.name}_bucket{format_labels(key, [('le', '+Inf')])} {cumulative}"
+            yield f"{self.name}_sum{format_labels(key)} {total}"
+            yield f"{self.name}_count{format_labels(key)} {cumulative}"
+
+
+def render_gauge(name: str, documentation: str, value: float, kind: str = "gauge") -> Iterable[str]:
+    yield f"# HELP {name} {documentation}"
+    yield f"# TYPE {name} {kind}"
+    yield f"{name} {value}"
+
+
+# Collectors return Prometheus text lines; modules register them at import time.
+_collectors: List[Callable[[], Iterable[str]]] = []
+# Run before any collector, e.g. to record observations that were batched
+_before_render: List[Callable[[], None]] = []
+
+
+def register_collector(collector: Callable[[], Iterable[str]]) -> None:
+    if collector not in _collectors:
+        _collectors.append(collector)
+
+
+def register_before_render(hook: Callable[[], None]) -> None:
+    if hook not in _before_render:
+        _before_render.append(hook)
+
+
+def render_prometheus() -> str:
+    for hook in _before_render:
+        hook()
+    lines: List[str] = []
+    for collector in _collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
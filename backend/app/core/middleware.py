@@ -1,52 +1,89 @@
 import contextvars
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
-from jose import jwt, JWTError
+from typing import Any, Dict, Optional
+from fastapi import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+from jose import JWTError
 from app.core.config import settings
+from app.auth.security import decode_access_token
 
 # Context variable to store hospital_id for the current request
 hospital_context: contextvars.ContextVar[str] = contextvars.ContextVar("hospital_id", default="")
+# Verified JWT claims for the current request, decoded once by MultiTenantMiddleware
+claims_context: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("token_claims", default=None)
 
-class MultiTenantMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Exclude public paths from tenancy enforcement
-        public_paths = [
-            "/",
-            "/health",
-            f"{settings.API_V1_STR}/auth/login",
-            f"{settings.API_V1_STR}/auth/register",
-            f"{settings.API_V1_STR}/docs",
-            f"{settings.API_V1_STR}/redoc",
-            f"{settings.API_V1_STR}/openapi.json",
-        ]
-        
-        if request.url.path in public_paths or request.method == "OPTIONS":
-            return await call_next(request)
+# Paths that skip tenancy resolution; built once at import time
+PUBLIC_PATHS = frozenset({
+    "/",
+    "/health",
+    "/health/db-pool",
+    "/metrics",
+    f"{settings.API_V1_STR}/auth/login",
+    f"{settings.API_V1_STR}/auth/register",
+    f"{settings.API_V1_STR}/docs",
+    f"{settings.API_V1_STR}/redoc",
+    f"{settings.API_V1_STR}/openapi.json",
+})
+
+class MultiTenantMiddleware:
+    """
+    Pure ASGI middleware that resolves the tenant from the bearer token.
+
+    Unlike BaseHTTPMiddleware it does not wrap the request/response in extra tasks
+    and memory streams; it only sets the context vars and request state for the
+    duration of the downstream call.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in PUBLIC_PATHS or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
 
         # Extract token from Authorization header
-        auth_header = request.headers.get("Authorization")
+        auth_header = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                auth_header = value.decode("latin-1")
+                break
         if not auth_header or not auth_header.startswith("Bearer "):
             # We don't raise 401 here to let FastAPI dependency injection handle it if needed
             # but we also don't set the context
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
         token = auth_header.split(" ")[1]
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-            hospital_id = payload.get("hospital_id")
-            if hospital_id:
-                token = hospital_context.set(str(hospital_id))
-                try:
-                    response = await call_next(request)
-                finally:
-                    hospital_context.reset(token)
-                return response
-        except (JWTError, Exception):
+            payload = decode_access_token(token)
+        except JWTError:
             # If token is invalid, let the auth dependency handle the error
-            pass
+            await self.app(scope, receive, send)
+            return
 
-        return await call_next(request)
+        # Share the verified claims with the auth dependencies so they don't decode again
+        state = scope.setdefault("state", {})
+        state["token"] = token
+        state["token_claims"] = payload
+        claims_token = claims_context.set(payload)
+        hospital_id = payload.get("hospital_id")
+        tenant_token = hospital_context.set(str(hospital_id)) if hospital_id else None
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if tenant_token is not None:
+                hospital_context.reset(tenant_token)
+            claims_context.reset(claims_token)
 
 def get_current_hospital_id() -> str:
     """Helper to get the hospital_id from context."""
     return hospital_context.get()
+
+def get_current_claims() -> Optional[Dict[str, Any]]:
+    """Helper to get the verified JWT claims from context."""
+    return claims_context.get()
+
+def get_request_claims(request: Request, token: str) -> Optional[Dict[str, Any]]:
+    """Return claims already verified for `token` earlier in this request, if any."""
+    if getattr(request.state, "token", None) == token:
+        return request.state.token_claims
+    return None
@@ -0,0 +1,49 @@
+"""
+Exact money amounts.
+
+Amounts are Decimals in Python and a whole number of cents (BIGINT) in the
+database, so sums and comparisons in SQL are exact on every backend. SQLite
+has no exact decimal type, and Numeric there silently goes through floats.
+API schemas accept at most two decimal places and render amounts as JSON
+numbers.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Annotated, Any, Optional
+
+from pydantic import Field, PlainSerializer
+from sqlalchemy import BigInteger
+from sqlalchemy.types import TypeDecorator
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+
+def to_money(value: Any) -> Decimal:
+    """Round any number (floats via their shortest repr) to whole cents."""
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class Money(TypeDecorator):
+    """Column type for amounts: Decimal in Python, integer cents in the database."""
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[int]:
+        if value is None:
+            return None
+        return int(to_money(value).scaleb(2))
+
+    def process_result_value(self, value: Optional[int], dialect) -> Optional[Decimal]:
+        if value is None:
+            return None
+        return Decimal(value).scaleb(-2)
+
+
+# Request/response field for amounts
+MoneyAmount = Annotated[
+    Decimal,
+    Field(max_digits=15, decimal_places=2),
+    PlainSerializer(float, return_type=float, when_used="json"),
+]
@@ -0,0 +1,95 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor_payload(payload: Dict[str, Any]) -> str:
+    """Encode a keyset position as an opaque, URL-safe cursor."""
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor_payload(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor produced by `encode_cursor_payload`. Raises 400 on garbage input."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, dict) or not isinstance(payload.get("id"), int):
+            raise ValueError("cursor must carry an integer id")
+        return payload
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the last seen primary key as an opaque cursor."""
+    return encode_cursor_payload({"id": last_id})
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a cursor produced by `encode_cursor`. Raises 400 on garbage input."""
+    return decode_cursor_payload(cursor)["id"]
+
+
+class PageParams:
+    """
+    Dependency that parses `cursor` and `limit` query parameters.
+    The cursor is opaque to clients; they only echo back the `X-Next-Cursor` header.
+    """
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    ):
+        self.cursor = decode_cursor_payload(cursor) if cursor else None
+        self.after_id = self.cursor["id"] if self.cursor else None
+        self.limit = limit
+
+
+def apply_filters(query: Select, model: Any, filters: Dict[str, Any]) -> Select:
+    """Add an equality predicate for every filter whose value is not None."""
+    for field, value in filters.items():
+        if value is not None:
+            query = query.where(getattr(model, field) == value)
+    return query
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    model: Any,
+    page: PageParams,
+    response: Optional[Response] = None,
+) -> Tuple[Sequence[Any], Optional[str]]:
+    """
+    Keyset pagination over `model.id`.
+
+    `query` must already be scoped to the tenant (`hospital_id == ...`), so together with
+    the `(hospital_id, id)` composite index every page is a bounded index range scan,
+    regardless of how deep the client has paged. One extra row is fetched to know whether
+    a next page exists without a COUNT(*).
+    """
+    if page.after_id is not None:
+        query = query.where(model.id > page.after_id)
+    query = query.order_by(model.id).limit(page.limit + 1)
+
+    result = await db.execute(query)
+    items: List[Any] = list(result.scalars().all())
+
+    next_cursor = None
+    if len(items) > page.limit:
+        items = items[:page.limit]
+        next_cursor = encode_cursor(items[-1].id)
+
+    if response is not None and next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items, next_cursor
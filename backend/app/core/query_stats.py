@@ -0,0 +1,122 @@
+"""
+Per-request SQL instrumentation.
+
+Cursor-level SQLAlchemy hooks, registered on every Engine, count the statements
+each request sends and the time spent waiting on the database. The counters
+live in a context variable set by RequestMetricsMiddleware (app.core.request_metrics),
+so concurrent requests never mix. Per route template they are exported as
+histograms at /metrics; with DEBUG enabled each response also carries them as
+X-DB-Statements / X-DB-Time-Ms.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+from starlette.types import Scope
+
+from app.core.config import settings
+from app.core.metrics import Histogram, register_collector
+
+STATEMENTS_HEADER = "X-DB-Statements"
+DB_TIME_HEADER = "X-DB-Time-Ms"
+# Label for requests that matched no route, so unknown paths cannot blow up cardinality
+UNMATCHED_ROUTE = "<unmatched>"
+
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250)
+
+
+class RequestQueryStats:
+    """Counters for one request; `queries` keeps the first few (sql, seconds) for slow-request samples."""
+    __slots__ = ("statements", "db_seconds", "queries")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.queries: List[Tuple[str, float]] = []
+
+
+request_query_stats: contextvars.ContextVar[Optional[RequestQueryStats]] = contextvars.ContextVar(
+    "request_query_stats", default=None
+)
+# Open capture_statements() blocks; each receives the SQL of every statement sent
+_captures: List[List[str]] = []
+
+statements_histogram = Histogram(
+    "hmtp_http_db_statements",
+    "SQL statements issued per request",
+    buckets=STATEMENT_BUCKETS,
+)
+db_time_histogram = Histogram(
+    "hmtp_http_db_seconds",
+    "Time per request spent executing SQL statements",
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._hmtp_started = time.perf_counter()
+    stats = request_query_stats.get()
+    if stats is not None:
+        stats.statements += 1
+    for captured in _captures:
+        captured.append(statement)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = request_query_stats.get()
+    started = getattr(context, "_hmtp_started", None)
+    if stats is not None and started is not None:
+        elapsed = time.perf_counter() - started
+        stats.db_seconds += elapsed
+        if len(stats.queries) < settings.SLOW_REQUEST_MAX_STATEMENTS:
+            stats.queries.append((statement, elapsed))
+
+
+@contextmanager
+def capture_statements() -> Iterator[List[str]]:
+    """Collect the SQL of every statement sent by any engine while the block runs."""
+    captured: List[str] = []
+    _captures.append(captured)
+    try:
+        yield captured
+    finally:
+        _captures.remove(captured)
+
+
+_route_templates: Dict[Tuple[int, Any, str], str] = {}
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of the route that handled the request, e.g. /api/v1/patients/{patient_id}."""
+    app, endpoint = scope.get("app"), scope.get("endpoint")
+    if app is None or endpoint is None:
+        return UNMATCHED_ROUTE
+    key = (id(app), endpoint, scope.get("method", ""))
+    template = _route_templates.get(key)
+    if template is None:
+        template = UNMATCHED_ROUTE
+        for route in getattr(app, "routes", ()):
+            if getattr(route, "endpoint", None) is endpoint and route.matches(scope)[0] == Match.FULL:
+                template = route.path
+                break
+        _route_templates[key] = template
+    return template
+
+
+def observe_request(method: str, route: str, stats: RequestQueryStats) -> None:
+    key = (("method", method), ("route", route))
+    statements_histogram.observe_key(key, stats.statements)
+    db_time_histogram.observe_key(key, stats.db_seconds)
+
+
+def _collect_query_metrics() -> Iterable[str]:
+    yield from statements_histogram.render()
+    yield from db_time_histogram.render()
+
+
+register_collector(_collect_query_metrics)
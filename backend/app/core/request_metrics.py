@@ -0,0 +1,305 @@
+"""
+Request latency histograms and slow-request sampling.
+
+RequestMetricsMiddleware times every HTTP request and records it per
+(method, route template, status) across all tenants, per hospital_id, and per
+(hospital_id, method, route template, status). All use LatencyHistogram, an
+HDR-style log-linear histogram over microseconds with sparse counters, so a
+series only holds the buckets its requests actually fell in. Percentiles are
+accurate to about 3% (16 sub-buckets per power of two).
+
+On the request path the middleware only times the request and appends
+(scope, status, elapsed, query stats) to a pending list. Route template
+lookup, tenant resolution, bucketing and the Prometheus DB histograms happen
+in batches of FLUSH_EVERY requests, or when a report is read. Requests slower
+than SLOW_REQUEST_THRESHOLD_MS are recorded straight away and copied into a
+bounded ring buffer together with their SQL statements and the DB/application
+time split. Everything is served at /api/v1/admin/latency and
+/api/v1/admin/slow-requests (the caller's hospital only), and the all-tenant
+route percentiles are exported as a summary at /metrics.
+
+All recording happens on the event loop thread, so the counters are not locked.
+"""
+import math
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import format_labels, register_before_render, register_collector
+from app.core.query_stats import (
+    DB_TIME_HEADER,
+    STATEMENTS_HEADER,
+    RequestQueryStats,
+    observe_request,
+    request_query_stats,
+    route_template,
+)
+
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# Values are clamped to 2**31 µs (~36 minutes)
+MAX_MAGNITUDE = 31 - SUB_BUCKET_BITS - 1
+BUCKET_COUNT = ((MAX_MAGNITUDE + 1) << SUB_BUCKET_BITS) + SUB_BUCKETS
+MAX_VALUE_US = (1 << 31) - 1
+
+OTHER_TENANTS = "<other>"
+NO_TENANT = "<none>"
+SUMMARY_QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _bucket_index(value_us: int) -> int:
+    # Values below 2 * SUB_BUCKETS get one bucket each; above that every power of
+    # two is split into SUB_BUCKETS equal buckets.
+    magnitude = value_us.bit_length() - SUB_BUCKET_BITS - 1
+    if magnitude <= 0:
+        return value_us
+    return (magnitude << SUB_BUCKET_BITS) + (value_us >> magnitude)
+
+
+def _bucket_bounds(index: int) -> Tuple[int, int]:
+    """[low, high) in microseconds of the values counted in bucket `index`."""
+    if index < 2 * SUB_BUCKETS:
+        return index, index + 1
+    magnitude = (index >> SUB_BUCKET_BITS) - 1
+    low = (index - (magnitude << SUB_BUCKET_BITS)) << magnitude
+    return low, low + (1 << magnitude)
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "count", "total_us", "max_us")
+
+    def __init__(self):
+        # bucket index -> count; one route's latencies fill only a few dozen buckets
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def record(self, value_us: int) -> None:
+        if value_us > MAX_VALUE_US:
+            value_us = MAX_VALUE_US
+        index = _bucket_index(value_us)
+        counts = self.counts
+        counts[index] = counts.get(index, 0) + 1
+        self.count += 1
+        self.total_us += value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def percentiles(self, quantiles: Sequence[float]) -> List[float]:
+        """Microsecond values at each quantile (midpoint of the bucket that holds it)."""
+        if not self.count:
+            return [0.0] * len(quantiles)
+        targets = [max(1, math.ceil(q * self.count)) for q in quantiles]
+        values: List[float] = []
+        seen = 0
+        position = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            while position < len(targets) and seen >= targets[position]:
+                low, high = _bucket_bounds(index)
+                values.append(min((low + high - 1) / 2, self.max_us))
+                position += 1
+            if position == len(targets):
+                break
+        return values
+
+    def summary(self) -> Dict[str, Any]:
+        p50, p95, p99 = self.percentiles((0.5, 0.95, 0.99))
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_us / self.count / 1000, 3) if self.count else 0.0,
+            "p50_ms": round(p50 / 1000, 3),
+            "p95_ms": round(p95 / 1000, 3),
+            "p99_ms": round(p99 / 1000, 3),
+            "max_ms": round(self.max_us / 1000, 3),
+        }
+
+
+class RequestMetrics:
+    """Latency histograms per route and per tenant, plus the slow-request ring buffer."""
+    # Pending requests recorded per batch; bounds the scopes held between flushes
+    FLUSH_EVERY = 256
+
+    def __init__(self, max_tenants: int, slow_buffer_size: int):
+        self.max_tenants = max_tenants
+        self.routes: Dict[Tuple[str, str, int], LatencyHistogram] = {}
+        self.tenants: Dict[str, LatencyHistogram] = {}
+        self.tenant_routes: Dict[Tuple[str, str, str, int], LatencyHistogram] = {}
+        self.slow: Deque[Dict[str, Any]] = deque(maxlen=slow_buffer_size)
+        self.pending: List[Tuple[Scope, int, float, RequestQueryStats]] = []
+
+    def defer(self, scope: Scope, status_code: int, elapsed: float, stats: RequestQueryStats) -> None:
+        """Per-request entry point: queue the request, record it later in a batch."""
+        if elapsed * 1000 >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            # Sampled now, so the sample's timestamp and statements are the request's own
+            self._record_scope(scope, status_code, elapsed, stats)
+            return
+        self.pending.append((scope, status_code, elapsed, stats))
+        if len(self.pending) >= self.FLUSH_EVERY:
+            self.flush()
+
+    def flush(self) -> None:
+        pending, self.pending = self.pending, []
+        for scope, status_code, elapsed, stats in pending:
+            self._record_scope(scope, status_code, elapsed, stats)
+
+    def _record_scope(self, scope: Scope, status_code: int, elapsed: float, stats: RequestQueryStats) -> None:
+        method, route = scope["method"], route_template(scope)
+        observe_request(method, route, stats)
+        self.record(method, route, status_code, _request_hospital_id(scope), elapsed, stats, scope["path"])
+
+    def record(
+        self,
+        method: str,
+        route: str,
+        status_code: int,
+        hospital_id: Optional[str],
+        elapsed: float,
+        stats: Optional[RequestQueryStats] = None,
+        path: str = "",
+    ) -> None:
+        value_us = int(elapsed * 1_000_000)
+        key = (method, route, status_code)
+        histogram = self.routes.get(key)
+        if histogram is None:
+            histogram = self.routes[key] = LatencyHistogram()
+        histogram.record(value_us)
+
+        tenant = hospital_id or NO_TENANT
+        histogram = self.tenants.get(tenant)
+        if histogram is None:
+            if len(self.tenants) >= self.max_tenants:
+                tenant = OTHER_TENANTS
+                histogram = self.tenants.get(tenant)
+            if histogram is None:
+                histogram = self.tenants[tenant] = LatencyHistogram()
+        histogram.record(value_us)
+
+        tenant_key = (tenant, method, route, status_code)
+        histogram = self.tenant_routes.get(tenant_key)
+        if histogram is None:
+            histogram = self.tenant_routes[tenant_key] = LatencyHistogram()
+        histogram.record(value_us)
+
+        if value_us >= settings.SLOW_REQUEST_THRESHOLD_MS * 1000:
+            self._sample(method, route, path, status_code, hospital_id, elapsed, stats)
+
+    def _sample(self, method, route, path, status_code, hospital_id, elapsed, stats) -> None:
+        db_seconds = stats.db_seconds if stats is not None else 0.0
+        self.slow.append({
+            "at": datetime.now(timezone.utc).isoformat(),
+            "method": method,
+            "route": route,
+            "path": path,
+            "status": status_code,
+            "hospital_id": hospital_id,
+            "duration_ms": round(elapsed * 1000, 3),
+            "db_ms": round(db_seconds * 1000, 3),
+            "app_ms": round((elapsed - db_seconds) * 1000, 3),
+            "statements": stats.statements if stats is not None else 0,
+            "queries": [
+                {"sql": sql, "ms": round(seconds * 1000, 3)}
+                for sql, seconds in (stats.queries if stats is not None else ())
+            ],
+        })
+
+    def latency_report(self, hospital_id: str) -> Dict[str, Any]:
+        """Route and overall latency of one tenant; slowest p99 first."""
+        self.flush()
+        routes = [
+            {"method": method, "route": route, "status": status_code, **histogram.summary()}
+            for (tenant, method, route, status_code), histogram in self.tenant_routes.items()
+            if tenant == hospital_id
+        ]
+        tenants = [
+            {"hospital_id": tenant, **histogram.summary()}
+            for tenant, histogram in self.tenants.items()
+            if tenant == hospital_id
+        ]
+        routes.sort(key=lambda row: row["p99_ms"], reverse=True)
+        return {"routes": routes, "tenants": tenants}
+
+    def slow_requests(self) -> List[Dict[str, Any]]:
+        """Newest first."""
+        return list(reversed(self.slow))
+
+    def reset(self) -> None:
+        self.pending.clear()
+        self.routes.clear()
+        self.tenants.clear()
+        self.tenant_routes.clear()
+        self.slow.clear()
+
+
+request_metrics = RequestMetrics(
+    max_tenants=settings.LATENCY_MAX_TENANTS,
+    slow_buffer_size=settings.SLOW_REQUEST_BUFFER_SIZE,
+)
+
+
+def _request_hospital_id(scope: Scope) -> Optional[str]:
+    # MultiTenantMiddleware leaves the verified claims in the request state
+    claims = scope.get("state", {}).get("token_claims")
+    if claims:
+        hospital_id = claims.get("hospital_id")
+        return str(hospital_id) if hospital_id else None
+    return None
+
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware that scopes RequestQueryStats to each HTTP request and
+    queues its latency for recording once the response body has been sent.
+    """
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = request_query_stats.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.DEBUG:
+                    headers = list(message.get("headers", []))
+                    headers.append((STATEMENTS_HEADER.lower().encode(), str(stats.statements).encode()))
+                    headers.append((DB_TIME_HEADER.lower().encode(), f"{stats.db_seconds * 1000:.2f}".encode()))
+                    message["headers"] = headers
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_query_stats.reset(token)
+            self.metrics.defer(scope, status_code, elapsed, stats)
+
+
+def _collect_latency_metrics() -> Iterable[str]:
+    name = "hmtp_http_request_duration_seconds"
+    yield f"# HELP {name} Request latency by route and status"
+    yield f"# TYPE {name} summary"
+    for (method, route, status_code), histogram in list(request_metrics.routes.items()):
+        labels = (("method", method), ("route", route), ("status", str(status_code)))
+        for quantile, value in zip(SUMMARY_QUANTILES, histogram.percentiles(SUMMARY_QUANTILES)):
+            yield f"{name}{format_labels(labels, [('quantile', str(quantile))])} {value / 1_000_000}"
+        yield f"{name}_sum{format_labels(labels)} {histogram.total_us / 1_000_000}"
+        yield f"{name}_count{format_labels(labels)} {histogram.count}"
+
+
+register_before_render(request_metrics.flush)
+register_collector(_collect_latency_metrics)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Time, ForeignKey, Boolean
+from sqlalchemy import Column, String, Integer, Time, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.core.base import Base, HospitalIdMixin
 
@@ -17,6 +17,10 @@ class Doctor(Base, HospitalIdMixin):
 
 class DoctorAvailability(Base, HospitalIdMixin):
     __tablename__ = "doctor_availabilities"
+    __table_args__ = (
+        # Booking availability probe: doctor_id = ? AND day_of_week = ?
+        Index("ix_doctor_availabilities_doctor_day", "doctor_id", "day_of_week"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
@@ -2,12 +2,15 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
-from typing import List
+from typing import List, Optional
 from app.core.database import get_db
 from app.doctors import models, schemas
 from app.auth.deps import get_current_user
 from app.auth.models import User
 from app.core.audit import log_audit_event
+from app.core.crud import update_returning
+from app.doctors.slots import SlotSearchParams, find_free_slots
+from app.doctors.schedule import schedule_index
 
 router = APIRouter()
 
@@ -17,9 +20,12 @@ async def create_doctor(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    # A new doctor has no availability yet; setting the collection up front lets
+    # the response serialize without reloading it
     db_doctor = models.Doctor(
         **doctor.model_dump(),
-        hospital_id=current_user.hospital_id
+        hospital_id=current_user.hospital_id,
+        availabilities=[]
     )
     db.add(db_doctor)
     
@@ -33,14 +39,7 @@ async def create_doctor(
     )
     
     await db.commit()
-    
-    # Re-fetch with selectinload to avoid lazy-load error during serialization
-    result = await db.execute(
-        select(models.Doctor)
-        .options(selectinload(models.Doctor.availabilities))
-        .where(models.Doctor.id == db_doctor.id)
-    )
-    return result.scalars().first()
+    return db_doctor
 
 @router.get("/", response_model=List[schemas.DoctorResponse])
 async def list_doctors(
@@ -54,6 +53,38 @@ async def list_doctors(
     )
     return result.scalars().all()
 
+def _free_slots_response(rows) -> List[schemas.DoctorFreeSlots]:
+    return [
+        schemas.DoctorFreeSlots(
+            doctor_id=doctor_id,
+            full_name=full_name,
+            free=[schemas.FreeInterval(start=start, end=end) for start, end in intervals],
+        )
+        for doctor_id, full_name, intervals in rows
+    ]
+
+@router.get("/slots", response_model=List[schemas.DoctorFreeSlots])
+async def search_free_slots(
+    specialization: Optional[str] = None,
+    search: SlotSearchParams = Depends(),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    rows = await find_free_slots(db, current_user.hospital_id, search, specialization=specialization)
+    return _free_slots_response(rows)
+
+@router.get("/{doctor_id}/slots", response_model=schemas.DoctorFreeSlots)
+async def get_doctor_free_slots(
+    doctor_id: int,
+    search: SlotSearchParams = Depends(),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    rows = await find_free_slots(db, current_user.hospital_id, search, doctor_id=doctor_id)
+    if not rows:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    return _free_slots_response(rows)[0]
+
 @router.get("/{doctor_id}", response_model=schemas.DoctorResponse)
 async def get_doctor(
     doctor_id: int,
@@ -78,21 +109,14 @@ async def update_doctor(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(models.Doctor)
-        .where(models.Doctor.id == doctor_id)
-        .where(models.Doctor.hospital_id == current_user.hospital_id)
+    update_data = doctor_in.model_dump(exclude_unset=True)
+    db_doctor = await update_returning(
+        db, models.Doctor, doctor_id, current_user.hospital_id, update_data,
+        selectinload(models.Doctor.availabilities),
     )
-    db_doctor = result.scalars().first()
     if not db_doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     
-    update_data = doctor_in.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_doctor, field, value)
-    
-    db.add(db_doctor)
-    
     await log_audit_event(
         db=db,
         user_id=str(current_user.id),
@@ -104,14 +128,7 @@ async def update_doctor(
     )
     
     await db.commit()
-    
-    # Re-fetch with selectinload
-    result = await db.execute(
-        select(models.Doctor)
-        .options(selectinload(models.Doctor.availabilities))
-        .where(models.Doctor.id == doctor_id)
-    )
-    return result.scalars().first()
+    return db_doctor
 
 # Availability Endpoints
 
@@ -149,7 +166,7 @@ async def create_doctor_availability(
     )
     
     await db.commit()
-    await db.refresh(db_availability)
+    await schedule_index.invalidate_doctor(doctor_id)
     return db_availability
 
 @router.delete("/{doctor_id}/availability/{availability_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -181,6 +198,7 @@ async def delete_doctor_availability(
     )
     
     await db.commit()
+    await schedule_index.invalidate_doctor(doctor_id)
     return None
 
 @router.delete("/{doctor_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -210,4 +228,5 @@ async def delete_doctor(
     )
     
     await db.commit()
+    await schedule_index.invalidate_doctor(doctor_id)
     return None
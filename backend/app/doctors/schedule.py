@@ -0,0 +1,287 @@
+"""
+Materialized per-doctor, per-day schedules.
+
+Each (doctor, day) is two bitmaps of 5-minute granules held in Python ints: the
+granules where a booking may start (from the weekly availability windows) and
+the granules held by scheduled appointments. The conflict check of a booking is
+then a couple of bit operations instead of a range probe over appointments.
+
+Entries are built lazily from the database and kept up to date incrementally:
+appointment changes set or clear bits after they commit, availability changes
+retire every cached day of that doctor. Other replicas learn about changes over
+Redis pub/sub (when REDIS_URL is set) and drop their copies; entries also expire
+after SCHEDULE_INDEX_TTL as a backstop.
+
+The index is an accelerator, not the source of truth, and an entry can be
+stale: a missed pub/sub message, replicas without REDIS_URL, or up to
+SCHEDULE_INDEX_TTL after a change. The caller (validate_booking) therefore only
+uses it to skip the conflict probe. Availability is always read from the
+database, a reported conflict is confirmed there before rejecting, and a missed
+conflict is still caught by the appointment_slots unique key. The availability
+bitmap is compared with the database's answer, and an entry that disagrees is
+dropped.
+"""
+import asyncio
+import json
+import logging
+import threading
+import uuid
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.appointments.booking import SLOT_GRANULE_MINUTES, SLOT_MINUTES, naive_utc
+from app.appointments.models import Appointment, AppointmentStatus
+from app.auth.cache import TTLLRUCache
+from app.core.config import settings
+from app.core.metrics import register_collector, render_gauge
+from app.doctors.models import DoctorAvailability
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "hmtp:schedule-invalidate"
+GRANULE_SECONDS = SLOT_GRANULE_MINUTES * 60
+GRANULES_PER_DAY = 24 * 60 // SLOT_GRANULE_MINUTES
+GRANULES_PER_SLOT = SLOT_MINUTES // SLOT_GRANULE_MINUTES
+SLOT_LENGTH = timedelta(minutes=SLOT_MINUTES)
+
+
+def _granule(value: time) -> int:
+    """Index of the first granule starting at or after `value`."""
+    seconds = value.hour * 3600 + value.minute * 60 + value.second
+    return -(-seconds // GRANULE_SECONDS)
+
+
+def _span(first: int, count: int) -> int:
+    return ((1 << count) - 1) << first
+
+
+class DaySchedule:
+    __slots__ = ("available", "booked", "generation")
+
+    def __init__(self, available: int, booked: int, generation: int):
+        self.available = available
+        self.booked = booked
+        self.generation = generation
+
+    def can_start_at(self, granule: int) -> bool:
+        return bool(self.available >> granule & 1)
+
+    def overlaps(self, granule: int) -> bool:
+        return bool(self.booked & _span(granule, GRANULES_PER_SLOT))
+
+
+class RedisScheduleChannel:
+    """Broadcasts schedule changes so other replicas drop their cached days."""
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # optional dependency
+
+        self._redis = redis.from_url(url, decode_responses=True)
+
+    async def publish(self, message: Dict) -> None:
+        await self._redis.publish(INVALIDATION_CHANNEL, json.dumps(message))
+
+    async def listen(self, index: "ScheduleIndex") -> None:
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(INVALIDATION_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    index.apply_remote(json.loads(message["data"]))
+        finally:
+            await pubsub.unsubscribe(INVALIDATION_CHANNEL)
+            await pubsub.close()
+
+
+def _build_channel() -> Optional[RedisScheduleChannel]:
+    if not settings.REDIS_URL:
+        return None
+    try:
+        return RedisScheduleChannel(settings.REDIS_URL)
+    except ImportError:
+        logger.warning("REDIS_URL is set but the redis package is not installed; schedule index is process-local")
+        return None
+
+
+class ScheduleIndex:
+    """
+    Process-local cache of DaySchedule entries keyed by (doctor_id, day).
+
+    Two per-doctor counters keep it consistent without scanning the cache:
+    `generation` retires every cached day of a doctor at once (availability
+    changed), and `changes` lets a lazy build detect that a booking committed
+    while it was reading, in which case the freshly built entry is not cached.
+    """
+    def __init__(self, maxsize: int, ttl: int, channel: Optional[RedisScheduleChannel] = None):
+        self.enabled = maxsize > 0 and ttl > 0
+        self.local = TTLLRUCache(maxsize, ttl)
+        self.channel = channel if self.enabled else None
+        self.replica_id = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._generation: Dict[int, int] = {}
+        self._changes: Dict[int, int] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _key(doctor_id: int, day: date) -> Tuple[str, str]:
+        return (str(doctor_id), day.isoformat())
+
+    # Reads
+
+    def cached(self, doctor_id: int, day: date) -> Optional[DaySchedule]:
+        entry = self.local.get(self._key(doctor_id, day))
+        if entry is not None and entry.generation == self._generation.get(doctor_id, 0):
+            return entry
+        return None
+
+    async def day(self, db: AsyncSession, doctor_id: int, day: date) -> DaySchedule:
+        entry = self.cached(doctor_id, day)
+        if entry is not None:
+            return entry
+
+        generation = self._generation.get(doctor_id, 0)
+        changes = self._changes.get(doctor_id, 0)
+        entry = await self._build(db, doctor_id, day, generation)
+        with self._lock:
+            if changes == self._changes.get(doctor_id, 0):
+                self.local.set(self._key(doctor_id, day), entry)
+        return entry
+
+    async def _build(self, db: AsyncSession, doctor_id: int, day: date, generation: int) -> DaySchedule:
+        day_start = datetime.combine(day, time())
+        windows = await db.execute(
+            select(DoctorAvailability.start_time, DoctorAvailability.end_time)
+            .where(DoctorAvailability.doctor_id == doctor_id)
+            .where(DoctorAvailability.day_of_week == day.weekday())
+            .where(DoctorAvailability.is_available == True)
+        )
+        available = 0
+        for start_time, end_time in windows:
+            first, last = _granule(start_time), _granule(end_time)
+            if last > first:
+                available |= _span(first, last - first)
+
+        # Appointments that started late the previous day can spill into this one
+        bookings = await db.execute(
+            select(Appointment.appointment_datetime)
+            .where(Appointment.doctor_id == doctor_id)
+            .where(Appointment.status == AppointmentStatus.SCHEDULED.value)
+            .where(Appointment.appointment_datetime > day_start - SLOT_LENGTH)
+            .where(Appointment.appointment_datetime < day_start + timedelta(days=1))
+        )
+        booked = 0
+        for (booked_at,) in bookings:
+            booked = _apply_booking(booked, booked_at - day_start, True)
+        return DaySchedule(available, booked, generation)
+
+    async def check(self, db: AsyncSession, doctor_id: int, appointment_datetime: datetime) -> Tuple[bool, bool]:
+        """(doctor can start at that time, an existing booking overlaps it)."""
+        appointment_datetime = naive_utc(appointment_datetime)
+        day_start = datetime.combine(appointment_datetime.date(), time())
+        granule = int((appointment_datetime - day_start).total_seconds()) // GRANULE_SECONDS
+        entry = await self.day(db, doctor_id, day_start.date())
+        conflict = entry.overlaps(granule)
+        if not conflict and granule + GRANULES_PER_SLOT > GRANULES_PER_DAY:
+            following = await self.day(db, doctor_id, day_start.date() + timedelta(days=1))
+            conflict = following.overlaps(granule - GRANULES_PER_DAY)
+        return entry.can_start_at(granule), conflict
+
+    # Incremental maintenance, called after the change has committed
+
+    async def booked(self, doctor_id: int, appointment_datetime: datetime) -> None:
+        await self._apply(doctor_id, naive_utc(appointment_datetime), True)
+
+    async def released(self, doctor_id: int, appointment_datetime: datetime) -> None:
+        await self._apply(doctor_id, naive_utc(appointment_datetime), False)
+
+    def forget(self, doctor_id: int, appointment_datetime: datetime) -> None:
+        """Drop a cached day that disagreed with the database."""
+        self.local.delete(self._key(doctor_id, naive_utc(appointment_datetime).date()))
+
+    async def invalidate_doctor(self, doctor_id: int) -> None:
+        self._retire_doctor(doctor_id)
+        await self._publish({"doctor_id": doctor_id})
+
+    async def _apply(self, doctor_id: int, appointment_datetime: datetime, held: bool) -> None:
+        if not self.enabled:
+            return
+        days = {appointment_datetime.date(), (appointment_datetime + SLOT_LENGTH - timedelta(microseconds=1)).date()}
+        with self._lock:
+            self._changes[doctor_id] = self._changes.get(doctor_id, 0) + 1
+            for day in days:
+                entry = self.cached(doctor_id, day)
+                if entry is not None:
+                    entry.booked = _apply_booking(entry.booked, appointment_datetime - datetime.combine(day, time()), held)
+        for day in days:
+            await self._publish({"doctor_id": doctor_id, "day": day.isoformat()})
+
+    def _retire_doctor(self, doctor_id: int) -> None:
+        with self._lock:
+            self._generation[doctor_id] = self._generation.get(doctor_id, 0) + 1
+            self._changes[doctor_id] = self._changes.get(doctor_id, 0) + 1
+
+    async def _publish(self, message: Dict) -> None:
+        if self.channel is None:
+            return
+        try:
+            await self.channel.publish({**message, "origin": self.replica_id})
+        except Exception:
+            # Other replicas fall back to the entry TTL
+            logger.exception("Schedule invalidation publish failed")
+
+    def apply_remote(self, message: Dict) -> None:
+        if message.get("origin") == self.replica_id:
+            return
+        doctor_id = int(message["doctor_id"])
+        if "day" in message:
+            with self._lock:
+                self._changes[doctor_id] = self._changes.get(doctor_id, 0) + 1
+                self.local.delete(self._key(doctor_id, date.fromisoformat(message["day"])))
+        else:
+            self._retire_doctor(doctor_id)
+
+    def start(self) -> None:
+        if self.channel is not None and self._listener is None:
+            self._listener = asyncio.create_task(self.channel.listen(self))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+
+
+def _apply_booking(booked: int, offset: timedelta, held: bool) -> int:
+    """
+    Set or clear the granules of a booking starting `offset` after the day's
+    midnight: every granule its 30 minutes touch, as in booking.slot_keys.
+    """
+    start = int(offset.total_seconds())
+    first = start // GRANULE_SECONDS
+    last = -(-(start + int(SLOT_LENGTH.total_seconds())) // GRANULE_SECONDS)
+    lo, hi = max(first, 0), min(last, GRANULES_PER_DAY)
+    if lo >= hi:
+        return booked
+    mask = _span(lo, hi - lo)
+    return booked | mask if held else booked & ~mask
+
+
+schedule_index = ScheduleIndex(
+    maxsize=settings.SCHEDULE_INDEX_SIZE,
+    ttl=settings.SCHEDULE_INDEX_TTL,
+    channel=_build_channel(),
+)
+
+
+def _collect_schedule_metrics():
+    yield from render_gauge("hmtp_schedule_index_entries", "Doctor-days held in the schedule index", len(schedule_index.local))
+    yield from render_gauge("hmtp_schedule_index_hits_total", "Schedule index lookups served from memory", schedule_index.local.hits, kind="counter")
+    yield from render_gauge("hmtp_schedule_index_misses_total", "Schedule index lookups that had to be built", schedule_index.local.misses, kind="counter")
+
+
+register_collector(_collect_schedule_metrics)
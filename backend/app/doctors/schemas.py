@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict, EmailStr
 from typing import Optional, List
-from datetime import time
+from datetime import datetime, time
 
 class DoctorAvailabilityBase(BaseModel):
     day_of_week: int # 0-6
@@ -36,3 +36,12 @@ class DoctorResponse(DoctorBase):
     hospital_id: str
     availabilities: List[DoctorAvailabilityResponse] = []
     model_config = ConfigDict(from_attributes=True)
+
+class FreeInterval(BaseModel):
+    start: datetime
+    end: datetime
+
+class DoctorFreeSlots(BaseModel):
+    doctor_id: int
+    full_name: str
+    free: List[FreeInterval]
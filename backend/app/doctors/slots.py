@@ -0,0 +1,191 @@
+"""
+Free-slot search.
+
+A doctor's free time is their weekly availability windows expanded over the
+requested range, minus the intervals held by scheduled appointments. Both sides
+are loaded for every doctor in the search at once (a fixed number of queries)
+and merged per doctor in a single sorted sweep over integer minute offsets, so
+the cost does not depend on how many slots the window contains.
+"""
+from datetime import datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query
+from sqlalchemy import Integer, cast, extract, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.appointments.booking import SLOT_GRANULE_MINUTES, SLOT_MINUTES, naive_utc
+from app.appointments.models import Appointment, AppointmentStatus
+from app.doctors.models import Doctor, DoctorAvailability
+
+Interval = Tuple[datetime, datetime]
+# weekday -> [(start_time, end_time)]
+WeeklyWindows = Dict[int, List[Tuple[time, time]]]
+
+APPOINTMENT_LENGTH = timedelta(minutes=SLOT_MINUTES)
+MINUTE = timedelta(minutes=1)
+DAY_MINUTES = 24 * 60
+MAX_SEARCH_DAYS = 62
+
+
+class SlotSearchParams:
+    """Dependency for the `from`, `to` and `duration` query parameters of slot searches."""
+    def __init__(
+        self,
+        start: datetime = Query(..., alias="from"),
+        end: datetime = Query(..., alias="to"),
+        duration: int = Query(SLOT_MINUTES, ge=SLOT_GRANULE_MINUTES, le=12 * 60, description="Minutes of free time needed"),
+    ):
+        self.start = naive_utc(start)
+        self.end = naive_utc(end)
+        if self.end <= self.start:
+            raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+        if self.end - self.start > timedelta(days=MAX_SEARCH_DAYS):
+            raise HTTPException(status_code=400, detail=f"Search window is limited to {MAX_SEARCH_DAYS} days")
+        self.duration = timedelta(minutes=duration)
+
+
+def merge_intervals(intervals: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Union of intervals, sorted, with overlapping or touching ones coalesced."""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _minutes(value: timedelta) -> int:
+    return value // MINUTE
+
+
+def _minutes_since(column, origin: datetime, dialect_name: str):
+    """SQL expression for whole minutes from `origin` to `column`, so rows arrive as ints."""
+    if dialect_name == "postgresql":
+        return cast(func.floor(extract("epoch", column - literal(origin)) / 60), Integer)
+    return cast(func.round((func.julianday(column) - func.julianday(literal(origin))) * DAY_MINUTES), Integer)
+
+
+def _free_minutes(
+    windows: WeeklyWindows,
+    booked: Sequence[int],
+    origin: datetime,
+    lo: int,
+    hi: int,
+    needed: int,
+) -> List[Interval]:
+    """
+    Single sweep over the availability windows (in day order) and the sorted
+    booking start offsets; every booking covers SLOT_MINUTES from its start.
+    """
+    day_windows = {
+        weekday: merge_intervals((ws.hour * 60 + ws.minute, we.hour * 60 + we.minute) for ws, we in spans)
+        for weekday, spans in windows.items()
+    }
+    result: List[Interval] = []
+
+    def emit(a: int, b: int) -> None:
+        a = -(-a // SLOT_GRANULE_MINUTES) * SLOT_GRANULE_MINUTES
+        if b - a >= needed:
+            result.append((origin + timedelta(minutes=a), origin + timedelta(minutes=b)))
+
+    j, count = 0, len(booked)
+    first_weekday = origin.weekday()
+    for day in range(hi // DAY_MINUTES + 1):
+        base = day * DAY_MINUTES
+        for window_start, window_end in day_windows.get((first_weekday + day) % 7, ()):
+            start, end = max(base + window_start, lo), min(base + window_end, hi)
+            if start >= end:
+                continue
+            while j < count and booked[j] + SLOT_MINUTES <= start:
+                j += 1
+            k = j
+            while k < count and booked[k] < end:
+                if booked[k] > start:
+                    emit(start, booked[k])
+                start = max(start, booked[k] + SLOT_MINUTES)
+                k += 1
+            if start < end:
+                emit(start, end)
+    return result
+
+
+def free_intervals(
+    windows: WeeklyWindows,
+    booked: Iterable[datetime],
+    start: datetime,
+    end: datetime,
+    duration: timedelta,
+) -> List[Interval]:
+    """
+    Free intervals in [start, end) that can hold a booking of `duration`.
+
+    The sweep runs on integer minutes since midnight of the first day, which keeps
+    it cheap for month-long windows; starts are rounded up to the booking grid.
+    """
+    origin = datetime.combine(start.date(), time())
+    return _free_minutes(
+        windows,
+        sorted(_minutes(booked_at - origin) for booked_at in booked),
+        origin,
+        -_minutes(origin - start),
+        _minutes(end - origin),
+        _minutes(duration),
+    )
+
+
+async def find_free_slots(
+    db: AsyncSession,
+    hospital_id: str,
+    search: SlotSearchParams,
+    doctor_id: Optional[int] = None,
+    specialization: Optional[str] = None,
+) -> List[Tuple[int, str, List[Interval]]]:
+    """(doctor_id, full_name, free intervals) for every matching doctor, ordered by doctor id."""
+    start, end = search.start, search.end
+    origin = datetime.combine(start.date(), time())
+
+    doctors = select(Doctor.id).where(Doctor.hospital_id == hospital_id)
+    if doctor_id is not None:
+        doctors = doctors.where(Doctor.id == doctor_id)
+    if specialization is not None:
+        doctors = doctors.where(Doctor.specialization == specialization)
+
+    # Plain column projections: run them on the Core connection and skip ORM row handling
+    conn = await db.connection()
+    doctor_rows = (await conn.execute(
+        select(Doctor.id, Doctor.full_name).where(Doctor.id.in_(doctors)).order_by(Doctor.id)
+    )).all()
+    window_rows = (await conn.execute(
+        select(
+            DoctorAvailability.doctor_id,
+            DoctorAvailability.day_of_week,
+            DoctorAvailability.start_time,
+            DoctorAvailability.end_time,
+        )
+        .where(DoctorAvailability.doctor_id.in_(doctors))
+        .where(DoctorAvailability.is_available == True)
+    )).all()
+    booked_rows = (await conn.execute(
+        select(Appointment.doctor_id, _minutes_since(Appointment.appointment_datetime, origin, conn.dialect.name))
+        .where(Appointment.doctor_id.in_(doctors))
+        .where(Appointment.status == AppointmentStatus.SCHEDULED.value)
+        .where(Appointment.appointment_datetime > start - APPOINTMENT_LENGTH)
+        .where(Appointment.appointment_datetime < end)
+        .order_by(Appointment.doctor_id, Appointment.appointment_datetime)
+    )).all()
+
+    windows: Dict[int, WeeklyWindows] = {}
+    for row in window_rows:
+        windows.setdefault(row.doctor_id, {}).setdefault(row.day_of_week, []).append((row.start_time, row.end_time))
+    booked: Dict[int, List[int]] = {}
+    for booked_doctor_id, offset in booked_rows:
+        booked.setdefault(booked_doctor_id, []).append(offset)
+
+    lo, hi, needed = -_minutes(origin - start), _minutes(end - origin), _minutes(search.duration)
+    return [
+        (row.id, row.full_name, _free_minutes(windows.get(row.id, {}), booked.get(row.id, ()), origin, lo, hi, needed))
+        for row in doctor_rows
+    ]
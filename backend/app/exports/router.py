@@ -0,0 +1,100 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, union_all
+from typing import Optional
+from datetime import datetime
+from app.core.database import get_db
+from app.core.export import ExportParams, stream_export
+from app.core.pagination import apply_filters
+from app.auth.deps import get_current_user
+from app.auth.models import User
+from app.audit import partitions
+from app.audit import schemas as audit_schemas
+from app.patients.models import Patient
+from app.patients.schemas import PatientResponse
+from app.labs.models import LabTest
+from app.labs.schemas import LabTestResponse
+from app.pharmacy.models import Prescription
+from app.pharmacy.schemas import PrescriptionResponse
+from app.billing.models import Invoice
+from app.billing.schemas import InvoiceResponse
+
+router = APIRouter()
+
+def _tenant_query(model, current_user: User, params: ExportParams, **filters):
+    query = (
+        select(model)
+        .where(model.hospital_id == current_user.hospital_id)
+        .where(model.id > params.after_id)
+    )
+    return apply_filters(query, model, filters).order_by(model.id)
+
+@router.get("/audit-logs")
+async def export_audit_logs(
+    params: ExportParams = Depends(),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    action: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    tables = await partitions.tables_for_window(await db.connection(), start, end)
+    queries = []
+    for table in tables:
+        query = (
+            select(*[table.c[column] for column in audit_schemas.AUDIT_COLUMNS])
+            .where(table.c.hospital_id == current_user.hospital_id)
+            .where(table.c.id > params.after_id)
+        )
+        if start:
+            query = query.where(table.c.timestamp >= start)
+        if end:
+            query = query.where(table.c.timestamp < end)
+        if action:
+            query = query.where(table.c.action == action)
+        if resource_type:
+            query = query.where(table.c.resource_type == resource_type)
+        queries.append(query)
+    source = (queries[0] if len(queries) == 1 else union_all(*queries)).subquery()
+    query = select(source).order_by(source.c.id)
+    return stream_export(db, query, audit_schemas.AuditLogResponse, params, "audit_logs", scalars=False)
+
+@router.get("/patients")
+async def export_patients(
+    params: ExportParams = Depends(),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    query = _tenant_query(Patient, current_user, params)
+    return stream_export(db, query, PatientResponse, params, "patients")
+
+@router.get("/lab-tests")
+async def export_lab_tests(
+    params: ExportParams = Depends(),
+    patient_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    query = _tenant_query(LabTest, current_user, params, patient_id=patient_id)
+    return stream_export(db, query, LabTestResponse, params, "lab_tests")
+
+@router.get("/prescriptions")
+async def export_prescriptions(
+    params: ExportParams = Depends(),
+    patient_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    query = _tenant_query(Prescription, current_user, params, patient_id=patient_id)
+    return stream_export(db, query, PrescriptionResponse, params, "prescriptions")
+
+@router.get("/invoices")
+async def export_invoices(
+    params: ExportParams = Depends(),
+    patient_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    query = _tenant_query(Invoice, current_user, params, patient_id=patient_id)
+    return stream_export(db, query, InvoiceResponse, params, "invoices")
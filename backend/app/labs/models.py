@@ -1,9 +1,13 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text, Index
 from app.core.base import Base, HospitalIdMixin
 from datetime import datetime, timezone
 
 class LabTest(Base, HospitalIdMixin):
     __tablename__ = "lab_tests"
+    __table_args__ = (
+        # Backs keyset pagination: WHERE hospital_id = ? AND id > ? ORDER BY id
+        Index("ix_lab_tests_hospital_id_id", "hospital_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import List, Optional
 from app.core.database import get_db
+from app.core.pagination import PageParams, apply_filters, paginate
 from app.labs import models, schemas
 from app.auth.deps import get_current_user
 from app.auth.models import User
 from app.core.audit import log_audit_event
+from app.core.crud import update_returning
 
 router = APIRouter()
 
@@ -32,18 +34,28 @@ async def create_lab_test(
     )
     
     await db.commit()
-    await db.refresh(db_test)
     return db_test
 
 @router.get("/", response_model=List[schemas.LabTestResponse])
 async def list_lab_tests(
+    response: Response,
+    page: PageParams = Depends(),
+    patient_id: Optional[int] = None,
+    doctor_id: Optional[int] = None,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(models.LabTest).where(models.LabTest.hospital_id == current_user.hospital_id)
-    )
-    return result.scalars().all()
+    query = select(models.LabTest).where(models.LabTest.hospital_id == current_user.hospital_id)
+    query = apply_filters(query, models.LabTest, {
+        "patient_id": patient_id,
+        "doctor_id": doctor_id,
+        "category": category,
+        "status": status,
+    })
+    items, _ = await paginate(db, query, models.LabTest, page, response)
+    return items
 
 @router.get("/{test_id}", response_model=schemas.LabTestResponse)
 async def get_lab_test(
@@ -68,21 +80,11 @@ async def update_lab_test(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(models.LabTest)
-        .where(models.LabTest.id == test_id)
-        .where(models.LabTest.hospital_id == current_user.hospital_id)
-    )
-    db_test = result.scalars().first()
+    update_data = test_in.model_dump(exclude_unset=True)
+    db_test = await update_returning(db, models.LabTest, test_id, current_user.hospital_id, update_data)
     if not db_test:
         raise HTTPException(status_code=404, detail="Lab test not found")
     
-    update_data = test_in.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_test, field, value)
-    
-    db.add(db_test)
-    
     await log_audit_event(
         db=db,
         user_id=str(current_user.id),
@@ -94,7 +96,6 @@ async def update_lab_test(
     )
     
     await db.commit()
-    await db.refresh(db_test)
     return db_test
 
 @router.get("/patient/{patient_id}", response_model=List[schemas.LabTestResponse])
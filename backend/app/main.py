@@ -1,4 +1,6 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core import config
 from app.auth import router as auth_router
@@ -10,7 +12,32 @@ from app.labs import router as lab_router
 from app.procedures import router as procedure_router
 from app.pharmacy import router as pharmacy_router
 from app.billing import router as billing_router
+from app.exports import router as export_router
+from app.admin import router as admin_router
 from app.core.middleware import MultiTenantMiddleware
+from app.core.query_stats import DB_TIME_HEADER, STATEMENTS_HEADER
+from app.core.request_metrics import RequestMetricsMiddleware
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.metrics import render_prometheus
+from app.core.database import pool_status
+from app.auth.cache import principal_cache
+from app.core.audit_writer import get_audit_writer
+from app.doctors.schedule import schedule_index
+from app.pharmacy.alerts import get_alert_sweeper
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    principal_cache.start()
+    schedule_index.start()
+    if config.settings.AUDIT_MODE == "async":
+        await get_audit_writer().start()
+    get_alert_sweeper().start()
+    yield
+    await get_alert_sweeper().stop()
+    if config.settings.AUDIT_MODE == "async":
+        await get_audit_writer().stop()
+    await schedule_index.stop()
+    await principal_cache.stop()
 
 app = FastAPI(
     title=config.settings.PROJECT_NAME,
@@ -19,6 +46,7 @@ app = FastAPI(
     openapi_url=f"{config.settings.API_V1_STR}/openapi.json",
     docs_url=f"{config.settings.API_V1_STR}/docs",
     redoc_url=f"{config.settings.API_V1_STR}/redoc",
+    lifespan=lifespan,
 )
 
 # CORS Middleware
@@ -30,8 +58,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, STATEMENTS_HEADER, DB_TIME_HEADER],
 )
 
+# Outermost, so request timing covers the other middleware too
+app.add_middleware(RequestMetricsMiddleware)
+
 app.include_router(auth_router.router, prefix=f"{config.settings.API_V1_STR}/auth", tags=["auth"])
 app.include_router(patient_router.router, prefix=f"{config.settings.API_V1_STR}/patients", tags=["patients"])
 app.include_router(doctor_router.router, prefix=f"{config.settings.API_V1_STR}/doctors", tags=["doctors"])
@@ -41,6 +73,8 @@ app.include_router(lab_router.router, prefix=f"{config.settings.API_V1_STR}/labs
 app.include_router(procedure_router.router, prefix=f"{config.settings.API_V1_STR}/procedures", tags=["procedures"])
 app.include_router(pharmacy_router.router, prefix=f"{config.settings.API_V1_STR}/pharmacy", tags=["pharmacy"])
 app.include_router(billing_router.router, prefix=f"{config.settings.API_V1_STR}/billing", tags=["billing"])
+app.include_router(export_router.router, prefix=f"{config.settings.API_V1_STR}/exports", tags=["exports"])
+app.include_router(admin_router.router, prefix=f"{config.settings.API_V1_STR}/admin", tags=["admin"])
 
 @app.get("/")
 def read_root():
@@ -53,3 +87,12 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus scrape endpoint."""
+    return render_prometheus()
+
+@app.get("/health/db-pool")
+def db_pool_health():
+    return pool_status()
@@ -1,8 +1,12 @@
-from sqlalchemy import Column, String, Integer, Date, Text
+from sqlalchemy import Column, DDL, String, Integer, Date, Text, Index, event
 from app.core.base import Base, HospitalIdMixin
 
 class Patient(Base, HospitalIdMixin):
     __tablename__ = "patients"
+    __table_args__ = (
+        # Backs keyset pagination: WHERE hospital_id = ? AND id > ? ORDER BY id
+        Index("ix_patients_hospital_id_id", "hospital_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     first_name = Column(String, index=True, nullable=False)
@@ -13,3 +17,50 @@ class Patient(Base, HospitalIdMixin):
     address = Column(Text)
     emergency_contact_name = Column(String)
     emergency_contact_phone = Column(String)
+
+
+# Search index for GET /patients/search (see app/patients/search.py). Both indexes are
+# raw DDL kept in sync with the table by the database itself, so bulk loads that
+# bypass the ORM (seed_data.py) are indexed too.
+SEARCH_TABLE = "patients_search"
+# Postgres: pg_trgm GIN indexes over the normalised name and phone digits. Queries must
+# use exactly these expressions for the planner to pick the indexes.
+PG_SEARCH_NAME = "lower(first_name || ' ' || last_name)"
+PG_SEARCH_PHONE = r"regexp_replace(coalesce(phone_number, ''), '\D', '', 'g')"
+PG_SEARCH_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS ix_patients_search_name ON patients USING gin (({PG_SEARCH_NAME}) gin_trgm_ops)",
+    f"CREATE INDEX IF NOT EXISTS ix_patients_search_phone ON patients USING gin (({PG_SEARCH_PHONE}) gin_trgm_ops)",
+)
+# SQLite: an external-content FTS5 table with the trigram tokenizer (substring and
+# case-insensitive matching), fed from a view that strips phone punctuation and kept
+# current by triggers.
+_SQLITE_PHONE = "replace(replace(replace(replace(replace(replace({}, '+', ''), '-', ''), ' ', ''), '(', ''), ')', ''), '.', '')"
+SQLITE_SEARCH_DDL = (
+    f"CREATE VIEW IF NOT EXISTS {SEARCH_TABLE}_source AS "
+    f"SELECT id, first_name, last_name, {_SQLITE_PHONE.format('phone_number')} AS phone FROM patients",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    f"first_name, last_name, phone, content='{SEARCH_TABLE}_source', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai AFTER INSERT ON patients BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, first_name, last_name, phone) "
+    f"VALUES (new.id, new.first_name, new.last_name, {_SQLITE_PHONE.format('new.phone_number')}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad AFTER DELETE ON patients BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, first_name, last_name, phone) "
+    f"VALUES ('delete', old.id, old.first_name, old.last_name, {_SQLITE_PHONE.format('old.phone_number')}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au AFTER UPDATE OF first_name, last_name, phone_number ON patients BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, first_name, last_name, phone) "
+    f"VALUES ('delete', old.id, old.first_name, old.last_name, {_SQLITE_PHONE.format('old.phone_number')}); "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, first_name, last_name, phone) "
+    f"VALUES (new.id, new.first_name, new.last_name, {_SQLITE_PHONE.format('new.phone_number')}); END",
+)
+SQLITE_SEARCH_DROP = (
+    f"DROP TABLE IF EXISTS {SEARCH_TABLE}",
+    f"DROP VIEW IF EXISTS {SEARCH_TABLE}_source",
+)
+
+for _statement in PG_SEARCH_DDL:
+    event.listen(Patient.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(Patient.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in SQLITE_SEARCH_DROP:
+    event.listen(Patient.__table__, "after_drop", DDL(_statement).execute_if(dialect="sqlite"))
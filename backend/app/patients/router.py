@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import List, Optional
 from app.core.database import get_db
-from app.patients import models, schemas
+from app.core.pagination import PageParams, apply_filters, paginate
+from app.patients import models, schemas, search
 from app.auth.deps import get_current_user
 from app.auth.models import User
 from app.core.audit import log_audit_event
+from app.core.crud import update_returning
 
 router = APIRouter()
 
@@ -32,18 +34,38 @@ async def create_patient(
     )
     
     await db.commit()
-    await db.refresh(db_patient)
     return db_patient
 
 @router.get("/", response_model=List[schemas.PatientResponse])
 async def list_patients(
+    response: Response,
+    page: PageParams = Depends(),
+    first_name: Optional[str] = None,
+    last_name: Optional[str] = None,
+    gender: Optional[str] = None,
+    phone_number: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(models.Patient).where(models.Patient.hospital_id == current_user.hospital_id)
-    )
-    return result.scalars().all()
+    query = select(models.Patient).where(models.Patient.hospital_id == current_user.hospital_id)
+    query = apply_filters(query, models.Patient, {
+        "first_name": first_name,
+        "last_name": last_name,
+        "gender": gender,
+        "phone_number": phone_number,
+    })
+    items, _ = await paginate(db, query, models.Patient, page, response)
+    return items
+
+@router.get("/search", response_model=List[schemas.PatientResponse])
+async def search_patients(
+    q: str = Query(..., min_length=1, max_length=100, description="Partial name and/or phone number"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Best matches first: word prefixes, then substrings, then close spellings."""
+    return await search.search_patients(db, current_user.hospital_id, q, limit)
 
 @router.get("/{patient_id}", response_model=schemas.PatientResponse)
 async def get_patient(
@@ -68,21 +90,11 @@ async def update_patient(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(models.Patient)
-        .where(models.Patient.id == patient_id)
-        .where(models.Patient.hospital_id == current_user.hospital_id)
-    )
-    db_patient = result.scalars().first()
+    update_data = patient_in.model_dump(exclude_unset=True)
+    db_patient = await update_returning(db, models.Patient, patient_id, current_user.hospital_id, update_data)
     if not db_patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     
-    update_data = patient_in.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_patient, field, value)
-    
-    db.add(db_patient)
-    
     await log_audit_event(
         db=db,
         user_id=str(current_user.id),
@@ -94,7 +106,6 @@ async def update_patient(
     )
     
     await db.commit()
-    await db.refresh(db_patient)
     return db_patient
 
 @router.delete("/{patient_id}", status_code=status.HTTP_204_NO_CONTENT)
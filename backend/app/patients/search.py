@@ -0,0 +1,227 @@
+"""
+Ranked, tenant-scoped patient search by partial name or phone number.
+
+The database narrows the tenant's patients down to at most CANDIDATE_LIMIT
+candidates through a trigram index, and `score` ranks those in Python, so both
+dialects order results the same way. A token can match in three ways, from
+best to worst: as a word prefix ("gar" -> Garcia), as a substring ("arci"), or
+approximately by shared trigrams ("garsia"). Tokens made only of digits and
+phone punctuation are matched against the phone number digits.
+
+SQLite (FTS5 trigram table `patients_search`): a prefix pass runs first, since
+a name starting with every token outscores any name that only contains one. A
+substring pass follows when it found fewer than `limit` candidates, and a
+fuzzy pass when the two together still did. Each pass keeps the best
+CANDIDATE_LIMIT matches by bm25 (FTS5 `rank`, which favours short names such
+as exact matches), so a common token ("son", "555") cannot push the best
+matches out of the capped set. The FTS5 side is matched first and the tenant
+is filtered on the join (CROSS JOIN forces that order), so the patients table
+is only probed by primary key.
+A fuzzy pass requires some pair of the token's trigrams to co-occur (or the
+first three letters to start a word), which is far more selective than any
+single trigram.
+
+Postgres (pg_trgm GIN indexes): a single query matches `LIKE '%token%'` or the
+word-similarity operator `<%`. The planner combines it with the hospital_id
+index through a BitmapAnd.
+
+Queries whose tokens are all shorter than a trigram ("Li") fall back to a
+prefix scan over the tenant's rows, which keeps whole-name matches and then
+the shortest names within the cap.
+"""
+import re
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, case, func, literal, literal_column, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.patients.models import PG_SEARCH_NAME, PG_SEARCH_PHONE, SEARCH_TABLE, Patient
+
+CANDIDATE_LIMIT = 200
+MAX_TOKENS = 5
+# Trigrams per token used to build the fuzzy pairs (at most 28 pairs)
+MAX_FUZZY_TRIGRAMS = 8
+# Minimum score of every token, same default as pg_trgm.similarity_threshold
+SIMILARITY_THRESHOLD = 0.3
+
+_PHONE_TOKEN = re.compile(r"[\d+()\-.]+")
+_NAME_CHARS = re.compile(r"[^\w'-]|[\d_]")
+
+
+class SearchTerms:
+    """Normalised query: lowercase name tokens and the phone digits typed."""
+    def __init__(self, q: str):
+        names: List[str] = []
+        digits = ""
+        for raw in q.split():
+            if _PHONE_TOKEN.fullmatch(raw):
+                digits += re.sub(r"\D", "", raw)
+                continue
+            token = _NAME_CHARS.sub("", raw.lower())
+            if token:
+                names.append(token)
+        self.names = names[:MAX_TOKENS]
+        self.digits = digits
+
+    def __bool__(self) -> bool:
+        return bool(self.names or self.digits)
+
+    @property
+    def indexable(self) -> bool:
+        """Whether a trigram index can serve the query (some token has 3+ characters)."""
+        return len(self.digits) >= 3 or any(len(token) >= 3 for token in self.names)
+
+
+def _pg_trigrams(word: str) -> set:
+    # pg_trgm style: each word padded with two spaces in front and one behind
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: str, b: str) -> float:
+    """Trigram similarity of two words, as pg_trgm's similarity()."""
+    left, right = _pg_trigrams(a), _pg_trigrams(b)
+    return len(left & right) / len(left | right)
+
+
+def _token_score(token: str, words: Sequence[str]) -> float:
+    best = 0.0
+    for word in words:
+        if word == token:
+            return 1.0
+        if word.startswith(token):
+            score = 0.8 + 0.1 * len(token) / len(word)
+        elif token in word:
+            score = 0.6 + 0.1 * len(token) / len(word)
+        else:
+            score = similarity(token, word)
+        best = max(best, score)
+    return best
+
+
+def score(terms: SearchTerms, patient: Patient) -> float:
+    """Mean score of the query tokens, or 0.0 when any token matches too weakly."""
+    scores: List[float] = []
+    if terms.names:
+        words = f"{patient.first_name} {patient.last_name}".lower().split()
+        scores.extend(_token_score(token, words) for token in terms.names)
+    if terms.digits:
+        phone = re.sub(r"\D", "", patient.phone_number or "")
+        scores.append(1.0 if terms.digits in phone else 0.0)
+    if not scores or min(scores) < SIMILARITY_THRESHOLD:
+        return 0.0
+    return sum(scores) / len(scores)
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+
+def _starts_with(value: str) -> str:
+    return f"(first_name : ^ {_quote(value)} OR last_name : ^ {_quote(value)})"
+
+
+def _fts_queries(terms: SearchTerms) -> Tuple[str, Optional[str], Optional[str]]:
+    """FTS5 MATCH expressions for the substring, prefix and fuzzy passes."""
+    tokens = [token for token in terms.names if len(token) >= 3]
+    phone = [f"phone : {_quote(terms.digits)}"] if len(terms.digits) >= 3 else []
+    substring = [f"{{first_name last_name}} : {_quote(token)}" for token in tokens]
+    fuzzy = []
+    for token, exact in zip(tokens, substring):
+        trigrams = list(dict.fromkeys(token[i:i + 3] for i in range(len(token) - 2)))[:MAX_FUZZY_TRIGRAMS]
+        if len(trigrams) < 2:
+            fuzzy.append(exact)
+            continue
+        # A word sharing the first three letters stands in for pg_trgm's padded
+        # leading trigrams, which FTS5 does not index
+        pairs = " OR ".join(f"({_quote(a)} AND {_quote(b)})" for a, b in combinations(trigrams, 2))
+        fuzzy.append(f"({{first_name last_name}} : ({pairs}) OR {_starts_with(trigrams[0])})")
+    if not tokens:
+        return " AND ".join(phone), None, None
+    return (
+        " AND ".join(substring + phone),
+        " AND ".join([_starts_with(token) for token in tokens] + phone),
+        " AND ".join(fuzzy + phone) if any(len(token) >= 4 for token in tokens) else None,
+    )
+
+
+async def _sqlite_candidates(db: AsyncSession, hospital_id: str, terms: SearchTerms, limit: int) -> List[Patient]:
+    statement = text(
+        f"SELECT patients.* FROM {SEARCH_TABLE} CROSS JOIN patients ON patients.id = {SEARCH_TABLE}.rowid "
+        f"WHERE {SEARCH_TABLE} MATCH :match AND patients.hospital_id = :hospital_id "
+        f"ORDER BY {SEARCH_TABLE}.rank LIMIT :limit"
+    )
+    found: Dict[int, Patient] = {}
+
+    async def collect(match: str) -> None:
+        rows = (await db.execute(
+            select(Patient).from_statement(
+                statement.bindparams(match=match, hospital_id=hospital_id, limit=CANDIDATE_LIMIT)
+            )
+        )).scalars()
+        for patient in rows:
+            found.setdefault(patient.id, patient)
+
+    substring, prefix, fuzzy = _fts_queries(terms)
+    # Best class first: each later pass only runs while fewer than `limit` of
+    # the better-scoring candidates have been found
+    for match in (prefix, substring, fuzzy):
+        if match and len(found) < limit:
+            await collect(match)
+    return list(found.values())
+
+
+async def _postgres_candidates(db: AsyncSession, hospital_id: str, terms: SearchTerms) -> List[Patient]:
+    name = literal_column(PG_SEARCH_NAME)
+    conditions = []
+    for token in terms.names:
+        if len(token) >= 3:
+            conditions.append(or_(name.like(f"%{token}%"), literal(token).op("<%")(name)))
+    if len(terms.digits) >= 3:
+        conditions.append(literal_column(PG_SEARCH_PHONE).like(f"%{terms.digits}%"))
+    rows = await db.execute(
+        select(Patient)
+        .where(Patient.hospital_id == hospital_id)
+        .where(and_(*conditions))
+        .order_by(func.word_similarity(" ".join(terms.names) or terms.digits, name).desc())
+        .limit(CANDIDATE_LIMIT)
+    )
+    return list(rows.scalars())
+
+
+async def _prefix_scan(db: AsyncSession, hospital_id: str, terms: SearchTerms) -> List[Patient]:
+    first, last = func.lower(Patient.first_name), func.lower(Patient.last_name)
+    conditions = [or_(first.like(f"{token}%"), last.like(f"{token}%")) for token in terms.names]
+    # Best candidates first, as `score` would rank them: most tokens matching a
+    # whole name, then the shortest names (the longest prefix matches)
+    exact = sum(case((or_(first == token, last == token), 1), else_=0) for token in terms.names)
+    rows = await db.execute(
+        select(Patient)
+        .where(Patient.hospital_id == hospital_id)
+        .where(and_(*conditions))
+        .order_by(exact.desc(), func.length(Patient.first_name) + func.length(Patient.last_name), Patient.id)
+        .limit(CANDIDATE_LIMIT)
+    )
+    return list(rows.scalars())
+
+
+async def search_patients(db: AsyncSession, hospital_id: str, q: str, limit: int) -> List[Patient]:
+    """The tenant's `limit` best matches for `q`, best first."""
+    terms = SearchTerms(q)
+    if not terms:
+        return []
+    if not terms.indexable:
+        candidates = await _prefix_scan(db, hospital_id, terms)
+    elif db.bind.dialect.name == "postgresql":
+        candidates = await _postgres_candidates(db, hospital_id, terms)
+    else:
+        candidates = await _sqlite_candidates(db, hospital_id, terms, limit)
+
+    ranked: List[Tuple[float, Patient]] = []
+    for patient in candidates:
+        value = score(terms, patient)
+        if value > 0:
+            ranked.append((value, patient))
+    ranked.sort(key=lambda item: (-item[0], item[1].last_name, item[1].first_name, item[1].id))
+    return [patient for _, patient in ranked[:limit]]
@@ -0,0 +1,284 @@
+"""
+Pharmacy stock alerts: low stock, batches about to expire, expired stock.
+
+Alerts live in the stock_alerts table, so GET /pharmacy/alerts is one page of a
+(hospital_id, id) index scan however large the inventory. The table is kept
+current by AlertSweeper, which runs inside the API process
+(PHARMACY_ALERT_SWEEP_INTERVAL > 0) or as a separate worker:
+
+    python -m app.pharmacy.alerts [--once]
+
+Each sweep re-evaluates only the products that may have changed state, found
+by range scans of indexes on medicines:
+
+- rows written since the previous sweep (updated_at, with a small overlap for
+  transactions that committed late);
+- batches that crossed an expiry boundary since the previous sweep's day:
+  expiry_date in [last day, today) became expired, and expiry_date in
+  (last day + window, today + window] entered the warning window.
+
+The first sweep after startup evaluates every product. A product's alerts are
+always rewritten as a whole from its batches (ix_medicines_hospital_id_name_expiry_date),
+keeping the original detected_at of alerts that are still active. On Postgres an
+advisory lock makes concurrent sweepers on other replicas skip their turn.
+"""
+import argparse
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, insert, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import register_collector, render_gauge
+from app.pharmacy.models import Medicine, StockAlert, StockAlertKind
+
+logger = logging.getLogger(__name__)
+
+# Rows whose transaction committed up to this long after it set updated_at are still picked up
+CHANGE_OVERLAP = timedelta(seconds=30)
+PRODUCTS_PER_TRANSACTION = 500
+SWEEP_LOCK_KEY = 7240513  # pg_try_advisory_xact_lock key shared by all sweepers
+
+Product = Tuple[str, str]  # (hospital_id, name)
+
+
+def product_alerts(batches: Iterable, today: date, low_stock_threshold: int, warning_days: int) -> List[Dict]:
+    """Alerts for one product from all of its batches (rows with id, batch_number, quantity, expiry_date)."""
+    horizon = today + timedelta(days=warning_days)
+    alerts = []
+    usable = 0
+    for batch in batches:
+        quantity = batch.quantity or 0
+        if batch.expiry_date < today:
+            if quantity > 0:
+                alerts.append({"kind": StockAlertKind.EXPIRED.value, "medicine_id": batch.id,
+                               "batch_number": batch.batch_number, "quantity": quantity,
+                               "expiry_date": batch.expiry_date})
+            continue
+        usable += quantity
+        if quantity > 0 and batch.expiry_date <= horizon:
+            alerts.append({"kind": StockAlertKind.EXPIRING.value, "medicine_id": batch.id,
+                           "batch_number": batch.batch_number, "quantity": quantity,
+                           "expiry_date": batch.expiry_date})
+    if usable <= low_stock_threshold:
+        alerts.append({"kind": StockAlertKind.LOW_STOCK.value, "medicine_id": None,
+                       "batch_number": None, "quantity": usable, "expiry_date": None})
+    return alerts
+
+
+async def refresh_products(
+    db: AsyncSession,
+    hospital_id: str,
+    names: List[str],
+    today: date,
+    low_stock_threshold: int,
+    warning_days: int,
+) -> int:
+    """Rewrite the alerts of some products of one hospital, without committing. Returns the alert count."""
+    batches = (await db.execute(
+        select(Medicine.id, Medicine.name, Medicine.batch_number, Medicine.quantity, Medicine.expiry_date)
+        .where(Medicine.hospital_id == hospital_id)
+        .where(Medicine.name.in_(names))
+        .order_by(Medicine.name, Medicine.expiry_date, Medicine.id)
+    )).all()
+    previous = (await db.execute(
+        select(StockAlert.name, StockAlert.kind, StockAlert.medicine_id, StockAlert.detected_at)
+        .where(StockAlert.hospital_id == hospital_id)
+        .where(StockAlert.name.in_(names))
+    )).all()
+    detected = {(row.name, row.kind, row.medicine_id): row.detected_at for row in previous}
+
+    by_name = defaultdict(list)
+    for batch in batches:
+        by_name[batch.name].append(batch)
+    now = datetime.now(timezone.utc)
+    rows = [
+        {**alert, "hospital_id": hospital_id, "name": name,
+         "detected_at": detected.get((name, alert["kind"], alert["medicine_id"]), now)}
+        for name, product in by_name.items()
+        for alert in product_alerts(product, today, low_stock_threshold, warning_days)
+    ]
+
+    if previous:
+        await db.execute(
+            delete(StockAlert).where(StockAlert.hospital_id == hospital_id).where(StockAlert.name.in_(names))
+        )
+    if rows:
+        await db.execute(insert(StockAlert.__table__), rows)
+    return len(rows)
+
+
+async def changed_products(
+    db: AsyncSession,
+    today: date,
+    last_day: Optional[date],
+    changed_since: Optional[datetime],
+    warning_days: int,
+) -> Set[Product]:
+    """Products whose alerts may differ from the last sweep; every product when there was none."""
+    if last_day is None or changed_since is None:
+        return set((await db.execute(select(Medicine.hospital_id, Medicine.name).distinct())).all())
+
+    products: Set[Product] = set()
+    changed = (await db.execute(
+        select(Medicine.id, Medicine.hospital_id, Medicine.name).where(Medicine.updated_at >= changed_since)
+    )).all()
+    products.update((row.hospital_id, row.name) for row in changed)
+    # A renamed batch leaves its alerts under the old product name
+    ids = [row.id for row in changed]
+    for offset in range(0, len(ids), PRODUCTS_PER_TRANSACTION):
+        products.update((await db.execute(
+            select(StockAlert.hospital_id, StockAlert.name)
+            .where(StockAlert.medicine_id.in_(ids[offset:offset + PRODUCTS_PER_TRANSACTION]))
+        )).all())
+
+    if today > last_day:
+        window = timedelta(days=warning_days)
+        products.update((await db.execute(
+            select(Medicine.hospital_id, Medicine.name)
+            .where(or_(
+                (Medicine.expiry_date >= last_day) & (Medicine.expiry_date < today),
+                (Medicine.expiry_date > last_day + window) & (Medicine.expiry_date <= today + window),
+            ))
+            .where(Medicine.quantity > 0)
+            .distinct()
+        )).all())
+    return products
+
+
+class AlertSweeper:
+    """Periodically brings stock_alerts up to date; see the module docstring."""
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        interval: float = 60.0,
+        low_stock_threshold: int = 10,
+        warning_days: int = 90,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.low_stock_threshold = low_stock_threshold
+        self.warning_days = warning_days
+        self.last_day: Optional[date] = None
+        self.changed_since: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self.sweeps = 0
+        self.products_refreshed = 0
+        self.last_duration = 0.0
+
+    def reset(self) -> None:
+        """Make the next sweep evaluate every product, e.g. after changing the thresholds."""
+        self.last_day = None
+        self.changed_since = None
+
+    async def sweep(self, today: Optional[date] = None) -> Optional[int]:
+        """Run one sweep; returns the number of products re-evaluated, or None if another sweeper holds the lock."""
+        async with self.session_factory() as guard:
+            # Transaction-scoped, so the lock goes when `guard` rolls back on exit
+            if guard.bind.dialect.name == "postgresql" and not await guard.scalar(
+                text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": SWEEP_LOCK_KEY}
+            ):
+                return None
+            return await self._sweep(today or date.today())
+
+    async def _sweep(self, today: date) -> int:
+        started = datetime.now(timezone.utc)
+        async with self.session_factory() as db:
+            products = await changed_products(db, today, self.last_day, self.changed_since, self.warning_days)
+
+        by_hospital: Dict[str, List[str]] = defaultdict(list)
+        for hospital_id, name in products:
+            by_hospital[hospital_id].append(name)
+        for hospital_id, names in by_hospital.items():
+            names.sort()
+            for offset in range(0, len(names), PRODUCTS_PER_TRANSACTION):
+                async with self.session_factory() as db:
+                    await refresh_products(
+                        db, hospital_id, names[offset:offset + PRODUCTS_PER_TRANSACTION], today,
+                        self.low_stock_threshold, self.warning_days,
+                    )
+                    await db.commit()
+
+        self.last_day = today
+        self.changed_since = started - CHANGE_OVERLAP
+        self.sweeps += 1
+        self.products_refreshed += len(products)
+        self.last_duration = (datetime.now(timezone.utc) - started).total_seconds()
+        return len(products)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # The cursors only advance on success, so the next sweep covers this one's changes
+                logger.exception("Pharmacy alert sweep failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_sweeper: Optional[AlertSweeper] = None
+
+
+def get_alert_sweeper() -> AlertSweeper:
+    global _sweeper
+    if _sweeper is None:
+        from app.core.database import AsyncSessionLocal
+
+        _sweeper = AlertSweeper(
+            session_factory=AsyncSessionLocal,
+            interval=settings.PHARMACY_ALERT_SWEEP_INTERVAL,
+            low_stock_threshold=settings.PHARMACY_LOW_STOCK_THRESHOLD,
+            warning_days=settings.PHARMACY_EXPIRY_WARNING_DAYS,
+        )
+    return _sweeper
+
+
+def _collect_alert_metrics():
+    sweeper = _sweeper
+    if sweeper is None:
+        return
+    yield from render_gauge("hmtp_pharmacy_alert_sweeps_total", "Completed pharmacy alert sweeps", sweeper.sweeps, kind="counter")
+    yield from render_gauge("hmtp_pharmacy_alert_products_refreshed_total", "Products re-evaluated by alert sweeps", sweeper.products_refreshed, kind="counter")
+    yield from render_gauge("hmtp_pharmacy_alert_sweep_seconds", "Duration of the last pharmacy alert sweep", sweeper.last_duration)
+
+
+register_collector(_collect_alert_metrics)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="Run a single full sweep and exit")
+    parser.add_argument("--interval", type=float, default=settings.PHARMACY_ALERT_SWEEP_INTERVAL or 60.0,
+                        help="Seconds between sweeps")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    sweeper = get_alert_sweeper()
+    if args.once:
+        logger.info("Re-evaluated %s products", asyncio.run(sweeper.sweep()))
+        return
+    sweeper.interval = args.interval
+    asyncio.run(sweeper._run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,22 @@
-from sqlalchemy import Column, String, Integer, DateTime, Float, ForeignKey, Text, Date
+from sqlalchemy import Column, String, Integer, DateTime, Float, ForeignKey, Text, Date, Index
+from sqlalchemy.orm import relationship
 from app.core.base import Base, HospitalIdMixin
 from datetime import datetime, timezone
+import enum
 
 class Medicine(Base, HospitalIdMixin):
     __tablename__ = "medicines"
+    __table_args__ = (
+        # Backs keyset pagination: WHERE hospital_id = ? AND id > ? ORDER BY id
+        Index("ix_medicines_hospital_id_id", "hospital_id", "id"),
+        # Each row is one batch of the product `name`; backs the FEFO allocator's
+        # WHERE hospital_id = ? AND name = ? AND expiry_date >= ? ORDER BY expiry_date
+        Index("ix_medicines_hospital_id_name_expiry_date", "hospital_id", "name", "expiry_date"),
+        # Range scans of the alert sweep (app.pharmacy.alerts): batches crossing an
+        # expiry boundary, and rows changed since the previous sweep
+        Index("ix_medicines_expiry_date", "expiry_date"),
+        Index("ix_medicines_updated_at", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
@@ -13,6 +26,10 @@ class Medicine(Base, HospitalIdMixin):
     quantity = Column(Integer, default=0)
     unit_price = Column(Float, nullable=False)
     description = Column(Text)
+    # Also bumped by Core UPDATEs (dispensing), so the alert sweep sees every change
+    updated_at = Column(
+        DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc)
+    )
 
 class Prescription(Base, HospitalIdMixin):
     __tablename__ = "prescriptions"
@@ -27,3 +44,59 @@ class Prescription(Base, HospitalIdMixin):
     instructions = Column(Text)
     prescribed_date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     status = Column(String, default="active") # active, completed, cancelled
+
+class StockMovementReason(str, enum.Enum):
+    RECEIVED = "received"
+    DISPENSED = "dispensed"
+    ADJUSTED = "adjusted"
+
+class StockMovement(Base, HospitalIdMixin):
+    """
+    Append-only ledger of every change to Medicine.quantity. Rows are only ever
+    inserted, in the same transaction as the change they record, so the ledger
+    of a medicine sums to its current quantity.
+    """
+    __tablename__ = "stock_movements"
+    __table_args__ = (
+        # Ledger of one medicine, oldest first: WHERE hospital_id = ? AND medicine_id = ? ORDER BY id
+        Index("ix_stock_movements_hospital_id_medicine_id_id", "hospital_id", "medicine_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    medicine_id = Column(Integer, ForeignKey("medicines.id"), nullable=False)
+    change = Column(Integer, nullable=False)  # negative when stock leaves
+    quantity_after = Column(Integer, nullable=False)
+    reason = Column(String, nullable=False)
+    prescription_id = Column(Integer, ForeignKey("prescriptions.id"), nullable=True)
+    user_id = Column(String)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    medicine = relationship("Medicine")
+
+class StockAlertKind(str, enum.Enum):
+    LOW_STOCK = "low_stock"  # unexpired units of the product at or below the threshold
+    EXPIRING = "expiring"  # batch with stock left that expires within the warning window
+    EXPIRED = "expired"  # batch past its expiry date that still holds stock
+
+class StockAlert(Base, HospitalIdMixin):
+    """
+    Precomputed pharmacy alerts, maintained by the sweep in app.pharmacy.alerts.
+    A product's alerts are always rewritten together, so the table never mixes
+    two states of one product. Low-stock alerts are per product (medicine_id is
+    NULL); expiry alerts are per batch.
+    """
+    __tablename__ = "stock_alerts"
+    __table_args__ = (
+        Index("ix_stock_alerts_hospital_id_id", "hospital_id", "id"),
+        # The sweep replaces all alerts of a product: WHERE hospital_id = ? AND name IN (...)
+        Index("ix_stock_alerts_hospital_id_name", "hospital_id", "name"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+    medicine_id = Column(Integer, ForeignKey("medicines.id"), nullable=True)
+    batch_number = Column(String)
+    quantity = Column(Integer, nullable=False)
+    expiry_date = Column(Date)
+    detected_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
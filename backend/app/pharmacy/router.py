@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import List, Optional
 from app.core.database import get_db
-from app.pharmacy import models, schemas
+from app.core.pagination import PageParams, apply_filters, paginate
+from app.pharmacy import models, schemas, stock
 from app.auth.deps import get_current_user
 from app.auth.models import User
 from app.core.audit import log_audit_event
+from app.core.crud import update_returning
 
 router = APIRouter()
 
@@ -22,6 +24,11 @@ async def create_medicine(
         hospital_id=current_user.hospital_id
     )
     db.add(db_medicine)
+    if medicine.quantity:
+        stock.record_movement(
+            db, current_user.hospital_id, db_medicine, medicine.quantity, medicine.quantity,
+            models.StockMovementReason.RECEIVED, user_id=str(current_user.id),
+        )
     
     await log_audit_event(
         db=db,
@@ -33,18 +40,26 @@ async def create_medicine(
     )
     
     await db.commit()
-    await db.refresh(db_medicine)
     return db_medicine
 
 @router.get("/medicines/", response_model=List[schemas.MedicineResponse])
 async def list_medicines(
+    response: Response,
+    page: PageParams = Depends(),
+    name: Optional[str] = None,
+    manufacturer: Optional[str] = None,
+    batch_number: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(models.Medicine).where(models.Medicine.hospital_id == current_user.hospital_id)
-    )
-    return result.scalars().all()
+    query = select(models.Medicine).where(models.Medicine.hospital_id == current_user.hospital_id)
+    query = apply_filters(query, models.Medicine, {
+        "name": name,
+        "manufacturer": manufacturer,
+        "batch_number": batch_number,
+    })
+    items, _ = await paginate(db, query, models.Medicine, page, response)
+    return items
 
 @router.put("/medicines/{medicine_id}", response_model=schemas.MedicineResponse)
 async def update_medicine(
@@ -53,24 +68,57 @@ async def update_medicine(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(models.Medicine)
-        .where(models.Medicine.id == medicine_id)
-        .where(models.Medicine.hospital_id == current_user.hospital_id)
-    )
-    db_medicine = result.scalars().first()
+    update_data = medicine_in.model_dump(exclude_unset=True)
+    previous_quantity = None
+    if update_data.get("quantity") is not None:
+        # Locked so the ledger records the change against the quantity it replaced
+        previous_quantity = await stock.lock_quantity(db, current_user.hospital_id, medicine_id)
+    db_medicine = await update_returning(db, models.Medicine, medicine_id, current_user.hospital_id, update_data)
     if not db_medicine:
         raise HTTPException(status_code=404, detail="Medicine not found")
-    
-    update_data = medicine_in.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_medicine, field, value)
-    
-    db.add(db_medicine)
+    if previous_quantity is not None and db_medicine.quantity != previous_quantity:
+        stock.record_movement(
+            db, current_user.hospital_id, None, db_medicine.quantity - previous_quantity, db_medicine.quantity,
+            models.StockMovementReason.ADJUSTED, user_id=str(current_user.id), medicine_id=medicine_id,
+        )
     await db.commit()
-    await db.refresh(db_medicine)
     return db_medicine
 
+@router.get("/medicines/{medicine_id}/movements", response_model=List[schemas.StockMovementResponse])
+async def list_stock_movements(
+    medicine_id: int,
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """The medicine's stock ledger, oldest first."""
+    query = (
+        select(models.StockMovement)
+        .where(models.StockMovement.hospital_id == current_user.hospital_id)
+        .where(models.StockMovement.medicine_id == medicine_id)
+    )
+    items, _ = await paginate(db, query, models.StockMovement, page, response)
+    return items
+
+@router.get("/alerts", response_model=List[schemas.StockAlertResponse])
+async def list_stock_alerts(
+    response: Response,
+    page: PageParams = Depends(),
+    kind: Optional[models.StockAlertKind] = None,
+    name: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Low-stock, expiring and expired alerts, as of the last sweep (see app.pharmacy.alerts)."""
+    query = select(models.StockAlert).where(models.StockAlert.hospital_id == current_user.hospital_id)
+    query = apply_filters(query, models.StockAlert, {
+        "kind": kind.value if kind else None,
+        "name": name,
+    })
+    items, _ = await paginate(db, query, models.StockAlert, page, response)
+    return items
+
 # Prescription Endpoints
 @router.post("/prescriptions/", response_model=schemas.PrescriptionResponse)
 async def create_prescription(
@@ -103,7 +151,6 @@ async def create_prescription(
     )
     
     await db.commit()
-    await db.refresh(db_prescription)
     return db_prescription
 
 @router.get("/prescriptions/patient/{patient_id}", response_model=List[schemas.PrescriptionResponse])
@@ -126,50 +173,73 @@ async def dispense_medicine(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # 1. Fetch prescription
-    prescription_result = await db.execute(
-        select(models.Prescription)
-        .where(models.Prescription.id == request.prescription_id)
-        .where(models.Prescription.hospital_id == current_user.hospital_id)
-    )
-    db_prescription = prescription_result.scalars().first()
-    if not db_prescription:
-        raise HTTPException(status_code=404, detail="Prescription not found")
-    
-    if db_prescription.status != "active":
-        raise HTTPException(status_code=400, detail="Prescription is not active")
-
-    # 2. Fetch medicine
-    medicine_result = await db.execute(
-        select(models.Medicine)
-        .where(models.Medicine.id == db_prescription.medicine_id)
-        .where(models.Medicine.hospital_id == current_user.hospital_id)
-    )
-    db_medicine = medicine_result.scalars().first()
-    if not db_medicine:
-        # Should not happen if data integrity is maintained
-        raise HTTPException(status_code=404, detail="Medicine not found")
-
-    # 3. Check inventory
-    if db_medicine.quantity < request.quantity:
-        raise HTTPException(status_code=400, detail="Insufficient stock")
+    try:
+        allocations, remaining = await stock.dispense(
+            db, current_user.hospital_id, str(current_user.id), request.prescription_id, request.quantity
+        )
+    except stock.StockError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.detail)
 
-    # 4. Update inventory
-    db_medicine.quantity -= request.quantity
-    db.add(db_medicine)
-
-    # 5. Log audit
     await log_audit_event(
         db=db,
         user_id=str(current_user.id),
         action="DISPENSE_MEDICINE",
         resource_type="Prescription",
         resource_id=str(request.prescription_id),
-        details={"quantity": request.quantity, "medicine_id": db_medicine.id},
+        details={"quantity": request.quantity, "batches": [a.as_dict() for a in allocations]},
         hospital_id=current_user.hospital_id
     )
 
     # Note: In a real system, we might mark prescription as partially or fully dispensed
     
     await db.commit()
-    return {"message": "Medicine dispensed successfully", "remaining_stock": db_medicine.quantity}
+    return {
+        "message": "Medicine dispensed successfully",
+        "remaining_stock": remaining,
+        "batches": [allocation.as_dict() for allocation in allocations],
+    }
+
+@router.post("/dispense/batch", status_code=status.HTTP_200_OK)
+async def dispense_batch(
+    request: schemas.BatchDispenseRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Dispense many prescriptions in one transaction, e.g. for a ward round. Lines
+    are served in order; one that cannot be dispensed is reported and skipped,
+    unless `strict` is set, in which case nothing is dispensed and the response is 400.
+    """
+    try:
+        results = await stock.dispense_many(
+            db, current_user.hospital_id, str(current_user.id),
+            [(item.prescription_id, item.quantity) for item in request.items], strict=request.strict,
+        )
+    except stock.StockError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.detail)
+
+    failed = sum(result.error is not None for result in results)
+    if request.strict and failed:
+        raise HTTPException(status_code=400, detail={
+            "message": f"Batch not dispensed: {failed} line(s) failed",
+            "results": [result.as_dict() for result in results],
+        })
+
+    for result in results:
+        if result.dispensed:
+            await log_audit_event(
+                db=db,
+                user_id=str(current_user.id),
+                action="DISPENSE_MEDICINE",
+                resource_type="Prescription",
+                resource_id=str(result.prescription_id),
+                details={"quantity": result.quantity, "batches": [a.as_dict() for a in result.allocations]},
+                hospital_id=current_user.hospital_id
+            )
+
+    await db.commit()
+    return {
+        "dispensed": len(results) - failed,
+        "failed": failed,
+        "results": [result.as_dict() for result in results],
+    }
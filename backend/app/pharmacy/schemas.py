@@ -1,13 +1,13 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime, date
-from typing import Optional
+from typing import List, Optional
 
 class MedicineBase(BaseModel):
     name: str
     manufacturer: Optional[str] = None
     batch_number: Optional[str] = None
     expiry_date: date
-    quantity: int = 0
+    quantity: int = Field(0, ge=0)
     unit_price: float
     description: Optional[str] = None
 
@@ -19,7 +19,7 @@ class MedicineUpdate(BaseModel):
     manufacturer: Optional[str] = None
     batch_number: Optional[str] = None
     expiry_date: Optional[date] = None
-    quantity: Optional[int] = None
+    quantity: Optional[int] = Field(None, ge=0)
     unit_price: Optional[float] = None
     description: Optional[str] = None
 
@@ -49,4 +49,30 @@ class PrescriptionResponse(PrescriptionBase):
 
 class DispenseRequest(BaseModel):
     prescription_id: int
+    quantity: int = Field(..., gt=0)
+
+class BatchDispenseRequest(BaseModel):
+    items: List[DispenseRequest] = Field(..., min_length=1, max_length=500)
+    strict: bool = False  # refuse the whole batch when any line cannot be dispensed
+
+class StockMovementResponse(BaseModel):
+    id: int
+    medicine_id: int
+    change: int
+    quantity_after: int
+    reason: str
+    prescription_id: Optional[int] = None
+    user_id: Optional[str] = None
+    created_at: datetime
+    model_config = ConfigDict(from_attributes=True)
+
+class StockAlertResponse(BaseModel):
+    id: int
+    kind: str
+    name: str
+    medicine_id: Optional[int] = None
+    batch_number: Optional[str] = None
     quantity: int
+    expiry_date: Optional[date] = None
+    detected_at: datetime
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,428 @@
+"""
+Stock changes for the pharmacy, each paired with its StockMovement ledger row.
+
+Every Medicine row is one batch (batch_number, expiry_date, quantity) of the
+product `name`. Dispensing allocates first-expiry-first-out across all
+unexpired batches of the prescribed product, not just the batch the
+prescription names:
+
+1. One SELECT lists the product's batches in FEFO order. It is a range scan of
+   ix_medicines_hospital_id_name_expiry_date, so its cost depends only on the
+   product's batch count and not on how many SKUs the hospital stocks. On
+   Postgres it also locks those rows (FOR UPDATE), in index order, so
+   concurrent allocations queue instead of deadlocking.
+2. Each batch is taken with a conditional decrement:
+
+       UPDATE medicines SET quantity = quantity - :n WHERE id = :batch AND quantity >= :n
+
+   Stock can never go below zero, even where the rows are not locked (SQLite
+   reads outside the write lock). If a competing dispense got there first,
+   the batch is re-read and the allocation continues with what is left. If
+   the product runs out part way, the units already taken are put back and
+   the dispense fails as a whole.
+3. One ledger row per batch touched, inserted in a single executemany.
+
+All statements are prebuilt Core statements, since dispensing is hot. The
+ORM bulk-update path costs more than the round trip itself.
+
+dispense_many does the same for a whole ward round in a fixed number of
+statements: one IN query each for the prescriptions, the prescribed products
+and their batches, then an in-memory FEFO plan across all lines, one UPDATE
+for every batch touched and one ledger insert.
+"""
+from datetime import date, datetime, timezone
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, case, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.pharmacy.models import Medicine, Prescription, StockMovement, StockMovementReason
+
+PRESCRIPTION_NOT_FOUND = "Prescription not found"
+PRESCRIPTION_NOT_ACTIVE = "Prescription is not active"
+MEDICINE_NOT_FOUND = "Medicine not found"
+INSUFFICIENT_STOCK = "Insufficient stock"
+
+
+class StockError(Exception):
+    """A stock change that cannot be applied; carries the HTTP status to report."""
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def record_movement(
+    db: AsyncSession,
+    hospital_id: str,
+    medicine: Optional[Medicine],
+    change: int,
+    quantity_after: int,
+    reason: StockMovementReason,
+    user_id: Optional[str] = None,
+    prescription_id: Optional[int] = None,
+    medicine_id: Optional[int] = None,
+) -> StockMovement:
+    """Add a ledger row to the session; pass `medicine` when its id is not assigned yet."""
+    movement = StockMovement(
+        hospital_id=hospital_id,
+        change=change,
+        quantity_after=quantity_after,
+        reason=reason.value,
+        user_id=user_id,
+        prescription_id=prescription_id,
+    )
+    if medicine is not None:
+        movement.medicine = medicine
+    else:
+        movement.medicine_id = medicine_id
+    db.add(movement)
+    return movement
+
+
+async def _dispense_failure(db: AsyncSession, hospital_id: str, prescription_id: int) -> StockError:
+    row = (await db.execute(
+        select(Prescription.status, Medicine.id)
+        .outerjoin(Medicine, (Medicine.id == Prescription.medicine_id) & (Medicine.hospital_id == hospital_id))
+        .where(Prescription.id == prescription_id)
+        .where(Prescription.hospital_id == hospital_id)
+    )).first()
+    if row is None:
+        return StockError(404, PRESCRIPTION_NOT_FOUND)
+    if row.status != "active":
+        return StockError(400, PRESCRIPTION_NOT_ACTIVE)
+    if row.id is None:
+        return StockError(404, MEDICINE_NOT_FOUND)
+    return StockError(400, INSUFFICIENT_STOCK)
+
+
+_medicines = Medicine.__table__
+_prescribed_product = (
+    select(Medicine.name)
+    .where(Medicine.hospital_id == bindparam("tenant"))
+    .where(Medicine.id == (
+        select(Prescription.medicine_id)
+        .where(Prescription.id == bindparam("prescription_id"))
+        .where(Prescription.hospital_id == bindparam("tenant"))
+        .where(Prescription.status == "active")
+        .scalar_subquery()
+    ))
+    .scalar_subquery()
+)
+_FEFO_BATCHES = (
+    select(_medicines.c.id, _medicines.c.batch_number, _medicines.c.quantity)
+    .where(_medicines.c.hospital_id == bindparam("tenant"))
+    .where(_medicines.c.name == _prescribed_product)
+    .where(_medicines.c.expiry_date >= bindparam("today"))
+    .where(_medicines.c.quantity > 0)
+    .order_by(_medicines.c.expiry_date, _medicines.c.id)
+    .with_for_update()
+)
+_TAKE = (
+    update(_medicines)
+    .where(_medicines.c.id == bindparam("batch"))
+    .where(_medicines.c.quantity >= bindparam("units"))
+    .values(quantity=_medicines.c.quantity - bindparam("units"))
+    .returning(_medicines.c.quantity)
+)
+_PUT_BACK = (
+    update(_medicines)
+    .where(_medicines.c.id == bindparam("batch"))
+    .values(quantity=_medicines.c.quantity + bindparam("units"))
+)
+_BATCH_QUANTITY = select(_medicines.c.quantity).where(_medicines.c.id == bindparam("batch"))
+_RECORD = insert(StockMovement.__table__)
+# A write that changes nothing, so it takes the same lock as a dispense
+_LOCK_QUANTITY = (
+    update(_medicines)
+    .where(_medicines.c.id == bindparam("medicine_id"))
+    .where(_medicines.c.hospital_id == bindparam("tenant"))
+    .values(quantity=_medicines.c.quantity)
+    .returning(_medicines.c.quantity)
+)
+
+
+async def lock_quantity(db: AsyncSession, hospital_id: str, medicine_id: int) -> Optional[int]:
+    """
+    The batch's current quantity, held until the transaction ends (None when it
+    does not exist). A plain SELECT ... FOR UPDATE takes no lock on SQLite, so a
+    dispense could commit between reading the quantity and overwriting it.
+    """
+    return await db.scalar(_LOCK_QUANTITY, {"medicine_id": medicine_id, "tenant": hospital_id})
+
+
+class Allocation:
+    """Units taken from one batch by a dispense."""
+    __slots__ = ("medicine_id", "batch_number", "quantity", "quantity_after")
+
+    def __init__(self, medicine_id: int, batch_number: Optional[str], quantity: int, quantity_after: int):
+        self.medicine_id = medicine_id
+        self.batch_number = batch_number
+        self.quantity = quantity
+        self.quantity_after = quantity_after
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "medicine_id": self.medicine_id,
+            "batch_number": self.batch_number,
+            "quantity": self.quantity,
+            "remaining": self.quantity_after,
+        }
+
+
+async def _take(db: AsyncSession, batch: int, units: int) -> Tuple[int, int]:
+    """Take up to `units` from one batch: (units taken, quantity left)."""
+    while units > 0:
+        row = (await db.execute(_TAKE, {"batch": batch, "units": units})).first()
+        if row is not None:
+            return units, row.quantity
+        # A concurrent dispense drew on this batch since it was read
+        current = await db.scalar(_BATCH_QUANTITY, {"batch": batch})
+        units = min(units, current or 0)
+    return 0, 0
+
+
+async def dispense(
+    db: AsyncSession,
+    hospital_id: str,
+    user_id: str,
+    prescription_id: int,
+    quantity: int,
+    today: Optional[date] = None,
+) -> Tuple[List[Allocation], int]:
+    """
+    Take `quantity` units of the prescribed product, earliest expiry first, and
+    record the movements, without committing. Returns the allocations and the
+    unexpired stock of the product left afterwards; raises StockError when the
+    whole quantity cannot be dispensed, leaving stock untouched.
+    """
+    params = {"tenant": hospital_id, "prescription_id": prescription_id, "today": today or date.today()}
+    batches = (await db.execute(_FEFO_BATCHES, params)).all()
+    if not batches:
+        raise await _dispense_failure(db, hospital_id, prescription_id)
+    if sum(batch.quantity for batch in batches) < quantity:
+        raise StockError(400, INSUFFICIENT_STOCK)
+
+    allocations: List[Allocation] = []
+    wanted = quantity
+    stock_left = 0
+    for batch in batches:
+        left = batch.quantity
+        if wanted:
+            taken, left = await _take(db, batch.id, min(wanted, batch.quantity))
+            if taken:
+                allocations.append(Allocation(batch.id, batch.batch_number, taken, left))
+                wanted -= taken
+        stock_left += left
+    if wanted:
+        for allocation in allocations:
+            await db.execute(_PUT_BACK, {"batch": allocation.medicine_id, "units": allocation.quantity})
+        raise StockError(400, INSUFFICIENT_STOCK)
+
+    now = datetime.now(timezone.utc)
+    await db.execute(_RECORD, [
+        {
+            "hospital_id": hospital_id,
+            "medicine_id": allocation.medicine_id,
+            "change": -allocation.quantity,
+            "quantity_after": allocation.quantity_after,
+            "reason": StockMovementReason.DISPENSED.value,
+            "prescription_id": prescription_id,
+            "user_id": user_id,
+            "created_at": now,
+        }
+        for allocation in allocations
+    ])
+    return allocations, stock_left
+
+
+_PRESCRIPTIONS = (
+    select(Prescription.id, Prescription.status, Prescription.medicine_id)
+    .where(Prescription.hospital_id == bindparam("tenant"))
+    .where(Prescription.id.in_(bindparam("ids", expanding=True)))
+)
+_PRODUCTS = (
+    select(Medicine.id, Medicine.name)
+    .where(Medicine.hospital_id == bindparam("tenant"))
+    .where(Medicine.id.in_(bindparam("ids", expanding=True)))
+)
+_FEFO_BATCHES_OF = (
+    select(_medicines.c.id, _medicines.c.name, _medicines.c.batch_number, _medicines.c.quantity)
+    .where(_medicines.c.hospital_id == bindparam("tenant"))
+    .where(_medicines.c.name.in_(bindparam("names", expanding=True)))
+    .where(_medicines.c.expiry_date >= bindparam("today"))
+    .where(_medicines.c.quantity > 0)
+    .order_by(_medicines.c.name, _medicines.c.expiry_date, _medicines.c.id)
+    .with_for_update()
+)
+# A ward round may retry its plan this often when concurrent dispenses keep changing its batches
+PLAN_ATTEMPTS = 3
+
+
+class LineResult:
+    """
+    Outcome of one line of a batch dispense: `error` says why the line failed,
+    `dispensed` whether its stock was taken (a strict batch that is refused
+    takes nothing, not even for the lines that would have fitted).
+    """
+    __slots__ = ("prescription_id", "quantity", "allocations", "remaining", "error", "dispensed")
+
+    def __init__(self, prescription_id: int, quantity: int):
+        self.prescription_id = prescription_id
+        self.quantity = quantity
+        self.allocations: List[Allocation] = []
+        self.remaining: Optional[int] = None
+        self.error: Optional[StockError] = None
+        self.dispensed = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        if self.error is not None:
+            return {
+                "prescription_id": self.prescription_id,
+                "quantity": self.quantity,
+                "status": "failed",
+                "status_code": self.error.status_code,
+                "detail": self.error.detail,
+            }
+        if not self.dispensed:
+            return {"prescription_id": self.prescription_id, "quantity": self.quantity, "status": "not_dispensed"}
+        return {
+            "prescription_id": self.prescription_id,
+            "quantity": self.quantity,
+            "status": "dispensed",
+            "remaining_stock": self.remaining,
+            "batches": [allocation.as_dict() for allocation in self.allocations],
+        }
+
+
+def _plan(results: List[LineResult], products: Dict[int, str], batches: Sequence) -> None:
+    """Allocate every line in order against the stock as read, FEFO within each product."""
+    by_product: Dict[str, List[Any]] = defaultdict(list)
+    left: Dict[int, int] = {}
+    for batch in batches:
+        by_product[batch.name].append(batch)
+        left[batch.id] = batch.quantity
+    for result in results:
+        if result.error is not None:
+            continue
+        product = by_product[products[result.prescription_id]]
+        result.allocations = []
+        if sum(left[batch.id] for batch in product) < result.quantity:
+            result.error = StockError(400, INSUFFICIENT_STOCK)
+            continue
+        wanted = result.quantity
+        for batch in product:
+            taken = min(wanted, left[batch.id])
+            if taken:
+                left[batch.id] -= taken
+                result.allocations.append(Allocation(batch.id, batch.batch_number, taken, left[batch.id]))
+                wanted -= taken
+            if not wanted:
+                break
+        result.remaining = sum(left[batch.id] for batch in product)
+
+
+def _take_all(taken: Dict[int, int]):
+    """One UPDATE taking a different amount from each batch, only where enough is left."""
+    amount = case(taken, value=_medicines.c.id)
+    return (
+        update(_medicines)
+        .where(_medicines.c.id.in_(list(taken)))
+        .where(_medicines.c.quantity >= amount)
+        .values(quantity=_medicines.c.quantity - amount)
+        .returning(_medicines.c.id, _medicines.c.quantity)
+    )
+
+
+def _put_back_all(taken: Dict[int, int]):
+    amount = case(taken, value=_medicines.c.id)
+    return update(_medicines).where(_medicines.c.id.in_(list(taken))).values(quantity=_medicines.c.quantity + amount)
+
+
+async def dispense_many(
+    db: AsyncSession,
+    hospital_id: str,
+    user_id: str,
+    lines: Sequence[Tuple[int, int]],
+    today: Optional[date] = None,
+    strict: bool = False,
+) -> List[LineResult]:
+    """
+    Dispense (prescription_id, quantity) lines in order, without committing.
+    Each line is allocated FEFO like `dispense`, against the stock left by the
+    lines before it; a line that cannot be served in full fails on its own and
+    takes nothing. With `strict`, one failed line leaves all stock untouched
+    and no line is dispensed.
+    """
+    results = [LineResult(prescription_id, quantity) for prescription_id, quantity in lines]
+    ids = sorted({result.prescription_id for result in results})
+    prescriptions = {row.id: row for row in (await db.execute(_PRESCRIPTIONS, {"tenant": hospital_id, "ids": ids}))}
+    medicine_ids = sorted({row.medicine_id for row in prescriptions.values() if row.status == "active"})
+    names = {row.id: row.name for row in (await db.execute(_PRODUCTS, {"tenant": hospital_id, "ids": medicine_ids}))} \
+        if medicine_ids else {}
+
+    products: Dict[int, str] = {}
+    for result in results:
+        prescription = prescriptions.get(result.prescription_id)
+        if prescription is None:
+            result.error = StockError(404, PRESCRIPTION_NOT_FOUND)
+        elif prescription.status != "active":
+            result.error = StockError(400, PRESCRIPTION_NOT_ACTIVE)
+        elif prescription.medicine_id not in names:
+            result.error = StockError(404, MEDICINE_NOT_FOUND)
+        else:
+            products[result.prescription_id] = names[prescription.medicine_id]
+    if not products:
+        return results
+
+    params = {"tenant": hospital_id, "names": sorted(set(products.values())), "today": today or date.today()}
+    for attempt in range(PLAN_ATTEMPTS):
+        for result in results:
+            if result.error is not None and result.error.detail == INSUFFICIENT_STOCK:
+                result.error = None
+        _plan(results, products, (await db.execute(_FEFO_BATCHES_OF, params)).all())
+        if strict and any(result.error is not None for result in results):
+            return results
+        taken: Dict[int, int] = defaultdict(int)
+        for result in results:
+            for allocation in result.allocations:
+                taken[allocation.medicine_id] += allocation.quantity
+        if not taken:
+            return results
+        applied = {row.id: row.quantity for row in await db.execute(_take_all(taken))}
+        if len(applied) == len(taken):
+            break
+        # A concurrent dispense drew on some batch since it was read (only possible where
+        # rows are not locked): undo what was taken and plan again from fresh quantities
+        if applied:
+            await db.execute(_put_back_all({batch: taken[batch] for batch in applied}))
+    else:
+        raise StockError(409, "Stock changed during the batch dispense; try again")
+
+    # Unlocked batches may have been restocked since they were read; the ledger follows the UPDATE
+    planned = {}
+    for result in results:
+        for allocation in result.allocations:
+            planned[allocation.medicine_id] = allocation.quantity_after
+    for result in results:
+        for allocation in result.allocations:
+            allocation.quantity_after += applied[allocation.medicine_id] - planned[allocation.medicine_id]
+        result.dispensed = result.error is None
+
+    now = datetime.now(timezone.utc)
+    await db.execute(_RECORD, [
+        {
+            "hospital_id": hospital_id,
+            "medicine_id": allocation.medicine_id,
+            "change": -allocation.quantity,
+            "quantity_after": allocation.quantity_after,
+            "reason": StockMovementReason.DISPENSED.value,
+            "prescription_id": result.prescription_id,
+            "user_id": user_id,
+            "created_at": now,
+        }
+        for result in results
+        for allocation in result.allocations
+    ])
+    return results
@@ -12,7 +12,6 @@ async def create_procedure(procedure: schemas.ProcedureCreate, db: AsyncSession
     db_procedure = models.Procedure(**procedure.model_dump())
     db.add(db_procedure)
     await db.commit()
-    await db.refresh(db_procedure)
     return db_procedure
 
 @router.get("/", response_model=List[schemas.ProcedureResponse])
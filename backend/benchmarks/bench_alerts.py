@@ -0,0 +1,129 @@
+"""
+Pharmacy alert sweep benchmark.
+
+Seeds a throwaway SQLite database with --hospitals pharmacies, each stocking
+--skus products in --batches batches with staggered expiry dates and
+quantities. It then times:
+
+- the first (full) sweep of app.pharmacy.alerts.AlertSweeper;
+- an incremental sweep after --changes batches had their stock changed;
+- an incremental sweep on the next day (expiry range scans only);
+- reading one page of a hospital's alerts from stock_alerts, against what the
+  frontend did before: load the hospital's whole inventory and evaluate it.
+
+Usage:
+    python -m benchmarks.bench_alerts [--hospitals 5] [--skus 20000] [--batches 4] [--changes 200]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.base import Base
+from app.pharmacy.alerts import AlertSweeper, product_alerts
+from app.pharmacy.models import Medicine, StockAlert
+import app.audit.models  # noqa: F401  (register remaining tables)
+import app.patients.models  # noqa: F401
+import app.doctors.models  # noqa: F401
+
+TODAY = date(2026, 3, 2)
+
+
+async def seed(engine, hospitals: int, skus: int, batches: int) -> list:
+    rng = random.Random(3)
+    # Written well before the sweeps, so the incremental ones only see what the benchmark changes
+    written = datetime.now(timezone.utc) - timedelta(hours=1)
+    ids = []
+    async with engine.begin() as conn:
+        for number in range(hospitals):
+            rows = [
+                {
+                    "name": f"Product {sku:05d}",
+                    "batch_number": f"B{sku}-{batch}",
+                    "expiry_date": TODAY + timedelta(days=rng.randint(-30, 720)),
+                    "quantity": rng.choice((0, 2, 5, 20, 40, 80)),
+                    "unit_price": 1.0,
+                    "hospital_id": f"ALERT_H{number:02d}",
+                    "updated_at": written,
+                }
+                for batch in range(batches) for sku in range(skus)
+            ]
+            for offset in range(0, len(rows), 10000):
+                ids += (await conn.execute(
+                    insert(Medicine).returning(Medicine.id), rows[offset:offset + 10000]
+                )).scalars().all()
+    return ids
+
+
+async def timed(label: str, operation) -> None:
+    started = time.perf_counter()
+    result = await operation
+    print(f"{label:<34} {(time.perf_counter() - started) * 1000:>10.1f} ms  ({result})")
+
+
+async def page_from_table(Session, hospital: str) -> str:
+    async with Session() as db:
+        rows = (await db.execute(
+            select(StockAlert).where(StockAlert.hospital_id == hospital).order_by(StockAlert.id).limit(100)
+        )).scalars().all()
+    return f"{len(rows)} alerts"
+
+
+async def page_from_inventory(Session, hospital: str) -> str:
+    async with Session() as db:
+        medicines = (await db.execute(select(Medicine).where(Medicine.hospital_id == hospital))).scalars().all()
+    by_name = defaultdict(list)
+    for medicine in medicines:
+        by_name[medicine.name].append(medicine)
+    alerts = [alert for batches in by_name.values() for alert in product_alerts(batches, TODAY, 10, 90)]
+    return f"{len(alerts)} alerts from {len(medicines)} rows"
+
+
+async def run(args: argparse.Namespace) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'alerts.db')}")
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    started = time.perf_counter()
+    ids = await seed(engine, args.hospitals, args.skus, args.batches)
+    print(f"{args.hospitals} hospitals x {args.skus} products x {args.batches} batches "
+          f"seeded in {time.perf_counter() - started:.1f}s")
+
+    sweeper = AlertSweeper(Session, low_stock_threshold=10, warning_days=90)
+    await timed("full sweep", sweeper.sweep(today=TODAY))
+
+    async with engine.begin() as conn:
+        await conn.execute(
+            update(Medicine).where(Medicine.id == bindparam("batch")).values(quantity=Medicine.quantity + 1),
+            [{"batch": batch} for batch in random.Random(9).sample(ids, args.changes)],
+        )
+    await timed(f"incremental, {args.changes} batches changed", sweeper.sweep(today=TODAY))
+    await timed("incremental, next day", sweeper.sweep(today=TODAY + timedelta(days=1)))
+    await timed("alerts page from stock_alerts", page_from_table(Session, "ALERT_H00"))
+    await timed("alerts from full inventory", page_from_inventory(Session, "ALERT_H00"))
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hospitals", type=int, default=5)
+    parser.add_argument("--skus", type=int, default=20000, help="products per hospital")
+    parser.add_argument("--batches", type=int, default=4, help="batches per product")
+    parser.add_argument("--changes", type=int, default=200, help="batches restocked before the incremental sweep")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
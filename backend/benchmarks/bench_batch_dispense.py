@@ -0,0 +1,108 @@
+"""
+Ward-round (batch) dispensing benchmark.
+
+Seeds a throwaway SQLite database with one pharmacy stocking --skus products
+in --batches batches each, and one prescription per product. Each round
+dispenses --lines random prescriptions, either one transaction per line with
+app.pharmacy.stock.dispense (what the ward tablet did against
+POST /pharmacy/dispense/) or all lines at once with stock.dispense_many
+(POST /pharmacy/dispense/batch). Audit logging is left out of both. Reports
+the time and the SQL statements per round.
+
+Usage:
+    python -m benchmarks.bench_batch_dispense [--skus 5000] [--batches 3] [--lines 40] [--rounds 50]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.base import Base
+from app.core.query_stats import capture_statements
+from app.doctors.models import Doctor
+from app.patients.models import Patient
+from app.pharmacy import stock
+from app.pharmacy.models import Medicine, Prescription
+import app.audit.models  # noqa: F401  (register remaining tables)
+
+HOSPITAL_ID = "BENCH_WARD"
+TODAY = date(2026, 3, 2)
+
+
+async def seed(Session, skus: int, batches: int) -> list:
+    async with Session() as db:
+        await db.execute(insert(Patient), [{"first_name": "Ward", "last_name": "Round", "hospital_id": HOSPITAL_ID}])
+        await db.execute(insert(Doctor), [{"full_name": "Dr Ward", "hospital_id": HOSPITAL_ID}])
+        patient_id = await db.scalar(select(func.max(Patient.id)))
+        doctor_id = await db.scalar(select(func.max(Doctor.id)))
+        medicine_ids = list((await db.execute(
+            insert(Medicine).returning(Medicine.id),
+            [{"name": f"Drug {sku}", "batch_number": f"B{sku}-{batch}", "quantity": 10_000, "unit_price": 1.0,
+              "expiry_date": TODAY + timedelta(days=30 * (batch + 1)), "hospital_id": HOSPITAL_ID}
+             for sku in range(skus) for batch in range(batches)],
+        )).scalars())
+        prescription_ids = list((await db.execute(
+            insert(Prescription).returning(Prescription.id),
+            [{"patient_id": patient_id, "doctor_id": doctor_id, "medicine_id": medicine_id, "dosage": "1",
+              "frequency": "daily", "hospital_id": HOSPITAL_ID} for medicine_id in medicine_ids[::batches]],
+        )).scalars())
+        await db.commit()
+    return prescription_ids
+
+
+async def one_by_one(Session, lines) -> None:
+    for prescription_id, quantity in lines:
+        async with Session() as db:
+            await stock.dispense(db, HOSPITAL_ID, "bench", prescription_id, quantity, today=TODAY)
+            await db.commit()
+
+
+async def batched(Session, lines) -> None:
+    async with Session() as db:
+        await stock.dispense_many(db, HOSPITAL_ID, "bench", lines, today=TODAY)
+        await db.commit()
+
+
+async def run(args: argparse.Namespace) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'ward.db')}")
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    prescription_ids = await seed(Session, args.skus, args.batches)
+
+    rng = random.Random(13)
+    rounds = [[(rng.choice(prescription_ids), rng.randint(1, 3)) for _ in range(args.lines)] for _ in range(args.rounds)]
+    print(f"{args.rounds} rounds of {args.lines} lines, {args.skus} products x {args.batches} batches")
+    print(f"{'variant':<12} {'ms/round':>10} {'statements/round':>17}")
+    for variant in (one_by_one, batched):
+        with capture_statements() as statements:
+            started = time.perf_counter()
+            for lines in rounds:
+                await variant(Session, lines)
+            elapsed = time.perf_counter() - started
+        print(f"{variant.__name__:<12} {elapsed * 1000 / args.rounds:>10.1f} {len(statements) / args.rounds:>17.1f}")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skus", type=int, default=5000)
+    parser.add_argument("--batches", type=int, default=3)
+    parser.add_argument("--lines", type=int, default=40, help="prescriptions per round")
+    parser.add_argument("--rounds", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Booking validation benchmark.
+
+Seeds a throwaway SQLite database with a large appointment book and compares
+the previous validation (four sequential queries: patient, doctor,
+availability, conflict window) with the single combined query in
+app.appointments.booking, and with that query backed by the in-memory
+schedule index (existence and availability checks in SQL, conflicts from bitmaps).
+
+Usage:
+    python -m benchmarks.bench_booking [--doctors 50] [--appointments 200000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, time as dtime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.base import Base
+from app.appointments.booking import CONFLICT_WINDOW, validate_booking
+from app.appointments.models import Appointment, AppointmentStatus
+from app.doctors.models import Doctor, DoctorAvailability
+from app.doctors.schedule import ScheduleIndex
+from app.patients.models import Patient
+import app.audit.models  # noqa: F401  (register remaining tables)
+
+HOSPITAL_ID = "BENCH_HOSP"
+START = datetime(2026, 1, 5, 8, 0)
+
+
+async def seed(engine, doctors: int, appointments: int) -> None:
+    rng = random.Random(42)
+    async with engine.begin() as conn:
+        await conn.execute(insert(Patient), [
+            {"first_name": f"P{i}", "last_name": "Bench", "hospital_id": HOSPITAL_ID} for i in range(1000)
+        ])
+        await conn.execute(insert(Doctor), [
+            {"full_name": f"Dr {i}", "hospital_id": HOSPITAL_ID} for i in range(doctors)
+        ])
+        await conn.execute(insert(DoctorAvailability), [
+            {"doctor_id": d + 1, "day_of_week": day, "start_time": dtime(8), "end_time": dtime(20), "hospital_id": HOSPITAL_ID}
+            for d in range(doctors) for day in range(7)
+        ])
+        rows = [
+            {
+                "patient_id": rng.randint(1, 1000),
+                "doctor_id": rng.randint(1, doctors),
+                "appointment_datetime": START + timedelta(days=rng.randint(0, 364), minutes=30 * rng.randint(0, 23)),
+                "status": AppointmentStatus.SCHEDULED.value,
+                "hospital_id": HOSPITAL_ID,
+            }
+            for _ in range(appointments)
+        ]
+        for offset in range(0, len(rows), 20000):
+            await conn.execute(insert(Appointment), rows[offset:offset + 20000])
+
+
+async def legacy_validate(db, patient_id, doctor_id, when):
+    if not (await db.execute(select(Patient).where(Patient.id == patient_id).where(Patient.hospital_id == HOSPITAL_ID))).scalars().first():
+        return ["patient"]
+    if not (await db.execute(select(Doctor).where(Doctor.id == doctor_id).where(Doctor.hospital_id == HOSPITAL_ID))).scalars().first():
+        return ["doctor"]
+    if not (await db.execute(
+        select(DoctorAvailability)
+        .where(DoctorAvailability.doctor_id == doctor_id)
+        .where(DoctorAvailability.day_of_week == when.weekday())
+        .where(DoctorAvailability.is_available == True)
+        .where(DoctorAvailability.start_time <= when.time())
+        .where(DoctorAvailability.end_time > when.time())
+    )).scalars().first():
+        return ["availability"]
+    if (await db.execute(
+        select(Appointment)
+        .where(Appointment.doctor_id == doctor_id)
+        .where(Appointment.status == AppointmentStatus.SCHEDULED.value)
+        .where(Appointment.appointment_datetime > when - CONFLICT_WINDOW)
+        .where(Appointment.appointment_datetime < when + CONFLICT_WINDOW)
+    )).scalars().first():
+        return ["conflict"]
+    return []
+
+
+async def run(doctors: int, appointments: int, iterations: int) -> None:
+    tmpdir = tempfile.mkdtemp()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmpdir, 'bench.db')}")
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(engine, doctors, appointments)
+
+    rng = random.Random(7)
+    probes = [
+        (rng.randint(1, 1000), rng.randint(1, doctors), START + timedelta(days=rng.randint(0, 364), minutes=15 * rng.randint(0, 47)))
+        for _ in range(iterations)
+    ]
+    print(f"{appointments} appointments, {doctors} doctors, {iterations} validations")
+    schedule = ScheduleIndex(maxsize=100000, ttl=3600)
+    async with Session() as db:
+        for patient_id, doctor_id, when in probes:
+            await schedule.day(db, doctor_id, when.date())
+        for label, check in (
+            ("legacy (4 queries)", lambda p, d, w: legacy_validate(db, p, d, w)),
+            ("combined (1 query)", lambda p, d, w: validate_booking(db, HOSPITAL_ID, p, d, w)),
+            ("schedule index (warm)", lambda p, d, w: validate_booking(db, HOSPITAL_ID, p, d, w, schedule=schedule)),
+        ):
+            samples = []
+            for patient_id, doctor_id, when in probes:
+                started = time.perf_counter()
+                await check(patient_id, doctor_id, when)
+                samples.append((time.perf_counter() - started) * 1000)
+            samples.sort()
+            print(f"{label:<22} p50 {samples[len(samples) // 2]:.3f} ms  p95 {samples[int(len(samples) * 0.95)]:.3f} ms")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doctors", type=int, default=50)
+    parser.add_argument("--appointments", type=int, default=200000)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.doctors, args.appointments, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Bulk booking benchmark.
+
+Seeds a throwaway SQLite database (same appointment book as bench_booking) and
+books N new appointments twice: one at a time, as N single `POST /appointments/`
+calls would (validation query, INSERT, slot claims, audit row, commit), and as
+one batch through app.appointments.bulk.bulk_book.
+
+Usage:
+    python -m benchmarks.bench_bulk_booking [--items 2000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.base import Base
+from app.core.audit import log_audit_event
+from app.appointments import models, schemas
+from app.appointments.booking import claim_slots, validate_booking
+from app.appointments.bulk import bulk_book
+from benchmarks.bench_booking import HOSPITAL_ID, START, seed
+
+
+def _items(doctors: int, count: int, first_day: int):
+    # Back-to-back half hours, 08:00-20:00, spread over every doctor
+    return [
+        schemas.AppointmentCreate(
+            patient_id=1 + i % 1000,
+            doctor_id=1 + i % doctors,
+            appointment_datetime=START + timedelta(days=first_day + (i // doctors) // 24, hours=((i // doctors) % 24) / 2),
+        )
+        for i in range(count)
+    ]
+
+
+async def run(doctors: int, items: int) -> None:
+    tmpdir = tempfile.mkdtemp()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmpdir, 'bench.db')}")
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    # Existing bookings live in the first year; new ones go after it
+    await seed(engine, doctors, 50000)
+
+    async with Session() as db:
+        started = time.perf_counter()
+        created = 0
+        for item in _items(doctors, items, 400):
+            if await validate_booking(db, HOSPITAL_ID, item.patient_id, item.doctor_id, item.appointment_datetime):
+                continue
+            appointment = models.Appointment(**item.model_dump(), hospital_id=HOSPITAL_ID)
+            db.add(appointment)
+            await claim_slots(db, appointment)
+            await log_audit_event(db=db, user_id="bench", action="CREATE_APPOINTMENT", resource_type="Appointment", hospital_id=HOSPITAL_ID)
+            await db.commit()
+            created += 1
+        single = time.perf_counter() - started
+    print(f"one at a time  {created} booked in {single:.2f} s ({created / single:.0f}/s)")
+
+    async with Session() as db:
+        request = schemas.BulkAppointmentCreate(items=_items(doctors, items, 500))
+        started = time.perf_counter()
+        async for event in bulk_book(db, HOSPITAL_ID, "bench", request):
+            summary = event
+        bulk = time.perf_counter() - started
+    print(f"bulk_book      {summary['created']} booked in {bulk:.2f} s ({summary['created'] / bulk:.0f}/s)")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doctors", type=int, default=50)
+    parser.add_argument("--items", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.doctors, args.items))
+
+
+if __name__ == "__main__":
+    main()
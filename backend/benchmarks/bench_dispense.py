@@ -0,0 +1,134 @@
+"""
+Concurrent dispensing benchmark.
+
+Runs --dispenses single-unit dispenses against a handful of medicines from
+--concurrency workers, each transaction in its own session as under real
+traffic. It compares the previous read-modify-write (SELECT prescription,
+SELECT medicine, check and assign quantity in Python, UPDATE) with the
+conditional UPDATE in app.pharmacy.stock. For each variant it reports
+throughput, failed transactions and lost updates (units dispensed but never
+deducted from stock). Audit logging is left out of both.
+
+Usage:
+    python -m benchmarks.bench_dispense [--dispenses 2000] [--concurrency 20] [--medicines 5]
+        [--database-url URL]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.base import Base
+from app.doctors.models import Doctor
+from app.patients.models import Patient
+from app.pharmacy import stock
+from app.pharmacy.models import Medicine, Prescription, StockMovement
+import app.audit.models  # noqa: F401  (register remaining tables)
+
+HOSPITAL_ID = "BENCH_PHARMACY"
+
+
+async def legacy_dispense(db: AsyncSession, prescription_id: int, quantity: int) -> None:
+    prescription = (await db.execute(
+        select(Prescription).where(Prescription.id == prescription_id).where(Prescription.hospital_id == HOSPITAL_ID)
+    )).scalars().first()
+    medicine = (await db.execute(
+        select(Medicine).where(Medicine.id == prescription.medicine_id).where(Medicine.hospital_id == HOSPITAL_ID)
+    )).scalars().first()
+    if medicine.quantity < quantity:
+        raise stock.StockError(400, stock.INSUFFICIENT_STOCK)
+    medicine.quantity -= quantity
+
+
+async def atomic_dispense(db: AsyncSession, prescription_id: int, quantity: int) -> None:
+    await stock.dispense(db, HOSPITAL_ID, "bench", prescription_id, quantity)
+
+
+async def seed(Session, medicines: int, units: int):
+    async with Session() as db:
+        await db.execute(insert(Patient), [{"first_name": "Bench", "last_name": "Patient", "hospital_id": HOSPITAL_ID}])
+        await db.execute(insert(Doctor), [{"full_name": "Dr Bench", "hospital_id": HOSPITAL_ID}])
+        patient_id = await db.scalar(select(func.max(Patient.id)))
+        doctor_id = await db.scalar(select(func.max(Doctor.id)))
+        medicine_ids = list((await db.execute(
+            insert(Medicine).returning(Medicine.id),
+            [{"name": f"Drug {i}", "quantity": units, "unit_price": 1.0, "expiry_date": date(2030, 1, 1),
+              "hospital_id": HOSPITAL_ID} for i in range(medicines)],
+        )).scalars())
+        prescription_ids = list((await db.execute(
+            insert(Prescription).returning(Prescription.id),
+            [{"patient_id": patient_id, "doctor_id": doctor_id, "medicine_id": medicine_id, "dosage": "1",
+              "frequency": "daily", "hospital_id": HOSPITAL_ID} for medicine_id in medicine_ids],
+        )).scalars())
+        await db.commit()
+    return medicine_ids, prescription_ids
+
+
+async def run_variant(Session, operation, dispenses: int, concurrency: int, medicines: int) -> None:
+    # Enough stock that no dispense should ever be refused
+    medicine_ids, prescription_ids = await seed(Session, medicines, dispenses)
+    remaining = dispenses
+    committed = failed = 0
+
+    async def worker():
+        nonlocal remaining, committed, failed
+        while remaining > 0:
+            remaining -= 1
+            prescription_id = prescription_ids[remaining % len(prescription_ids)]
+            async with Session() as db:
+                try:
+                    await operation(db, prescription_id, 1)
+                    await db.commit()
+                    committed += 1
+                except Exception:
+                    await db.rollback()
+                    failed += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    async with Session() as db:
+        left = await db.scalar(select(func.sum(Medicine.quantity)).where(Medicine.id.in_(medicine_ids)))
+    lost = committed - (dispenses * len(medicine_ids) - left)
+    label = operation.__name__.replace("_dispense", "")
+    print(f"{label:<10} {committed / elapsed:>9.1f} {failed:>8} {lost:>12}")
+
+
+async def run(args: argparse.Namespace) -> None:
+    database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'dispense.db')}"
+    engine = create_async_engine(database_url, pool_size=args.concurrency, max_overflow=0) \
+        if database_url.startswith("postgresql") else create_async_engine(database_url, connect_args={"timeout": 30})
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    print(f"{args.dispenses} dispenses, {args.concurrency} workers, {args.medicines} medicines "
+          f"({database_url.split('://', 1)[0]})")
+    print(f"{'variant':<10} {'disp/s':>9} {'failed':>8} {'lost updates':>12}")
+    for operation in (legacy_dispense, atomic_dispense):
+        await run_variant(Session, operation, args.dispenses, args.concurrency, args.medicines)
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dispenses", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--medicines", type=int, default=5)
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite file")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
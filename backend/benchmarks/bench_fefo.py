@@ -0,0 +1,128 @@
+"""
+FEFO allocator benchmark.
+
+Seeds a throwaway SQLite database with --hospitals pharmacies, each stocking
+--skus products in --batches batches with staggered expiry dates (some already
+expired), and one prescription per product. It then times
+app.pharmacy.stock.dispense for quantities that span two or three batches.
+Each dispense is rolled back so the stock stays put. The run is repeated after
+dropping ix_medicines_hospital_id_name_expiry_date, to show what the
+expiry-ordered index is worth.
+
+Usage:
+    python -m benchmarks.bench_fefo [--hospitals 5] [--skus 20000] [--batches 4] [--iterations 2000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.base import Base
+from app.doctors.models import Doctor
+from app.patients.models import Patient
+from app.pharmacy import stock
+from app.pharmacy.models import Medicine, Prescription
+import app.audit.models  # noqa: F401  (register remaining tables)
+
+TODAY = date(2026, 3, 2)
+BATCH_SIZE = 40
+
+
+async def seed(engine, hospitals: int, skus: int, batches: int):
+    rng = random.Random(11)
+    prescriptions = []
+    async with engine.begin() as conn:
+        for number in range(hospitals):
+            hospital = f"FEFO_H{number:02d}"
+            await conn.execute(insert(Patient), [{"first_name": "F", "last_name": "Efo", "hospital_id": hospital}])
+            await conn.execute(insert(Doctor), [{"full_name": "Dr Fefo", "hospital_id": hospital}])
+            patient_id = await conn.scalar(select(func.max(Patient.id)))
+            doctor_id = await conn.scalar(select(func.max(Doctor.id)))
+            # Products are interleaved so a product's batches are not neighbours in the table
+            rows = [
+                {
+                    "name": f"Product {sku:05d}",
+                    "batch_number": f"B{sku}-{batch}",
+                    "expiry_date": TODAY + timedelta(days=rng.randint(-60, 720)),
+                    "quantity": BATCH_SIZE,
+                    "unit_price": 1.0,
+                    "hospital_id": hospital,
+                }
+                for batch in range(batches) for sku in range(skus)
+            ]
+            medicine_ids = []
+            for offset in range(0, len(rows), 10000):
+                medicine_ids += (await conn.execute(
+                    insert(Medicine).returning(Medicine.id), rows[offset:offset + 10000]
+                )).scalars().all()
+            prescription_rows = [
+                {"patient_id": patient_id, "doctor_id": doctor_id, "medicine_id": medicine_id, "dosage": "1",
+                 "frequency": "daily", "hospital_id": hospital}
+                for medicine_id in medicine_ids[:skus]
+            ]
+            for offset in range(0, len(prescription_rows), 10000):
+                ids = (await conn.execute(
+                    insert(Prescription).returning(Prescription.id), prescription_rows[offset:offset + 10000]
+                )).scalars().all()
+                prescriptions += [(hospital, prescription_id) for prescription_id in ids]
+    return prescriptions
+
+
+async def measure(engine, probes) -> tuple:
+    samples, batches_touched = [], 0
+    async with AsyncSession(engine) as db:
+        for hospital, prescription_id, quantity in probes:
+            started = time.perf_counter()
+            try:
+                allocations, _ = await stock.dispense(db, hospital, "bench", prescription_id, quantity, today=TODAY)
+                batches_touched += len(allocations)
+            except stock.StockError:
+                pass
+            samples.append((time.perf_counter() - started) * 1000)
+            await db.rollback()
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.95)], batches_touched / len(probes)
+
+
+async def run(args: argparse.Namespace) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'fefo.db')}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    started = time.perf_counter()
+    prescriptions = await seed(engine, args.hospitals, args.skus, args.batches)
+    print(f"{args.hospitals} hospitals x {args.skus} products x {args.batches} batches "
+          f"seeded in {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(5)
+    probes = [(*rng.choice(prescriptions), rng.randint(BATCH_SIZE // 2, 2 * BATCH_SIZE)) for _ in range(args.iterations)]
+    print(f"{'':<34} {'p50 ms':>8} {'p95 ms':>8} {'batches/dispense':>17}")
+    p50, p95, spread = await measure(engine, probes)
+    print(f"{'FEFO with (hospital, name, expiry)':<34} {p50:>8.3f} {p95:>8.3f} {spread:>17.2f}")
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP INDEX ix_medicines_hospital_id_name_expiry_date"))
+    p50, p95, spread = await measure(engine, probes)
+    print(f"{'FEFO without it':<34} {p50:>8.3f} {p95:>8.3f} {spread:>17.2f}")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hospitals", type=int, default=5)
+    parser.add_argument("--skus", type=int, default=20000, help="products per hospital")
+    parser.add_argument("--batches", type=int, default=4, help="batches per product")
+    parser.add_argument("--iterations", type=int, default=2000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Outstanding-balance benchmark.
+
+Seeds a throwaway SQLite database with --invoices invoices for one hospital
+(spread over --patients patients), each with one to three payments, about a
+fifth of them only partly paid. It then compares, per query:
+
+- what reconciliation did before: load invoices and their payments, and
+  re-sum the payments in Python;
+- the maintained columns: a patient's balance from
+  ix_invoices_hospital_id_patient_id_balance, and the first page of unsettled
+  invoices from the ix_invoices_outstanding_hospital_id_id partial index.
+
+Usage:
+    python -m benchmarks.bench_invoice_balance [--invoices 200000] [--patients 20000] [--rounds 200]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from statistics import median
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.billing.models import OUTSTANDING, Invoice, InvoiceStatus, Payment
+from app.core.base import Base
+from app.core.money import to_money
+from app.patients.models import Patient
+import app.audit.models  # noqa: F401  (register remaining tables)
+import app.appointments.models  # noqa: F401
+import app.doctors.models  # noqa: F401
+
+HOSPITAL_ID = "BENCH_BILLING"
+CHUNK = 10000
+
+
+async def seed(engine, invoices: int, patients: int) -> None:
+    rng = random.Random(17)
+    async with engine.begin() as conn:
+        await conn.execute(insert(Patient), [
+            {"first_name": "P", "last_name": str(i), "hospital_id": HOSPITAL_ID} for i in range(patients)
+        ])
+        for offset in range(0, invoices, CHUNK):
+            rows, splits = [], []
+            for _ in range(min(CHUNK, invoices - offset)):
+                final = to_money(rng.uniform(20, 500))
+                parts = [to_money(final / 3)] * rng.randint(1, 3)
+                if rng.random() < 0.8:
+                    parts[-1] += final - sum(parts)
+                paid = sum(parts)
+                rows.append({
+                    "patient_id": rng.randint(1, patients), "final_amount": final, "total_amount": final,
+                    "amount_paid": paid, "hospital_id": HOSPITAL_ID,
+                    "status": (InvoiceStatus.PAID if paid >= final else InvoiceStatus.PARTIAL).value,
+                })
+                splits.append(parts)
+            ids = (await conn.execute(insert(Invoice).returning(Invoice.id), rows)).scalars().all()
+            await conn.execute(insert(Payment), [
+                {"invoice_id": invoice_id, "amount": amount, "hospital_id": HOSPITAL_ID}
+                for invoice_id, parts in zip(ids, splits) for amount in parts
+            ])
+
+
+async def balance_by_summing(db: AsyncSession, patient_id: int):
+    invoices = (await db.execute(
+        select(Invoice.id, Invoice.final_amount)
+        .where(Invoice.hospital_id == HOSPITAL_ID).where(Invoice.patient_id == patient_id)
+    )).all()
+    paid = defaultdict(int)
+    for invoice_id, amount in (await db.execute(
+        select(Payment.invoice_id, Payment.amount).where(Payment.invoice_id.in_([i.id for i in invoices]))
+    )):
+        paid[invoice_id] += amount
+    return sum(max(final - paid[invoice_id], 0) for invoice_id, final in invoices)
+
+
+async def balance_from_index(db: AsyncSession, patient_id: int):
+    return await db.scalar(
+        select(func.coalesce(func.sum(Invoice.balance), 0))
+        .where(Invoice.hospital_id == HOSPITAL_ID).where(Invoice.patient_id == patient_id).where(OUTSTANDING)
+    )
+
+
+async def outstanding_by_summing(db: AsyncSession):
+    paid = defaultdict(int)
+    for invoice_id, amount in await db.execute(select(Payment.invoice_id, Payment.amount).where(Payment.hospital_id == HOSPITAL_ID)):
+        paid[invoice_id] += amount
+    invoices = (await db.execute(
+        select(Invoice.id, Invoice.final_amount).where(Invoice.hospital_id == HOSPITAL_ID).order_by(Invoice.id)
+    )).all()
+    return [invoice_id for invoice_id, final in invoices if final > paid[invoice_id]][:100]
+
+
+async def outstanding_from_index(db: AsyncSession):
+    return (await db.execute(
+        select(Invoice).where(Invoice.hospital_id == HOSPITAL_ID).where(OUTSTANDING).order_by(Invoice.id).limit(100)
+    )).scalars().all()
+
+
+async def run(args: argparse.Namespace) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'billing.db')}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    started = time.perf_counter()
+    await seed(engine, args.invoices, args.patients)
+    print(f"{args.invoices} invoices for {args.patients} patients seeded in {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(5)
+    patients = [rng.randint(1, args.patients) for _ in range(args.rounds)]
+    print(f"{'query':<38} {'median ms':>10}")
+    async with AsyncSession(engine) as db:
+        for label, operation, rounds in (
+            ("patient balance, summing payments", balance_by_summing, patients),
+            ("patient balance, maintained", balance_from_index, patients),
+            ("outstanding page, summing payments", lambda db, _: outstanding_by_summing(db), patients[:3]),
+            ("outstanding page, partial index", lambda db, _: outstanding_from_index(db), patients),
+        ):
+            timings = []
+            for patient_id in rounds:
+                started = time.perf_counter()
+                await operation(db, patient_id)
+                timings.append((time.perf_counter() - started) * 1000)
+            print(f"{label:<38} {median(timings):>10.2f}")
+        assert await balance_by_summing(db, patients[0]) == await balance_from_index(db, patients[0])
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invoices", type=int, default=200_000)
+    parser.add_argument("--patients", type=int, default=20_000)
+    parser.add_argument("--rounds", type=int, default=200)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Tenancy middleware throughput benchmark.
+
+Runs the same tiny FastAPI app behind the previous BaseHTTPMiddleware-based
+tenancy middleware and behind the current pure-ASGI MultiTenantMiddleware, and
+reports requests/sec for GET /health and an authenticated GET that reads the
+tenant context. Requests go through httpx's in-process ASGI transport, so the
+numbers isolate middleware overhead from networking and the database.
+
+Usage:
+    python -m benchmarks.bench_middleware [--requests 3000]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+from jose import JWTError
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.auth.security import create_access_token, decode_access_token
+from app.core.config import settings
+from app.core.middleware import MultiTenantMiddleware, get_current_hospital_id, hospital_context
+
+
+class LegacyTenantMiddleware(BaseHTTPMiddleware):
+    """Equivalent of the pre-ASGI implementation, kept here for comparison only."""
+    async def dispatch(self, request: Request, call_next):
+        public_paths = [
+            "/",
+            "/health",
+            f"{settings.API_V1_STR}/auth/login",
+            f"{settings.API_V1_STR}/auth/register",
+            f"{settings.API_V1_STR}/docs",
+            f"{settings.API_V1_STR}/redoc",
+            f"{settings.API_V1_STR}/openapi.json",
+        ]
+        if request.url.path in public_paths or request.method == "OPTIONS":
+            return await call_next(request)
+        auth_header = request.headers.get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return await call_next(request)
+        try:
+            payload = decode_access_token(auth_header.split(" ")[1])
+        except JWTError:
+            return await call_next(request)
+        token = hospital_context.set(str(payload["hospital_id"]))
+        try:
+            return await call_next(request)
+        finally:
+            hospital_context.reset(token)
+
+
+def build_app(middleware) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(middleware)
+
+    @app.get("/health")
+    def health():
+        return {"status": "healthy"}
+
+    @app.get("/secure")
+    async def secure():
+        return {"hospital_id": get_current_hospital_id()}
+
+    return app
+
+
+async def measure(app: FastAPI, path: str, headers: dict, total: int, concurrency: int = 50) -> float:
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(100):  # warm-up
+            await client.get(path, headers=headers)
+
+        async def worker(count: int):
+            for _ in range(count):
+                response = await client.get(path, headers=headers)
+                assert response.status_code == 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(total // concurrency) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return (total // concurrency) * concurrency / elapsed
+
+
+async def run(total: int) -> None:
+    token = create_access_token(subject="bench@hospital.com", hospital_id="HOSP1", role="admin")
+    auth = {"Authorization": f"Bearer {token}"}
+    print(f"{'middleware':<24} {'/health req/s':>14} {'auth GET req/s':>15}")
+    for label, middleware in (("BaseHTTPMiddleware", LegacyTenantMiddleware), ("pure ASGI", MultiTenantMiddleware)):
+        app = build_app(middleware)
+        health = await measure(app, "/health", {}, total)
+        secure = await measure(app, "/secure", auth, total)
+        print(f"{label:<24} {health:>14.0f} {secure:>15.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
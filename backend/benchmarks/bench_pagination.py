@@ -0,0 +1,92 @@
+"""
+Keyset pagination benchmark.
+
+Seeds a throwaway SQLite database with a growing patients table and times
+page fetches through `app.core.pagination.paginate`. Keyset latency should stay
+flat as the table grows, while the equivalent OFFSET query degrades linearly.
+
+Usage:
+    python -m benchmarks.bench_pagination [--sizes 10000 100000 300000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.base import Base
+from app.core.pagination import PageParams, encode_cursor, paginate
+from app.patients.models import Patient
+
+HOSPITAL_ID = "BENCH_HOSP"
+PAGE_SIZE = 100
+REPEATS = 20
+
+
+async def _seed(engine, start: int, stop: int) -> None:
+    rows = [
+        {"first_name": f"First{i}", "last_name": f"Last{i}", "hospital_id": HOSPITAL_ID if i % 4 else "OTHER_HOSP"}
+        for i in range(start, stop)
+    ]
+    async with engine.begin() as conn:
+        for offset in range(0, len(rows), 10000):
+            await conn.execute(insert(Patient), rows[offset:offset + 10000])
+
+
+async def _time(coro_factory) -> float:
+    samples = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        await coro_factory()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000
+
+
+async def run(sizes) -> None:
+    tmpdir = tempfile.mkdtemp()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmpdir, 'bench.db')}")
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    print(f"{'rows':>10} {'keyset first':>14} {'keyset deep':>13} {'offset deep':>13}  (median ms, page={PAGE_SIZE})")
+    seeded = 0
+    for size in sizes:
+        await _seed(engine, seeded, size)
+        seeded = size
+        base_query = select(Patient).where(Patient.hospital_id == HOSPITAL_ID)
+
+        async with Session() as db:
+            deep_id = (await db.execute(
+                select(Patient.id).where(Patient.hospital_id == HOSPITAL_ID).order_by(Patient.id.desc()).limit(1).offset(PAGE_SIZE * 2)
+            )).scalar_one()
+            deep_offset = (await db.execute(
+                select(func.count()).select_from(Patient).where(Patient.hospital_id == HOSPITAL_ID).where(Patient.id <= deep_id)
+            )).scalar_one()
+
+            first = await _time(lambda: paginate(db, base_query, Patient, PageParams(cursor=None, limit=PAGE_SIZE)))
+            deep = await _time(lambda: paginate(db, base_query, Patient, PageParams(cursor=encode_cursor(deep_id), limit=PAGE_SIZE)))
+            offset = await _time(lambda: db.execute(base_query.order_by(Patient.id).offset(deep_offset).limit(PAGE_SIZE)))
+        print(f"{size:>10} {first:>14.2f} {deep:>13.2f} {offset:>13.2f}")
+
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 300000])
+    args = parser.parse_args()
+    asyncio.run(run(sorted(args.sizes)))
+
+
+if __name__ == "__main__":
+    main()
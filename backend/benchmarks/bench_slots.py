@@ -0,0 +1,64 @@
+"""
+Free-slot search benchmark.
+
+Seeds a throwaway SQLite database (same appointment book as bench_booking) and
+times `app.doctors.slots.find_free_slots` over a window for every doctor in the
+hospital, i.e. the multi-doctor `GET /doctors/slots` search.
+
+Usage:
+    python -m benchmarks.bench_slots [--doctors 50] [--appointments 200000] [--days 30]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.base import Base
+from app.doctors.slots import SlotSearchParams, find_free_slots
+from benchmarks.bench_booking import HOSPITAL_ID, START, seed
+
+REPEATS = 20
+
+
+async def run(doctors: int, appointments: int, days: int) -> None:
+    tmpdir = tempfile.mkdtemp()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmpdir, 'bench.db')}")
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(engine, doctors, appointments)
+
+    search = SlotSearchParams(start=START + timedelta(days=90), end=START + timedelta(days=90 + days), duration=30)
+    async with Session() as db:
+        samples = []
+        for _ in range(REPEATS):
+            started = time.perf_counter()
+            rows = await find_free_slots(db, HOSPITAL_ID, search)
+            samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    intervals = sum(len(free) for _, _, free in rows)
+    print(f"{appointments} appointments, {doctors} doctors, {days}-day window -> {intervals} free intervals")
+    print(f"find_free_slots  p50 {samples[len(samples) // 2]:.1f} ms  max {samples[-1]:.1f} ms")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doctors", type=int, default=50)
+    parser.add_argument("--appointments", type=int, default=200000)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(run(args.doctors, args.appointments, args.days))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Synthetic multi-tenant dataset for the load-test suite.
+
+A thin wrapper over seed_data.py (the staging seeder): the same deterministic
+generator at three preset scales, plus the ids the scenarios need to pick
+realistic targets. Every account logs in with BENCH_PASSWORD.
+
+Not meant to be run directly; see benchmarks/loadtest.py.
+"""
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.auth.security import get_password_hash
+from app.doctors.models import Doctor
+from app.patients.models import Patient
+from app.pharmacy.models import Medicine, Prescription
+from seed_data import TODAY, UPCOMING_DAYS, SeedSpec, admin_email, hospital_id, seed_hospital, staff_email
+
+__all__ = ["BENCH_PASSWORD", "SCALES", "TODAY", "UPCOMING_DAYS", "DatasetSpec", "HospitalData", "generate"]
+
+BENCH_PASSWORD = "bench-password"
+
+
+class DatasetSpec(SeedSpec):
+    """Number of hospitals plus the per-hospital row counts."""
+    def __init__(self, hospitals: int, **counts: int):
+        super().__init__(**counts)
+        self.hospitals = hospitals
+
+
+SCALES = {
+    "small": DatasetSpec(hospitals=3, patients=500, doctors=10, appointments=2000, lab_tests=1000,
+                         medicines=50, prescriptions=500, invoices=500, staff=10),
+    "medium": DatasetSpec(hospitals=10, patients=5000, doctors=40, appointments=20000, lab_tests=10000,
+                          medicines=200, prescriptions=5000, invoices=5000, staff=40),
+    "large": DatasetSpec(hospitals=20, patients=50000, doctors=100, appointments=200000, lab_tests=100000,
+                         medicines=500, prescriptions=50000, invoices=50000, staff=100),
+}
+
+
+class HospitalData:
+    """Ids of one generated hospital, for scenarios to pick realistic targets."""
+    def __init__(self, hospital_id: str, staff: int):
+        self.hospital_id = hospital_id
+        self.admin_email = admin_email(hospital_id)
+        self.staff_emails = [staff_email(hospital_id, index) for index in range(staff)]
+        self.patient_ids: List[int] = []
+        self.doctor_ids: List[int] = []
+        self.medicine_ids: List[int] = []
+        self.prescription_ids: List[int] = []
+
+
+async def _ids(conn, query) -> List[int]:
+    return list((await conn.execute(query)).scalars())
+
+
+async def generate(engine: AsyncEngine, spec: DatasetSpec, seed: int = 42, prefix: str = "LOAD") -> List[HospitalData]:
+    password_hash = get_password_hash(BENCH_PASSWORD)
+    hospitals: List[HospitalData] = []
+    for number in range(1, spec.hospitals + 1):
+        hospital = HospitalData(hospital_id(prefix, number), spec.staff)
+        hid = hospital.hospital_id
+        async with engine.begin() as conn:
+            await seed_hospital(conn, number, spec, seed, prefix, password_hash)
+            hospital.patient_ids = await _ids(conn, select(Patient.id).where(Patient.hospital_id == hid))
+            hospital.doctor_ids = await _ids(conn, select(Doctor.id).where(Doctor.hospital_id == hid))
+            hospital.medicine_ids = await _ids(conn, select(Medicine.id).where(Medicine.hospital_id == hid))
+            hospital.prescription_ids = await _ids(conn, (
+                select(Prescription.id)
+                .where(Prescription.hospital_id == hid)
+                .where(Prescription.status == "active")
+            ))
+        hospitals.append(hospital)
+    return hospitals
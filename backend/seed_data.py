@@ -0,0 +1,472 @@
+"""
+High-volume synthetic tenant data for benchmarks and staging.
+
+Usage:
+    python seed_data.py [--hospitals 10] [--patients 100000] [--appointments 300000] ...
+        [--seed 42] [--workers 4] [--database-url URL] [--create-tables]
+
+Generates N hospitals, each with staff accounts, patients, doctors and their
+weekly availability, a year of completed appointments plus upcoming bookings
+(with their slot claims), lab history, pharmacy stock with its opening ledger
+entries, prescriptions, and invoices with payments for completed visits.
+Counts are per hospital.
+
+- Deterministic: every hospital draws from its own random stream derived from
+  (--seed, hospital number), so the data does not depend on --workers or on
+  which hospitals already exist.
+- Bulk: rows are generated in chunks and loaded with COPY on Postgres
+  (asyncpg copy_records_to_table) and with batched executemany INSERTs
+  elsewhere. Every account gets the same bcrypt hash of --password, computed once.
+- Parallel: hospitals are spread over --workers processes, each with its own
+  engine. SQLite has a single writer, so it always uses one worker.
+- Idempotent: a hospital is written in one transaction together with its admin
+  account, and hospitals whose admin account exists are skipped. Re-running
+  resumes an interrupted seed, and raising --hospitals adds tenants.
+
+All accounts log in with --password; the admin of hospital SEED_H0001 is
+admin@seed_h0001.seed.
+"""
+import argparse
+import asyncio
+import random
+import time as timer
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import Table, insert, select
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.appointments.booking import slot_keys
+from app.appointments.models import Appointment, AppointmentSlot, AppointmentStatus
+from app.auth.models import User, UserRole
+from app.auth.security import get_password_hash
+from app.billing.models import Invoice, InvoiceStatus, Payment
+from app.core.base import Base
+from app.core.config import Settings, settings
+from app.core.money import ZERO, to_money
+from app.doctors.models import Doctor, DoctorAvailability
+from app.labs.models import LabTest
+from app.patients.models import Patient
+from app.pharmacy.models import Medicine, Prescription, StockMovement, StockMovementReason
+import app.audit.models  # noqa: F401  (register remaining tables for --create-tables)
+import app.procedures.models  # noqa: F401
+
+DEFAULT_PASSWORD = "seed-password"
+# Appointments before this are completed history, after it they are upcoming
+TODAY = datetime(2026, 3, 2)
+HISTORY_DAYS = 365
+UPCOMING_DAYS = 60
+CLINIC_HOURS = (8, 20)
+CHUNK_SIZE = 10000
+
+FIRST_NAMES = ("Amara", "Bruno", "Chen", "Dalia", "Emeka", "Freya", "Gustavo", "Hana", "Ivan", "Jun",
+               "Kofi", "Lena", "Mateo", "Nadia", "Omar", "Priya", "Quinn", "Rosa", "Sven", "Tariq",
+               "Uma", "Viktor", "Wanjiru", "Xavier", "Yara", "Zoltan")
+LAST_NAMES = ("Adeyemi", "Novak", "Garcia", "Haddad", "Ivanova", "Kim", "Larsen", "Mensah", "Okafor",
+              "Patel", "Rossi", "Schmidt", "Tanaka", "Usman", "Valdez", "Wong", "Yilmaz", "Zhou",
+              "Brennan", "Costa", "Dubois", "Eriksen", "Fischer", "Gupta")
+SPECIALIZATIONS = ("General", "Cardiology", "Dermatology", "Neurology", "Orthopedics", "Pediatrics")
+LAB_TESTS = (("Complete Blood Count", "Blood Test"), ("Lipid Panel", "Blood Test"), ("HbA1c", "Blood Test"),
+             ("Chest X-Ray", "X-Ray"), ("MRI Brain", "Scan"), ("Urinalysis", "Urine Test"))
+MEDICINES = ("Amoxicillin", "Atorvastatin", "Metformin", "Lisinopril", "Omeprazole", "Paracetamol",
+             "Salbutamol", "Sertraline", "Ibuprofen", "Cetirizine")
+STAFF_ROLES = (UserRole.DOCTOR, UserRole.NURSE, UserRole.PHARMACIST, UserRole.LAB_TECHNICIAN)
+PAYMENT_METHODS = ("Cash", "Card", "UPI", "Insurance")
+
+
+class SeedSpec:
+    """Row counts per hospital."""
+    def __init__(self, patients: int, doctors: int, appointments: int, lab_tests: int,
+                 medicines: int, prescriptions: int, invoices: int, staff: int):
+        self.patients = patients
+        self.doctors = doctors
+        self.appointments = appointments
+        self.lab_tests = lab_tests
+        self.medicines = medicines
+        self.prescriptions = prescriptions
+        self.invoices = invoices
+        self.staff = staff
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+
+def hospital_id(prefix: str, number: int) -> str:
+    return f"{prefix}_H{number:04d}"
+
+
+def admin_email(hospital: str) -> str:
+    return f"admin@{hospital.lower()}.seed"
+
+
+def staff_email(hospital: str, index: int) -> str:
+    return f"staff{index}@{hospital.lower()}.seed"
+
+
+class TableWriter:
+    """Bulk loads dict rows (keyed by column name) into a table on one connection."""
+    def __init__(self, conn: AsyncConnection):
+        self.conn = conn
+        self.copy = conn.dialect.name == "postgresql"
+
+    async def write(self, table: Table, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        if self.copy:
+            # The connection already has an open transaction (the caller's SELECT began it),
+            # so COPY runs inside it
+            raw = (await self.conn.get_raw_connection()).driver_connection
+            columns = list(rows[0])
+            # COPY bypasses SQLAlchemy, so apply custom column types (e.g. Money -> cents) here
+            convert = [
+                table.c[column].type.process_bind_param if isinstance(table.c[column].type, TypeDecorator) else None
+                for column in columns
+            ]
+            dialect = self.conn.dialect
+            await raw.copy_records_to_table(
+                table.name, columns=columns, records=[
+                    tuple(row[column] if process is None else process(row[column], dialect)
+                          for column, process in zip(columns, convert))
+                    for row in rows
+                ]
+            )
+        else:
+            await self.conn.execute(insert(table), rows)
+
+    async def write_all(self, table: Table, rows: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        chunk: List[Dict[str, Any]] = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= CHUNK_SIZE:
+                await self.write(table, chunk)
+                count += len(chunk)
+                chunk = []
+        await self.write(table, chunk)
+        return count + len(chunk)
+
+    async def ids(self, model, hospital: str) -> List[int]:
+        result = await self.conn.execute(select(model.id).where(model.hospital_id == hospital).order_by(model.id))
+        return list(result.scalars())
+
+
+def _patients(rng: random.Random, hospital: str, count: int) -> Iterator[Dict[str, Any]]:
+    for _ in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield {
+            "first_name": first,
+            "last_name": last,
+            "gender": rng.choice(("female", "male")),
+            "date_of_birth": date(1935, 1, 1) + timedelta(days=rng.randrange(32000)),
+            "phone_number": f"+1555{rng.randrange(10_000_000):07d}",
+            "address": f"{rng.randint(1, 999)} {rng.choice(LAST_NAMES)} Street",
+            "emergency_contact_name": f"{rng.choice(FIRST_NAMES)} {last}",
+            "emergency_contact_phone": f"+1555{rng.randrange(10_000_000):07d}",
+            "hospital_id": hospital,
+        }
+
+
+def _appointments(rng: random.Random, hospital: str, spec: SeedSpec,
+                  patient_ids: List[int], doctor_ids: List[int]) -> Iterator[Dict[str, Any]]:
+    """Spread over doctors on a 30-minute grid with no doctor double-booked."""
+    per_day = (CLINIC_HOURS[1] - CLINIC_HOURS[0]) * 2
+    capacity = (HISTORY_DAYS + UPCOMING_DAYS) * per_day
+    first_day = TODAY - timedelta(days=HISTORY_DAYS)
+    remaining = spec.appointments
+    for position, doctor_id in enumerate(doctor_ids):
+        share = min(-(-remaining // (len(doctor_ids) - position)), capacity)
+        remaining -= share
+        for slot in sorted(rng.sample(range(capacity), share)):
+            when = first_day + timedelta(days=slot // per_day, hours=CLINIC_HOURS[0], minutes=30 * (slot % per_day))
+            if when >= TODAY:
+                status = AppointmentStatus.SCHEDULED
+            else:
+                status = rng.choices(
+                    (AppointmentStatus.COMPLETED, AppointmentStatus.CANCELLED, AppointmentStatus.NO_SHOW),
+                    weights=(85, 10, 5),
+                )[0]
+            yield {
+                "patient_id": rng.choice(patient_ids),
+                "doctor_id": doctor_id,
+                "appointment_datetime": when,
+                "reason": rng.choice(("Check-up", "Follow-up", "Consultation", "Test results")),
+                "status": status.value,
+                "notes": None,
+                "hospital_id": hospital,
+            }
+
+
+async def seed_hospital(conn: AsyncConnection, number: int, spec: SeedSpec, seed: int,
+                        prefix: str, password_hash: str) -> Optional[Dict[str, int]]:
+    """Write one hospital inside the caller's transaction. Returns row counts, or None if it already exists."""
+    hospital = hospital_id(prefix, number)
+    existing = await conn.execute(select(User.id).where(User.email == admin_email(hospital)))
+    if existing.first() is not None:
+        return None
+
+    rng = random.Random(f"{seed}:{number}")
+    writer = TableWriter(conn)
+    counts: Dict[str, int] = {}
+
+    counts["users"] = await writer.write_all(User.__table__, (
+        {
+            "email": email,
+            "hashed_password": password_hash,
+            "full_name": name,
+            "is_active": True,
+            "role": role.value,
+            "hospital_id": hospital,
+        }
+        for email, name, role in [
+            (admin_email(hospital), "Seed Admin", UserRole.ADMIN),
+            *[(staff_email(hospital, i), f"Staff {i}", STAFF_ROLES[i % len(STAFF_ROLES)]) for i in range(spec.staff)],
+        ]
+    ))
+
+    counts["patients"] = await writer.write_all(Patient.__table__, _patients(rng, hospital, spec.patients))
+    patient_ids = await writer.ids(Patient, hospital)
+
+    counts["doctors"] = await writer.write_all(Doctor.__table__, (
+        {
+            "full_name": f"Dr. {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "specialization": rng.choice(SPECIALIZATIONS),
+            "license_number": f"{hospital}-L{i:06d}",
+            "hospital_id": hospital,
+        }
+        for i in range(spec.doctors)
+    ))
+    doctor_ids = await writer.ids(Doctor, hospital)
+    await writer.write_all(DoctorAvailability.__table__, (
+        {
+            "doctor_id": doctor_id,
+            "day_of_week": day,
+            "start_time": time(CLINIC_HOURS[0]),
+            "end_time": time(CLINIC_HOURS[1]),
+            "is_available": True,
+            "hospital_id": hospital,
+        }
+        for doctor_id in doctor_ids for day in range(7)
+    ))
+
+    if patient_ids and doctor_ids:
+        counts["appointments"] = await writer.write_all(
+            Appointment.__table__, _appointments(rng, hospital, spec, patient_ids, doctor_ids)
+        )
+        scheduled = await conn.execute(
+            select(Appointment.id, Appointment.doctor_id, Appointment.appointment_datetime)
+            .where(Appointment.hospital_id == hospital)
+            .where(Appointment.status == AppointmentStatus.SCHEDULED.value)
+        )
+        await writer.write_all(AppointmentSlot.__table__, (
+            {"appointment_id": appointment_id, "doctor_id": doctor_id, "slot_start": slot_start, "hospital_id": hospital}
+            for appointment_id, doctor_id, when in scheduled
+            for slot_start in slot_keys(when)
+        ))
+
+        counts["lab_tests"] = await writer.write_all(LabTest.__table__, (
+            {
+                "patient_id": rng.choice(patient_ids),
+                "doctor_id": rng.choice(doctor_ids),
+                "test_name": test_name,
+                "category": category,
+                "test_date": TODAY - timedelta(days=rng.randrange(3 * 365), minutes=rng.randrange(1440)),
+                "result_summary": rng.choice(("Within normal limits", "Mildly elevated", "Follow-up advised")),
+                "report_url": None,
+                "status": "completed",
+                "hospital_id": hospital,
+            }
+            for test_name, category in (rng.choice(LAB_TESTS) for _ in range(spec.lab_tests))
+        ))
+
+    counts["medicines"] = await writer.write_all(Medicine.__table__, (
+        {
+            "name": f"{MEDICINES[i % len(MEDICINES)]} {10 * (1 + i // len(MEDICINES))}mg",
+            "manufacturer": rng.choice(("Acme Pharma", "Medico Labs", "Generic Co")),
+            "batch_number": f"B{rng.randrange(1_000_000):06d}",
+            "expiry_date": TODAY.date() + timedelta(days=rng.randint(30, 900)),
+            "quantity": rng.randint(100, 10000),
+            "unit_price": round(rng.uniform(0.5, 80.0), 2),
+            "description": None,
+            "hospital_id": hospital,
+            # COPY skips Python-side defaults; the alert sweep range-scans this column
+            "updated_at": TODAY,
+        }
+        for i in range(spec.medicines)
+    ))
+    medicine_ids = await writer.ids(Medicine, hospital)
+    # Opening balance of each medicine, so its stock ledger sums to its quantity
+    stock = await conn.execute(
+        select(Medicine.id, Medicine.quantity).where(Medicine.hospital_id == hospital).order_by(Medicine.id)
+    )
+    await writer.write_all(StockMovement.__table__, (
+        {
+            "medicine_id": medicine_id,
+            "change": quantity,
+            "quantity_after": quantity,
+            "reason": StockMovementReason.RECEIVED.value,
+            "prescription_id": None,
+            "user_id": None,
+            "created_at": TODAY,
+            "hospital_id": hospital,
+        }
+        for medicine_id, quantity in stock.all()
+    ))
+
+    if patient_ids and doctor_ids and medicine_ids:
+        counts["prescriptions"] = await writer.write_all(Prescription.__table__, (
+            {
+                "patient_id": rng.choice(patient_ids),
+                "doctor_id": rng.choice(doctor_ids),
+                "medicine_id": rng.choice(medicine_ids),
+                "dosage": rng.choice(("1 tablet", "2 tablets", "5 ml")),
+                "frequency": rng.choice(("Once a day", "Twice a day", "Every 8 hours")),
+                "duration": rng.choice(("5 days", "7 days", "30 days")),
+                "instructions": None,
+                "prescribed_date": TODAY - timedelta(days=rng.randrange(365)),
+                "status": rng.choices(("active", "completed", "cancelled"), weights=(60, 35, 5))[0],
+                "hospital_id": hospital,
+            }
+            for _ in range(spec.prescriptions)
+        ))
+
+    # Invoices for a sample of completed visits, and payments for the settled ones
+    completed = (await conn.execute(
+        select(Appointment.id, Appointment.patient_id, Appointment.appointment_datetime)
+        .where(Appointment.hospital_id == hospital)
+        .where(Appointment.status == AppointmentStatus.COMPLETED.value)
+        .order_by(Appointment.id)
+    )).all()
+    billed = sorted(rng.sample(range(len(completed)), min(spec.invoices, len(completed))))
+
+    def invoices() -> Iterator[Dict[str, Any]]:
+        for index in billed:
+            appointment_id, patient_id, when = completed[index]
+            total = to_money(rng.uniform(20, 500))
+            tax = to_money(total * to_money(0.05))
+            discount = to_money(total * to_money(rng.choice((0, 0, 0.1))))
+            final = total + tax - discount
+            status = rng.choices((InvoiceStatus.PAID, InvoiceStatus.UNPAID), weights=(80, 20))[0]
+            yield {
+                "patient_id": patient_id,
+                "appointment_id": appointment_id,
+                "total_amount": total,
+                "tax_amount": tax,
+                "discount_amount": discount,
+                "final_amount": final,
+                "amount_paid": final if status == InvoiceStatus.PAID else ZERO,
+                "status": status.value,
+                "created_at": when,
+                "due_date": when + timedelta(days=30),
+                "hospital_id": hospital,
+            }
+
+    counts["invoices"] = await writer.write_all(Invoice.__table__, invoices())
+    paid = await conn.execute(
+        select(Invoice.id, Invoice.final_amount, Invoice.created_at)
+        .where(Invoice.hospital_id == hospital)
+        .where(Invoice.status == InvoiceStatus.PAID.value)
+        .order_by(Invoice.id)
+    )
+    counts["payments"] = await writer.write_all(Payment.__table__, (
+        {
+            "invoice_id": invoice_id,
+            "amount": amount,
+            "payment_method": rng.choice(PAYMENT_METHODS),
+            "transaction_id": f"{hospital}-T{invoice_id}",
+            "payment_date": created_at + timedelta(days=rng.randrange(30)),
+            "notes": None,
+            "hospital_id": hospital,
+        }
+        for invoice_id, amount, created_at in paid
+    ))
+    return counts
+
+
+def _engine(database_url: str):
+    url = Settings(DATABASE_URL=database_url).async_database_url
+    connect_args = {"timeout": settings.DB_SQLITE_BUSY_TIMEOUT} if url.startswith("sqlite") else {}
+    return create_async_engine(url, connect_args=connect_args)
+
+
+async def _seed_hospitals(database_url: str, numbers: List[int], spec: SeedSpec, seed: int,
+                          prefix: str, password_hash: str) -> None:
+    engine = _engine(database_url)
+    try:
+        for number in numbers:
+            started = timer.perf_counter()
+            async with engine.begin() as conn:
+                counts = await seed_hospital(conn, number, spec, seed, prefix, password_hash)
+            hospital = hospital_id(prefix, number)
+            if counts is None:
+                print(f"{hospital}: already seeded, skipped", flush=True)
+            else:
+                rows = sum(counts.values())
+                elapsed = timer.perf_counter() - started
+                print(f"{hospital}: {rows} rows in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)", flush=True)
+    finally:
+        await engine.dispose()
+
+
+def _worker(database_url: str, numbers: List[int], spec: SeedSpec, seed: int, prefix: str, password_hash: str) -> None:
+    asyncio.run(_seed_hospitals(database_url, numbers, spec, seed, prefix, password_hash))
+
+
+async def _create_tables(database_url: str) -> None:
+    engine = _engine(database_url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hospitals", type=int, default=10)
+    parser.add_argument("--patients", type=int, default=100000, help="per hospital, like the counts below")
+    parser.add_argument("--doctors", type=int, default=100)
+    parser.add_argument("--appointments", type=int, default=300000)
+    parser.add_argument("--lab-tests", type=int, default=200000)
+    parser.add_argument("--medicines", type=int, default=300)
+    parser.add_argument("--prescriptions", type=int, default=100000)
+    parser.add_argument("--invoices", type=int, default=100000)
+    parser.add_argument("--staff", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--prefix", default="SEED", help="hospital ids are <prefix>_H0001, ...")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--create-tables", action="store_true", help="create missing tables first (instead of migrations)")
+    args = parser.parse_args()
+
+    spec = SeedSpec(
+        patients=args.patients, doctors=args.doctors, appointments=args.appointments,
+        lab_tests=args.lab_tests, medicines=args.medicines, prescriptions=args.prescriptions,
+        invoices=args.invoices, staff=args.staff,
+    )
+    if args.create_tables:
+        asyncio.run(_create_tables(args.database_url))
+
+    workers = max(1, min(args.workers, args.hospitals))
+    if args.database_url.startswith("sqlite"):
+        workers = 1
+    password_hash = get_password_hash(args.password)
+    numbers = list(range(1, args.hospitals + 1))
+    started = timer.perf_counter()
+    if workers == 1:
+        _worker(args.database_url, numbers, spec, args.seed, args.prefix, password_hash)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_worker, args.database_url, numbers[offset::workers], spec, args.seed, args.prefix, password_hash)
+                for offset in range(workers)
+            ]
+            for future in futures:
+                future.result()
+    print(f"done in {timer.perf_counter() - started:.1f}s with {workers} worker(s)")
+
+
+if __name__ == "__main__":
+    main()
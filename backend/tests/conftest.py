@@ -1,5 +1,6 @@
 import pytest
 import asyncio
+from contextlib import contextmanager
 from typing import Generator, AsyncGenerator
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
@@ -7,6 +8,7 @@ from sqlalchemy.orm import sessionmaker
 from app.main import app
 from app.core.base import Base
 from app.core.config import settings
+from app.core.query_stats import capture_statements
 
 # Import all models to ensure they are registered for Base.metadata.create_all
 from app.auth.models import User
@@ -22,7 +24,7 @@ from app.billing.models import Invoice, Payment
 # Test database URL (local SQLite for tests)
 TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
 
-engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+engine = create_async_engine(TEST_DATABASE_URL, echo=False, connect_args={"timeout": settings.DB_SQLITE_BUSY_TIMEOUT})
 AsyncSessionLocal = sessionmaker(
     bind=engine,
     class_=AsyncSession,
@@ -59,3 +61,38 @@ async def client() -> AsyncGenerator[AsyncClient, None]:
             yield ac
         
         app.dependency_overrides.clear()
+
+@pytest.fixture
+def session_factory():
+    return AsyncSessionLocal
+
+@pytest.fixture
+async def concurrent_client(session_factory):
+    """Client whose requests each get their own session, so they really run concurrently."""
+    from app.core.database import get_db
+
+    async def per_request_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = per_request_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+    app.dependency_overrides.clear()
+
+@pytest.fixture
+def query_budget():
+    """
+    `with query_budget(n) as statements:` fails the test when the block sends more
+    than n SQL statements; `statements` holds their SQL for finer assertions.
+    """
+    @contextmanager
+    def budget(max_statements: int):
+        with capture_statements() as statements:
+            yield statements
+        if len(statements) > max_statements:
+            pytest.fail(
+                f"{len(statements)} SQL statements issued, budget is {max_statements}:\n" + "\n".join(statements),
+                pytrace=False,
+            )
+    return budget
@@ -0,0 +1,255 @@
+import asyncio
+import json
+import time
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete, select
+from app.core import config
+from app.appointments.booking import CONFLICT_WINDOW, UNAVAILABLE_DETAIL, slot_keys, validate_booking
+from app.appointments.models import Appointment, AppointmentSlot
+from app.doctors.models import DoctorAvailability
+from datetime import datetime, timedelta, timezone
+
+API = config.settings.API_V1_STR
+
+
+@pytest.fixture
+async def booking_headers(client: AsyncClient, request) -> dict:
+    tenant = f"HOSP_BOOK_{request.node.name}"
+    email = f"admin@{request.node.name}.booking.com".replace("_", "-")
+    await client.post(
+        f"{API}/auth/register",
+        json={"email": email, "password": "password", "full_name": "Booking Admin", "role": "admin", "hospital_id": tenant}
+    )
+    login = await client.post(f"{API}/auth/login", data={"username": email, "password": "password"})
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+async def _doctor_with_monday_hours(client: AsyncClient, headers: dict) -> int:
+    doctor = await client.post(f"{API}/doctors/", json={"full_name": "Dr. Slot", "specialization": "General"}, headers=headers)
+    doctor_id = doctor.json()["id"]
+    await client.post(
+        f"{API}/doctors/{doctor_id}/availability",
+        json={"day_of_week": 0, "start_time": "09:00:00", "end_time": "17:00:00"},
+        headers=headers
+    )
+    return doctor_id
+
+
+def _next_monday(hour: int, minute: int = 0) -> datetime:
+    today = datetime.now()
+    return (today + timedelta(days=7 - today.weekday())).replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+@pytest.mark.anyio
+async def test_booking_reports_every_failed_check(client: AsyncClient, booking_headers: dict):
+    doctor_id = await _doctor_with_monday_hours(client, booking_headers)
+
+    res = await client.post(
+        f"{API}/appointments/",
+        json={"patient_id": 999999, "doctor_id": doctor_id, "appointment_datetime": _next_monday(20).isoformat()},
+        headers=booking_headers
+    )
+    assert res.status_code == 404
+    assert "Patient not found" in res.json()["detail"]
+    assert "not available" in res.json()["detail"]
+
+
+@pytest.mark.anyio
+async def test_concurrent_bookings_never_double_book(concurrent_client: AsyncClient, session_factory):
+    client = concurrent_client
+    email = "admin@stress.booking.com"
+    await client.post(
+        f"{API}/auth/register",
+        json={"email": email, "password": "password", "full_name": "Stress Admin", "role": "admin", "hospital_id": "HOSP_BOOK_STRESS"}
+    )
+    login = await client.post(f"{API}/auth/login", data={"username": email, "password": "password"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    patient = await client.post(f"{API}/patients/", json={"first_name": "Race", "last_name": "Condition"}, headers=headers)
+    patient_id = patient.json()["id"]
+    contended_doctor = await _doctor_with_monday_hours(client, headers)
+    free_doctors = [await _doctor_with_monday_hours(client, headers) for _ in range(10)]
+
+    def book(doctor_id: int, when: datetime):
+        return client.post(
+            f"{API}/appointments/",
+            json={"patient_id": patient_id, "doctor_id": doctor_id, "appointment_datetime": when.isoformat()},
+            headers=headers
+        )
+
+    # 200 bookings fighting over 40 overlapping start times (every 5 minutes from 10:00)
+    base = _next_monday(10)
+    contended = [book(contended_doctor, base + timedelta(minutes=5 * (i % 40))) for i in range(200)]
+    # 100 bookings that never overlap: ten doctors, ten back-to-back slots each
+    uncontended = [
+        book(doctor_id, _next_monday(9) + timedelta(minutes=30 * i))
+        for doctor_id in free_doctors for i in range(10)
+    ]
+    started = time.perf_counter()
+    responses = await asyncio.gather(*contended, *uncontended)
+    elapsed = time.perf_counter() - started
+    print(f"\n{len(responses)} concurrent booking requests in {elapsed:.2f}s: "
+          f"{len(responses) / elapsed:.0f} requests/s, {sum(r.status_code == 200 for r in responses) / elapsed:.0f} bookings/s")
+
+    contended_codes = [r.status_code for r in responses[:200]]
+    assert set(contended_codes) <= {200, 409}
+    assert all(r.status_code == 200 for r in responses[200:])
+
+    async with session_factory() as db:
+        booked = (await db.execute(
+            select(Appointment.appointment_datetime)
+            .where(Appointment.doctor_id == contended_doctor)
+            .order_by(Appointment.appointment_datetime)
+        )).scalars().all()
+        slots = (await db.execute(
+            select(AppointmentSlot).where(AppointmentSlot.doctor_id == contended_doctor)
+        )).scalars().all()
+    assert len(booked) == contended_codes.count(200) > 0
+    assert all(later - earlier >= timedelta(minutes=30) for earlier, later in zip(booked, booked[1:]))
+    assert len(slots) == 6 * len(booked)
+
+
+@pytest.mark.anyio
+async def test_cancelling_frees_the_slot(client: AsyncClient, booking_headers: dict):
+    doctor_id = await _doctor_with_monday_hours(client, booking_headers)
+    patient = await client.post(f"{API}/patients/", json={"first_name": "Slot", "last_name": "Freed"}, headers=booking_headers)
+    booking = {"patient_id": patient.json()["id"], "doctor_id": doctor_id, "appointment_datetime": _next_monday(11).isoformat()}
+
+    first = await client.post(f"{API}/appointments/", json=booking, headers=booking_headers)
+    assert first.status_code == 200
+    assert (await client.post(f"{API}/appointments/", json=booking, headers=booking_headers)).status_code == 409
+
+    await client.put(f"{API}/appointments/{first.json()['id']}", json={"status": "cancelled"}, headers=booking_headers)
+    assert (await client.post(f"{API}/appointments/", json=booking, headers=booking_headers)).status_code == 200
+
+    # Rescheduling is validated like a new booking, ignoring the appointment's own slot
+    second = (await client.post(f"{API}/appointments/", json={**booking, "appointment_datetime": _next_monday(12).isoformat()}, headers=booking_headers)).json()
+    reschedule = f"{API}/appointments/{second['id']}"
+    assert (await client.put(reschedule, json={"appointment_datetime": _next_monday(12, 15).isoformat()}, headers=booking_headers)).status_code == 200
+    assert (await client.put(reschedule, json={"appointment_datetime": _next_monday(11, 15).isoformat()}, headers=booking_headers)).status_code == 409
+    assert (await client.put(reschedule, json={"appointment_datetime": _next_monday(18).isoformat()}, headers=booking_headers)).status_code == 400
+    assert (await client.put(f"{API}/appointments/{first.json()['id']}", json={"status": "scheduled"}, headers=booking_headers)).status_code == 409
+
+    off_grid = {**booking, "appointment_datetime": _next_monday(11, 7).isoformat()}
+    assert (await client.post(f"{API}/appointments/", json=off_grid, headers=booking_headers)).status_code == 422
+
+
+@pytest.mark.anyio
+async def test_schedule_index_tracks_bookings_and_availability(client: AsyncClient, booking_headers: dict, session_factory):
+    from app.doctors.schedule import ScheduleIndex, schedule_index
+
+    doctor_id = await _doctor_with_monday_hours(client, booking_headers)
+    patient = await client.post(f"{API}/patients/", json={"first_name": "Index", "last_name": "Probe"}, headers=booking_headers)
+    ten = _next_monday(10)
+    booked = await client.post(
+        f"{API}/appointments/",
+        json={"patient_id": patient.json()["id"], "doctor_id": doctor_id, "appointment_datetime": ten.isoformat()},
+        headers=booking_headers
+    )
+
+    async with session_factory() as db:
+        assert await schedule_index.check(db, doctor_id, ten) == (True, True)
+        assert await schedule_index.check(db, doctor_id, ten + timedelta(minutes=25)) == (True, True)
+        assert await schedule_index.check(db, doctor_id, ten + timedelta(minutes=30)) == (True, False)
+        assert await schedule_index.check(db, doctor_id, _next_monday(8)) == (False, False)
+        misses = schedule_index.local.misses
+
+        # Cancelling clears the bits in place; the day is not rebuilt
+        await client.put(f"{API}/appointments/{booked.json()['id']}", json={"status": "cancelled"}, headers=booking_headers)
+        assert await schedule_index.check(db, doctor_id, ten) == (True, False)
+        assert schedule_index.local.misses == misses
+
+        # New availability retires every cached day of the doctor
+        await client.post(
+            f"{API}/doctors/{doctor_id}/availability",
+            json={"day_of_week": 0, "start_time": "07:00:00", "end_time": "09:00:00"},
+            headers=booking_headers
+        )
+        assert await schedule_index.check(db, doctor_id, _next_monday(8)) == (True, False)
+
+        # Another replica's index picks up a booking through its invalidation message
+        replica = ScheduleIndex(maxsize=100, ttl=60)
+        assert await replica.check(db, doctor_id, ten) == (True, False)
+        await client.post(
+            f"{API}/appointments/",
+            json={"patient_id": patient.json()["id"], "doctor_id": doctor_id, "appointment_datetime": ten.isoformat()},
+            headers=booking_headers
+        )
+        assert await replica.check(db, doctor_id, ten) == (True, False)  # stale until told
+        replica.apply_remote({"doctor_id": doctor_id, "day": ten.date().isoformat(), "origin": schedule_index.replica_id})
+        assert await replica.check(db, doctor_id, ten) == (True, True)
+
+        # A replica that missed an availability change still cannot accept a booking outside the hours
+        await db.execute(delete(DoctorAvailability).where(DoctorAvailability.doctor_id == doctor_id))
+        assert (await replica.check(db, doctor_id, ten + timedelta(hours=1)))[0]
+        errors = await validate_booking(db, "HOSP_BOOK_test_schedule_index_tracks_bookings_and_availability",
+                                        patient.json()["id"], doctor_id, ten + timedelta(hours=1), schedule=replica)
+        assert errors == [(400, UNAVAILABLE_DETAIL)]
+        await db.rollback()
+
+
+def test_slot_keys_agree_with_conflict_window():
+    legacy = datetime(2026, 3, 2, 10, 2)
+    keys = set(slot_keys(legacy))
+    for minutes in range(-60, 65, 5):
+        booking = datetime(2026, 3, 2, 10) + timedelta(minutes=minutes)
+        overlaps = abs(booking - legacy) < CONFLICT_WINDOW
+        assert overlaps == bool(keys & set(slot_keys(booking)))
+
+
+@pytest.mark.anyio
+async def test_bulk_booking_batch_recurrence_and_stream(client: AsyncClient, booking_headers: dict):
+    doctor_id = await _doctor_with_monday_hours(client, booking_headers)
+    patient = await client.post(f"{API}/patients/", json={"first_name": "Bulk", "last_name": "Batch"}, headers=booking_headers)
+    patient_id = patient.json()["id"]
+    monday = _next_monday(9)
+
+    def entry(when: datetime, **overrides) -> dict:
+        return {"patient_id": patient_id, "doctor_id": doctor_id, "appointment_datetime": when.isoformat(), **overrides}
+
+    res = await client.post(f"{API}/appointments/bulk", json={"items": [
+        entry(monday),
+        entry(monday + timedelta(minutes=15)),           # overlaps the first entry
+        entry(monday + timedelta(minutes=30)),
+        entry(monday + timedelta(days=1)),               # Tuesday: no availability
+        entry(monday + timedelta(hours=1), patient_id=999999),
+    ]}, headers=booking_headers)
+    assert res.status_code == 200
+    body = res.json()
+    assert (body["created"], body["rejected"]) == (2, 3)
+    assert [r["status"] for r in body["results"]] == ["created", "rejected", "created", "rejected", "rejected"]
+    assert body["results"][1]["errors"] == ["Doctor has a conflicting appointment"]
+    assert body["results"][3]["errors"] == ["Doctor is not available at the requested time"]
+    assert body["results"][4]["errors"] == ["Patient not found"]
+
+    # Single bookings see the slots claimed by the batch
+    single = await client.post(f"{API}/appointments/", json=entry(monday + timedelta(minutes=5)), headers=booking_headers)
+    assert single.status_code == 409
+
+    # All-or-nothing: one bad entry and nothing is written
+    res = await client.post(f"{API}/appointments/bulk", json={"all_or_nothing": True, "items": [
+        entry(monday + timedelta(hours=2)), entry(monday + timedelta(minutes=30)),
+    ]}, headers=booking_headers)
+    assert res.json()["created"] == 0
+    assert res.json()["results"][0]["errors"][0].startswith("Not booked")
+
+    # Weekly series on Mondays at 15:00 for four weeks, streamed as NDJSON
+    rule = {"patient_id": patient_id, "doctor_id": doctor_id, "start": _next_monday(15).isoformat(), "frequency": "weekly", "count": 4}
+    res = await client.post(f"{API}/appointments/bulk", params={"stream": "true"}, json={"recurrence": rule}, headers=booking_headers)
+    assert res.status_code == 200
+    events = [json.loads(line) for line in res.text.splitlines()]
+    assert [e["event"] for e in events] == ["validated", "inserted", "done"]
+    assert events[-1]["created"] == 4
+    dates = [r["appointment_datetime"][:10] for r in events[-1]["results"]]
+    assert dates == [(_next_monday(15) + timedelta(weeks=i)).date().isoformat() for i in range(4)]
+
+    audit = await client.get(f"{API}/audit/", params={"action": "BULK_CREATE_APPOINTMENTS"}, headers=booking_headers)
+    assert [e["details"]["created"] for e in audit.json()] == [4, 2]
+
+    # An offset time is stored as naive UTC by both endpoints: 16:00+05:30 is Monday 10:30
+    offset = (monday + timedelta(hours=7)).replace(tzinfo=timezone(timedelta(hours=5, minutes=30))).isoformat()
+    single = await client.post(f"{API}/appointments/", json={**entry(monday), "appointment_datetime": offset}, headers=booking_headers)
+    assert single.status_code == 200
+    assert single.json()["appointment_datetime"] == (monday + timedelta(hours=1, minutes=30)).isoformat()
+    res = await client.post(f"{API}/appointments/bulk", json={"items": [{**entry(monday), "appointment_datetime": offset}]}, headers=booking_headers)
+    assert res.json()["results"][0]["errors"] == ["Doctor has a conflicting appointment"]
@@ -0,0 +1,189 @@
+import pytest
+from datetime import datetime, timezone
+from sqlalchemy import select, func
+from app.audit.models import AuditLog
+from app.core import audit as audit_module
+from app.core.audit_writer import AuditWriter
+
+def _event(event_id: str, hospital_id: str = "HOSP_AUDIT") -> dict:
+    return {
+        "event_id": event_id,
+        "user_id": "1",
+        "hospital_id": hospital_id,
+        "action": "CREATE_PATIENT",
+        "resource_type": "Patient",
+        "resource_id": None,
+        "details": {"first_name": "Batch"},
+        "ip_address": None,
+        "timestamp": datetime.now(timezone.utc),
+    }
+
+async def _count(session_factory, hospital_id: str) -> int:
+    async with session_factory() as session:
+        result = await session.execute(
+            select(func.count()).select_from(AuditLog).where(AuditLog.hospital_id == hospital_id)
+        )
+        return result.scalar_one()
+
+@pytest.mark.anyio
+async def test_audit_writer_batches_and_truncates_spool(session_factory, tmp_path):
+    spool = tmp_path / "audit.jsonl"
+    writer = AuditWriter(session_factory, str(spool), batch_size=2)
+    for i in range(5):
+        writer.submit(_event(f"batch-{i}", "HOSP_AUDIT_BATCH"))
+    await writer.spooled()
+    assert len(spool.read_text().splitlines()) == 5
+
+    await writer.flush()
+    assert await _count(session_factory, "HOSP_AUDIT_BATCH") == 5
+    assert spool.read_text() == ""
+
+@pytest.mark.anyio
+async def test_audit_writer_replays_spool_idempotently(session_factory, tmp_path):
+    spool = tmp_path / "audit.jsonl"
+    # Queue of one: the rest only reach the spool, as if the process crashed before writing them
+    crashed = AuditWriter(session_factory, str(spool), queue_size=1)
+    for i in range(4):
+        crashed.submit(_event(f"replay-{i}", "HOSP_AUDIT_REPLAY"))
+    await crashed.spooled()
+    await crashed._write_batch(crashed._drain_queue())
+    assert await _count(session_factory, "HOSP_AUDIT_REPLAY") == 1
+
+    restarted = AuditWriter(session_factory, str(spool))
+    assert await restarted.recover() == 4
+    assert await _count(session_factory, "HOSP_AUDIT_REPLAY") == 4
+    assert await restarted.recover() == 0
+
+@pytest.mark.anyio
+async def test_async_mode_keeps_strict_actions_in_transaction(session_factory, tmp_path, monkeypatch):
+    writer = AuditWriter(session_factory, str(tmp_path / "audit.jsonl"))
+    monkeypatch.setattr(audit_module.settings, "AUDIT_MODE", "async")
+    monkeypatch.setattr(audit_module, "get_audit_writer", lambda: writer)
+
+    async with session_factory() as session:
+        await audit_module.log_audit_event(session, "1", "CREATE_PATIENT", hospital_id="HOSP_AUDIT_MODE")
+        await audit_module.log_audit_event(session, "1", "DISPENSE_MEDICINE", hospital_id="HOSP_AUDIT_MODE")
+        await audit_module.log_audit_event(session, "1", "UPDATE_PATIENT", hospital_id="HOSP_AUDIT_MODE", strict=True)
+        assert len(session.new) == 2
+        await session.commit()
+
+    assert writer.queue.qsize() == 1
+    await writer.flush()
+    assert await _count(session_factory, "HOSP_AUDIT_MODE") == 3
+
+@pytest.mark.anyio
+async def test_async_mode_drops_events_of_rolled_back_transactions(session_factory, tmp_path, monkeypatch):
+    writer = AuditWriter(session_factory, str(tmp_path / "audit.jsonl"))
+    monkeypatch.setattr(audit_module.settings, "AUDIT_MODE", "async")
+    monkeypatch.setattr(audit_module, "get_audit_writer", lambda: writer)
+
+    async with session_factory() as session:
+        await session.execute(select(func.count()).select_from(AuditLog))
+        await audit_module.log_audit_event(session, "1", "CREATE_PATIENT", hospital_id="HOSP_AUDIT_ROLLBACK")
+        await session.rollback()
+        await session.commit()
+    assert writer.queue.qsize() == 0
+
+@pytest.mark.anyio
+async def test_audit_replay_keeps_events_spooled_during_the_write(session_factory, tmp_path):
+    spool = tmp_path / "audit.jsonl"
+    writer = AuditWriter(session_factory, str(spool), queue_size=1)
+    writer.submit(_event("late-0", "HOSP_AUDIT_LATE"))
+    writer.submit(_event("late-1", "HOSP_AUDIT_LATE"))
+    write_batch = writer._write_batch
+
+    async def slow_write(events):
+        # Queue is still full: this event only lives in the spool
+        writer.submit(_event(f"late-{len(events) + 1}", "HOSP_AUDIT_LATE"))
+        await writer.spooled()
+        await write_batch(events)
+
+    writer._write_batch = slow_write
+    assert await writer.recover() == 2
+    writer._write_batch = write_batch
+    await writer.flush()
+    assert await _count(session_factory, "HOSP_AUDIT_LATE") == 3
+
+@pytest.mark.anyio
+async def test_audit_query_spans_rolled_periods(client, session_factory, tmp_path):
+    from sqlalchemy import insert
+    from app.core import config
+    from app.audit import partitions
+    from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor_payload
+
+    await client.post(
+        f"{config.settings.API_V1_STR}/auth/register",
+        json={"email": "auditor@hosp-audit.com", "password": "password", "full_name": "Auditor", "role": "admin", "hospital_id": "HOSP_AUDIT_RANGE"}
+    )
+    login = await client.post(
+        f"{config.settings.API_V1_STR}/auth/login",
+        data={"username": "auditor@hosp-audit.com", "password": "password"}
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    now = datetime.utcnow()
+    current = partitions.month_start(now)
+    months = [partitions.previous_month(partitions.previous_month(current)), partitions.previous_month(current), current]
+    async with session_factory() as session:
+        await session.execute(insert(AuditLog), [
+            {
+                "hospital_id": "HOSP_AUDIT_RANGE",
+                "user_id": "7",
+                "action": "VIEW_PATIENT" if day % 2 else "UPDATE_PATIENT",
+                "resource_type": "Patient",
+                "timestamp": datetime(month.year, month.month, day + 1, 12, 0),
+            }
+            for month in months for day in range(3)
+        ])
+        await session.commit()
+
+    async with session_factory() as session:
+        conn = await session.connection()
+        rolled = await partitions.roll_closed_periods(conn, now)
+        await session.commit()
+    assert rolled == [partitions.period_name(months[0]), partitions.period_name(months[1])]
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 4, "resource_type": "Patient", "start": datetime.combine(months[0], datetime.min.time()).isoformat()}
+        if cursor:
+            params["cursor"] = cursor
+        res = await client.get(f"{config.settings.API_V1_STR}/audit/", params=params, headers=headers)
+        assert res.status_code == 200
+        seen.extend(res.json())
+        cursor = res.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+    timestamps = [row["timestamp"] for row in seen]
+    assert len(seen) == 9
+    assert timestamps == sorted(timestamps, reverse=True)
+
+    # Cursors not issued by this endpoint are rejected, not a server error
+    for payload in ({"id": 1}, {"id": 1, "ts": "x"}, {"id": 1, "ts": 5}):
+        res = await client.get(
+            f"{config.settings.API_V1_STR}/audit/", params={"cursor": encode_cursor_payload(payload)}, headers=headers
+        )
+        assert res.status_code == 400
+
+    # Window restricted to the middle month only reads that period
+    res = await client.get(
+        f"{config.settings.API_V1_STR}/audit/",
+        params={
+            "start": datetime.combine(months[1], datetime.min.time()).isoformat(),
+            "end": datetime.combine(months[2], datetime.min.time()).isoformat(),
+            "action": "VIEW_PATIENT",
+        },
+        headers=headers
+    )
+    assert [row["timestamp"][:10] for row in res.json()] == [f"{months[1].isoformat()[:8]}02"]
+
+    # Retention: archive and drop the oldest period
+    async with session_factory() as session:
+        conn = await session.connection()
+        dropped = await partitions.drop_periods_before(conn, months[1], archive_dir=str(tmp_path))
+        assert dropped == [partitions.period_name(months[0])]
+        assert (tmp_path / f"{partitions.period_name(months[0])}.ndjson.gz").exists()
+        # Clean up the remaining period table so later test sessions start fresh
+        await partitions.drop_periods_before(conn, partitions.next_month(current))
+        await session.commit()
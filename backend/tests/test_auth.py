@@ -45,3 +45,132 @@ async def test_login_user(client: AsyncClient):
     data = response.json()
     assert "access_token" in data
     assert data["token_type"] == "bearer"
+
+@pytest.mark.anyio
+async def test_token_decoded_once_per_request(client: AsyncClient, monkeypatch):
+    from app.auth import security
+
+    await client.post(
+        f"{config.settings.API_V1_STR}/auth/register",
+        json={
+            "email": "decode-once@hospital.com",
+            "password": "password123",
+            "full_name": "Decode Once",
+            "role": "admin",
+            "hospital_id": "HOSP1"
+        }
+    )
+    login = await client.post(
+        f"{config.settings.API_V1_STR}/auth/login",
+        data={"username": "decode-once@hospital.com", "password": "password123"}
+    )
+    token = login.json()["access_token"]
+
+    calls = []
+    original_decode = security.jwt.decode
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return original_decode(*args, **kwargs)
+    monkeypatch.setattr(security.jwt, "decode", counting_decode)
+
+    response = await client.get(
+        f"{config.settings.API_V1_STR}/auth/me",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    assert response.json()["email"] == "decode-once@hospital.com"
+    assert len(calls) == 1
+
+    response = await client.get(
+        f"{config.settings.API_V1_STR}/auth/me",
+        headers={"Authorization": "Bearer not-a-jwt"}
+    )
+    assert response.status_code == 401
+
+@pytest.mark.anyio
+async def test_principal_cache_invalidated_on_role_change(client: AsyncClient):
+    from app.auth.cache import principal_cache
+
+    for email, role in (("cache-admin@hospital.com", "admin"), ("cache-nurse@hospital.com", "nurse")):
+        await client.post(
+            f"{config.settings.API_V1_STR}/auth/register",
+            json={"email": email, "password": "password123", "full_name": email, "role": role, "hospital_id": "HOSP_CACHE"}
+        )
+    tokens = {}
+    for email in ("cache-admin@hospital.com", "cache-nurse@hospital.com"):
+        login = await client.post(
+            f"{config.settings.API_V1_STR}/auth/login",
+            data={"username": email, "password": "password123"}
+        )
+        tokens[email] = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    me = await client.get(f"{config.settings.API_V1_STR}/auth/me", headers=tokens["cache-nurse@hospital.com"])
+    assert me.json()["role"] == "nurse"
+    hits_before = principal_cache.local.hits
+    me = await client.get(f"{config.settings.API_V1_STR}/auth/me", headers=tokens["cache-nurse@hospital.com"])
+    assert me.json()["role"] == "nurse"
+    assert principal_cache.local.hits == hits_before + 1
+
+    # Non-admins cannot change roles
+    res = await client.put(
+        f"{config.settings.API_V1_STR}/auth/users/{me.json()['id']}",
+        json={"role": "admin"},
+        headers=tokens["cache-nurse@hospital.com"]
+    )
+    assert res.status_code == 403
+
+    res = await client.put(
+        f"{config.settings.API_V1_STR}/auth/users/{me.json()['id']}",
+        json={"role": "pharmacist"},
+        headers=tokens["cache-admin@hospital.com"]
+    )
+    assert res.status_code == 200
+    me = await client.get(f"{config.settings.API_V1_STR}/auth/me", headers=tokens["cache-nurse@hospital.com"])
+    assert me.json()["role"] == "pharmacist"
+
+    res = await client.put(
+        f"{config.settings.API_V1_STR}/auth/users/{me.json()['id']}",
+        json={"role": "superuser"},
+        headers=tokens["cache-admin@hospital.com"]
+    )
+    assert res.status_code == 422
+
+    # Deactivation revokes the tokens already issued, cached or not
+    res = await client.put(
+        f"{config.settings.API_V1_STR}/auth/users/{me.json()['id']}",
+        json={"is_active": False},
+        headers=tokens["cache-admin@hospital.com"]
+    )
+    assert res.status_code == 200
+    for _ in range(2):
+        me = await client.get(f"{config.settings.API_V1_STR}/auth/me", headers=tokens["cache-nurse@hospital.com"])
+        assert me.status_code == 401
+
+@pytest.mark.anyio
+async def test_login_returns_503_when_password_pool_saturated(client: AsyncClient, monkeypatch):
+    await client.post(
+        f"{config.settings.API_V1_STR}/auth/register",
+        json={
+            "email": "busy@hospital.com",
+            "password": "password123",
+            "full_name": "Busy User",
+            "role": "nurse",
+            "hospital_id": "HOSP1"
+        }
+    )
+    monkeypatch.setattr(config.settings, "PASSWORD_HASH_MAX_PENDING", 0)
+    response = await client.post(
+        f"{config.settings.API_V1_STR}/auth/login",
+        data={"username": "busy@hospital.com", "password": "password123"}
+    )
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+    monkeypatch.undo()
+    response = await client.post(
+        f"{config.settings.API_V1_STR}/auth/login",
+        data={"username": "busy@hospital.com", "password": "password123"}
+    )
+    assert response.status_code == 200
+    metrics = await client.get("/metrics")
+    assert 'hmtp_auth_login_seconds_count{outcome="busy"}' in metrics.text
@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from httpx import AsyncClient
 from app.core import config
@@ -77,3 +78,47 @@ async def test_create_medicine_and_billing(client: AsyncClient, auth_headers: di
     )
     assert get_invoice_resp.status_code == 200
     assert get_invoice_resp.json()[0]["status"] == "paid"
+
+@pytest.mark.anyio
+async def test_payments_maintain_balance_and_status(concurrent_client: AsyncClient):
+    client, api = concurrent_client, config.settings.API_V1_STR
+    email = "cashier@hosp-balance.com"
+    await client.post(f"{api}/auth/register", json={
+        "email": email, "password": "password", "full_name": "Cashier", "role": "admin", "hospital_id": "HOSP_BALANCE"
+    })
+    login = await client.post(f"{api}/auth/login", data={"username": email, "password": "password"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    patient_id = (await client.post(f"{api}/patients/", json={"first_name": "Bill", "last_name": "Payer"}, headers=headers)).json()["id"]
+
+    async def invoice(amount):
+        res = await client.post(f"{api}/billing/invoices/", json={"patient_id": patient_id, "final_amount": amount}, headers=headers)
+        return res.json()
+
+    def pay(invoice_id, amount):
+        return client.post(f"{api}/billing/payments/", json={"invoice_id": invoice_id, "amount": amount}, headers=headers)
+
+    def outstanding():
+        return client.get(f"{api}/billing/patients/{patient_id}/balance", headers=headers)
+
+    first = await invoice(0.3)
+    assert (first["status"], first["balance"]) == ("unpaid", 0.3)
+    assert (await pay(first["id"], 0.1)).status_code == 200
+    assert (await outstanding()).json() == {"patient_id": patient_id, "outstanding": 0.2, "invoices": 1}
+    # Exact cents: 0.1 + 0.2 settles 0.3 (in floats it would fall short)
+    assert (await pay(first["id"], 0.2)).status_code == 200
+    assert (await pay(first["id"], 0.01)).json()["detail"] == "Payment exceeds the outstanding balance"
+    assert (await pay(first["id"], 0.001)).status_code == 422
+    assert (await pay(999999, 1)).status_code == 404
+
+    # Ten concurrent payments on one invoice: none lost, status follows the amounts
+    second = await invoice(100)
+    results = await asyncio.gather(*(pay(second["id"], 7.5) for _ in range(10)))
+    assert all(res.status_code == 200 for res in results)
+    listed = (await client.get(f"{api}/billing/invoices/outstanding", params={"patient_id": patient_id}, headers=headers)).json()
+    assert [(i["id"], i["status"], i["amount_paid"], i["balance"]) for i in listed] == [(second["id"], "partial", 75.0, 25.0)]
+    assert (await outstanding()).json()["outstanding"] == 25.0
+
+    assert (await pay(second["id"], 25)).status_code == 200
+    invoices = (await client.get(f"{api}/billing/invoices/patient/{patient_id}", headers=headers)).json()
+    assert [(i["status"], i["balance"]) for i in invoices] == [("paid", 0.0), ("paid", 0.0)]
+    assert (await outstanding()).json() == {"patient_id": patient_id, "outstanding": 0.0, "invoices": 0}
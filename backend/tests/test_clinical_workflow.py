@@ -96,7 +96,7 @@ async def test_end_to_end_clinical_workflow(client: AsyncClient):
         },
         headers=headers_a
     )
-    assert conflict_res.status_code == 400
+    assert conflict_res.status_code == 409
     assert "conflicting appointment" in conflict_res.json()["detail"]
 
     # 8. Pharmacy Flow
@@ -0,0 +1,119 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.database import InstrumentedQueuePool, pool_stats
+
+@pytest.mark.anyio
+async def test_metrics_endpoint_exposes_pool_stats(client: AsyncClient):
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "hmtp_db_pool_checkouts_total" in response.text
+    assert "# TYPE hmtp_db_pool_acquire_seconds histogram" in response.text
+
+    response = await client.get("/health/db-pool")
+    assert response.status_code == 200
+    assert "checkouts_total" in response.json()
+
+@pytest.mark.anyio
+async def test_instrumented_pool_records_wait_and_timeouts(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    timeouts_before = pool_stats.timeouts
+    try:
+        async with engine.connect() as held:
+            await held.execute(text("SELECT 1"))
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect() as second:
+                    await second.execute(text("SELECT 1"))
+    finally:
+        await engine.dispose()
+    assert pool_stats.timeouts == timeouts_before + 1
+    assert pool_stats.wait_seconds_max >= 0.05
+
+@pytest.mark.anyio
+async def test_query_stats_per_route(client: AsyncClient, monkeypatch, query_budget):
+    from app.core.config import settings
+    email = "admin@querystats.com"
+    await client.post(
+        "/api/v1/auth/register",
+        json={"email": email, "password": "password", "full_name": "Stats Admin", "role": "admin", "hospital_id": "HOSP_QUERY_STATS"}
+    )
+    login = await client.post("/api/v1/auth/login", data={"username": email, "password": "password"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    monkeypatch.setattr(settings, "DEBUG", True)
+    response = await client.get("/api/v1/patients/999999", headers=headers)
+    assert response.status_code == 404
+    assert int(response.headers["X-DB-Statements"]) >= 1
+    assert float(response.headers["X-DB-Time-Ms"]) >= 0
+
+    await client.get("/api/v1/no-such-route/42", headers=headers)
+    metrics = (await client.get("/metrics")).text
+    assert "# TYPE hmtp_http_db_statements histogram" in metrics
+    assert 'hmtp_http_db_statements_count{method="GET",route="/api/v1/patients/{patient_id}"}' in metrics
+    assert 'hmtp_http_db_seconds_count{method="GET",route="<unmatched>"}' in metrics
+    assert "no-such-route" not in metrics
+
+    with pytest.raises(pytest.fail.Exception, match="budget is 0"):
+        with query_budget(0):
+            await client.get("/api/v1/patients/999999", headers=headers)
+
+def test_latency_histogram_percentiles():
+    from app.core.request_metrics import LatencyHistogram
+    histogram = LatencyHistogram()
+    for value_us in range(1, 100_001):
+        histogram.record(value_us)
+    p50, p99 = histogram.percentiles((0.5, 0.99))
+    assert abs(p50 - 50_000) / 50_000 < 0.04
+    assert abs(p99 - 99_000) / 99_000 < 0.04
+    assert histogram.summary()["max_ms"] == 100.0
+
+@pytest.mark.anyio
+async def test_admin_latency_and_slow_requests(client: AsyncClient, monkeypatch):
+    from app.core.config import settings
+    tenant = "HOSP_LATENCY"
+    tokens = {}
+    for role in ("admin", "nurse"):
+        email = f"{role}@latency.com"
+        await client.post(
+            "/api/v1/auth/register",
+            json={"email": email, "password": "password", "full_name": "Latency", "role": role, "hospital_id": tenant}
+        )
+        login = await client.post("/api/v1/auth/login", data={"username": email, "password": "password"})
+        tokens[role] = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    monkeypatch.setattr(settings, "SLOW_REQUEST_THRESHOLD_MS", 0.0)
+    assert (await client.get("/api/v1/patients/424242", headers=tokens["admin"])).status_code == 404
+    monkeypatch.setattr(settings, "SLOW_REQUEST_THRESHOLD_MS", 500.0)
+
+    assert (await client.get("/api/v1/admin/latency", headers=tokens["nurse"])).status_code == 403
+
+    report = (await client.get("/api/v1/admin/latency", headers=tokens["admin"])).json()
+    route = next(row for row in report["routes"] if row["route"] == "/api/v1/patients/{patient_id}" and row["status"] == 404)
+    assert route["method"] == "GET" and route["count"] >= 1 and route["p99_ms"] > 0
+    assert [row["hospital_id"] for row in report["tenants"]] == [tenant]
+    # Route rows are the caller's hospital's own traffic, not every tenant's
+    await client.post(
+        "/api/v1/auth/register",
+        json={"email": "admin@other-latency.com", "password": "password", "full_name": "Other", "role": "admin", "hospital_id": "HOSP_LATENCY_OTHER"}
+    )
+    login = await client.post("/api/v1/auth/login", data={"username": "admin@other-latency.com", "password": "password"})
+    other = (await client.get("/api/v1/admin/latency", headers={"Authorization": f"Bearer {login.json()['access_token']}"})).json()
+    assert not any(row["route"] == "/api/v1/patients/{patient_id}" for row in other["routes"])
+
+    samples = (await client.get("/api/v1/admin/slow-requests", headers=tokens["admin"])).json()
+    sample = next(row for row in samples if row["path"] == "/api/v1/patients/424242")
+    assert sample["route"] == "/api/v1/patients/{patient_id}" and sample["status"] == 404
+    assert sample["statements"] == len(sample["queries"]) >= 1
+    assert "FROM patients" in " ".join(query["sql"] for query in sample["queries"])
+    assert sample["duration_ms"] >= sample["db_ms"]
+
+    metrics = (await client.get("/metrics")).text
+    assert 'hmtp_http_request_duration_seconds{method="GET",route="/api/v1/patients/{patient_id}",status="404",quantile="0.99"}' in metrics
@@ -0,0 +1,84 @@
+import pytest
+from httpx import AsyncClient
+from app.core import config
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+
+@pytest.fixture
+async def paging_headers(client: AsyncClient):
+    await client.post(
+        f"{config.settings.API_V1_STR}/auth/register",
+        json={
+            "email": "admin@hosp-paging.com",
+            "password": "password",
+            "full_name": "Paging Admin",
+            "role": "admin",
+            "hospital_id": "HOSP_PAGING"
+        }
+    )
+    response = await client.post(
+        f"{config.settings.API_V1_STR}/auth/login",
+        data={"username": "admin@hosp-paging.com", "password": "password"}
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.mark.anyio
+async def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(12345)) == 12345
+
+@pytest.mark.anyio
+async def test_list_patients_keyset_pagination(client: AsyncClient, paging_headers: dict):
+    for i in range(5):
+        res = await client.post(
+            f"{config.settings.API_V1_STR}/patients/",
+            json={"first_name": f"Page{i}", "last_name": "Walker", "gender": "Female" if i % 2 else "Male"},
+            headers=paging_headers
+        )
+        assert res.status_code == 200
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        res = await client.get(f"{config.settings.API_V1_STR}/patients/", params=params, headers=paging_headers)
+        assert res.status_code == 200
+        batch = res.json()
+        assert len(batch) <= 2
+        seen.extend(p["id"] for p in batch)
+        pages += 1
+        cursor = res.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert len(seen) == 5
+    assert seen == sorted(seen)
+
+    # Field filters compose with paging
+    res = await client.get(
+        f"{config.settings.API_V1_STR}/patients/",
+        params={"gender": "Female"},
+        headers=paging_headers
+    )
+    assert res.status_code == 200
+    assert len(res.json()) == 2
+    assert NEXT_CURSOR_HEADER not in res.headers
+
+@pytest.mark.anyio
+async def test_list_rejects_bad_cursor_and_limit(client: AsyncClient, paging_headers: dict):
+    res = await client.get(
+        f"{config.settings.API_V1_STR}/patients/",
+        params={"cursor": "not-a-cursor"},
+        headers=paging_headers
+    )
+    assert res.status_code == 400
+
+    res = await client.get(
+        f"{config.settings.API_V1_STR}/pharmacy/medicines/",
+        params={"limit": 100000},
+        headers=paging_headers
+    )
+    assert res.status_code == 422
@@ -0,0 +1,91 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import insert
+from app.core import config
+from app.patients.models import Patient
+from app.patients.search import CANDIDATE_LIMIT
+
+API = config.settings.API_V1_STR
+
+
+async def _headers(client: AsyncClient, hospital_id: str) -> dict:
+    email = f"admin@{hospital_id.lower().replace('_', '-')}.com"
+    await client.post(
+        f"{API}/auth/register",
+        json={"email": email, "password": "password", "full_name": "Search Admin", "role": "admin", "hospital_id": hospital_id}
+    )
+    response = await client.post(f"{API}/auth/login", data={"username": email, "password": "password"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def _search(client: AsyncClient, headers: dict, q: str) -> list:
+    response = await client.get(f"{API}/patients/search", params={"q": q}, headers=headers)
+    assert response.status_code == 200
+    return [f"{row['first_name']} {row['last_name']}" for row in response.json()]
+
+
+@pytest.mark.anyio
+async def test_patient_search(client: AsyncClient):
+    headers = await _headers(client, "HOSP_SEARCH")
+    other = await _headers(client, "HOSP_SEARCH_OTHER")
+    for first, last, phone in (
+        ("Maria", "Garcia", "+1 555 010 2001"),
+        ("Mario", "Garibaldi", "+15550102002"),
+        ("Olga", "Margarethe", "+15550102003"),
+        ("Li", "Wu", None),
+    ):
+        res = await client.post(
+            f"{API}/patients/",
+            json={"first_name": first, "last_name": last, "phone_number": phone},
+            headers=headers
+        )
+        assert res.status_code == 200
+    await client.post(f"{API}/patients/", json={"first_name": "Maria", "last_name": "Garcia"}, headers=other)
+
+    # Prefix matches rank above substring matches, and only the caller's tenant is searched
+    assert await _search(client, headers, "gar") == ["Maria Garcia", "Mario Garibaldi", "Olga Margarethe"]
+    assert await _search(client, headers, "maria garc") == ["Maria Garcia"]
+    # Typo tolerance
+    assert (await _search(client, headers, "garsia"))[0] == "Maria Garcia"
+    # Phone digits, whatever the punctuation
+    assert await _search(client, headers, "555-010-2002") == ["Mario Garibaldi"]
+    assert await _search(client, headers, "2001") == ["Maria Garcia"]
+    # Tokens shorter than a trigram
+    assert await _search(client, headers, "li w") == ["Li Wu"]
+
+    # The index follows updates and deletes
+    patient_id = (await client.get(f"{API}/patients/", params={"last_name": "Garibaldi"}, headers=headers)).json()[0]["id"]
+    await client.put(f"{API}/patients/{patient_id}", json={"last_name": "Rossi"}, headers=headers)
+    assert await _search(client, headers, "rossi") == ["Mario Rossi"]
+    await client.delete(f"{API}/patients/{patient_id}", headers=headers)
+    assert await _search(client, headers, "rossi") == []
+
+
+@pytest.mark.anyio
+async def test_common_token_keeps_best_matches(client: AsyncClient, session_factory):
+    headers = await _headers(client, "HOSP_SEARCH_COMMON")
+    # More prefix matches than the candidate cap, all inserted before the exact match
+    async with session_factory() as db:
+        await db.execute(insert(Patient), [
+            {"first_name": f"Ann{i}", "last_name": "Sonnenberg", "phone_number": f"555{i:07d}", "hospital_id": "HOSP_SEARCH_COMMON"}
+            for i in range(CANDIDATE_LIMIT + 50)
+        ])
+        await db.execute(insert(Patient), [{"first_name": "Kim", "last_name": "Son", "hospital_id": "HOSP_SEARCH_COMMON"}])
+        await db.commit()
+
+    assert (await _search(client, headers, "son"))[0] == "Kim Son"
+
+
+@pytest.mark.anyio
+async def test_short_token_keeps_best_matches(client: AsyncClient, session_factory):
+    headers = await _headers(client, "HOSP_SEARCH_SHORT")
+    # Too short for the trigram index: more prefix scan hits than the candidate cap
+    async with session_factory() as db:
+        await db.execute(insert(Patient), [
+            {"first_name": f"Lian{i}", "last_name": "Wulff", "hospital_id": "HOSP_SEARCH_SHORT"}
+            for i in range(CANDIDATE_LIMIT + 50)
+        ])
+        await db.execute(insert(Patient), [{"first_name": "Li", "last_name": "Wu", "hospital_id": "HOSP_SEARCH_SHORT"}])
+        await db.commit()
+
+    assert (await _search(client, headers, "li wu"))[0] == "Li Wu"
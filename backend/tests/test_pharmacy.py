@@ -0,0 +1,252 @@
+import asyncio
+from datetime import date
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from app.core import config
+from app.pharmacy.alerts import AlertSweeper
+from app.pharmacy.models import Medicine, StockMovement
+
+API = config.settings.API_V1_STR
+
+
+async def _pharmacy(client: AsyncClient, tenant: str, stock: int, prescriptions: int):
+    email = f"admin@{tenant.lower().replace('_', '-')}.com"
+    await client.post(
+        f"{API}/auth/register",
+        json={"email": email, "password": "password", "full_name": "Pharmacy Admin", "role": "admin", "hospital_id": tenant}
+    )
+    login = await client.post(f"{API}/auth/login", data={"username": email, "password": "password"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    patient = await client.post(f"{API}/patients/", json={"first_name": "Stock", "last_name": "Race"}, headers=headers)
+    doctor = await client.post(f"{API}/doctors/", json={"full_name": "Dr. Stock", "specialization": "General"}, headers=headers)
+    medicine = await client.post(
+        f"{API}/pharmacy/medicines/",
+        json={"name": "Amoxicillin", "quantity": stock, "unit_price": 2.5, "expiry_date": "2030-01-31"},
+        headers=headers
+    )
+    medicine_id = medicine.json()["id"]
+    prescription_ids = []
+    for _ in range(prescriptions):
+        res = await client.post(
+            f"{API}/pharmacy/prescriptions/",
+            json={"patient_id": patient.json()["id"], "doctor_id": doctor.json()["id"], "medicine_id": medicine_id,
+                  "dosage": "500mg", "frequency": "Twice daily"},
+            headers=headers
+        )
+        prescription_ids.append(res.json()["id"])
+    return headers, medicine_id, prescription_ids
+
+
+@pytest.mark.anyio
+async def test_concurrent_dispenses_never_oversell(concurrent_client: AsyncClient, session_factory):
+    client = concurrent_client
+    headers, medicine_id, prescription_ids = await _pharmacy(client, "HOSP_PHARMACY_STRESS", stock=60, prescriptions=10)
+
+    # 100 dispenses of 1 or 2 units (150 units requested) racing for 60 units
+    quantities = [1 + i % 2 for i in range(100)]
+    responses = await asyncio.gather(*(
+        client.post(
+            f"{API}/pharmacy/dispense/",
+            json={"prescription_id": prescription_ids[i % 10], "quantity": quantity},
+            headers=headers
+        )
+        for i, quantity in enumerate(quantities)
+    ))
+
+    assert {r.status_code for r in responses} <= {200, 400}
+    dispensed = sum(q for q, r in zip(quantities, responses) if r.status_code == 200)
+    assert 59 <= dispensed <= 60
+    assert all(r.json()["detail"] == "Insufficient stock" for r in responses if r.status_code == 400)
+
+    async with session_factory() as db:
+        quantity = await db.scalar(select(Medicine.quantity).where(Medicine.id == medicine_id))
+        ledger = (await db.execute(
+            select(StockMovement).where(StockMovement.medicine_id == medicine_id).order_by(StockMovement.id)
+        )).scalars().all()
+    assert quantity == 60 - dispensed
+    assert sum(movement.change for movement in ledger) == quantity
+    assert [m.reason for m in ledger].count("dispensed") == sum(r.status_code == 200 for r in responses)
+    # Every dispense saw the stock its predecessor left behind
+    running = 0
+    for movement in ledger:
+        running += movement.change
+        assert movement.quantity_after == running
+
+
+@pytest.mark.anyio
+async def test_adjustments_racing_dispenses_keep_the_ledger_balanced(concurrent_client: AsyncClient, session_factory):
+    client = concurrent_client
+    headers, medicine_id, prescription_ids = await _pharmacy(client, "HOSP_PHARMACY_ADJUST", stock=100, prescriptions=10)
+
+    requests = [
+        client.post(f"{API}/pharmacy/dispense/", json={"prescription_id": prescription_ids[i % 10], "quantity": 1}, headers=headers)
+        for i in range(40)
+    ] + [
+        client.put(f"{API}/pharmacy/medicines/{medicine_id}", json={"quantity": 50 + i}, headers=headers)
+        for i in range(10)
+    ]
+    responses = await asyncio.gather(*requests)
+    assert {r.status_code for r in responses} == {200}
+
+    async with session_factory() as db:
+        quantity = await db.scalar(select(Medicine.quantity).where(Medicine.id == medicine_id))
+        ledger = (await db.execute(
+            select(StockMovement).where(StockMovement.medicine_id == medicine_id).order_by(StockMovement.id)
+        )).scalars().all()
+    # Every adjustment was recorded against the quantity it actually replaced
+    running = 0
+    for movement in ledger:
+        running += movement.change
+        assert movement.quantity_after == running
+    assert running == quantity
+
+
+@pytest.mark.anyio
+async def test_dispense_errors_and_adjustments(client: AsyncClient):
+    headers, medicine_id, (prescription_id,) = await _pharmacy(client, "HOSP_PHARMACY_ERRORS", stock=5, prescriptions=1)
+
+    def dispense(quantity: int, prescription: int = prescription_id):
+        return client.post(f"{API}/pharmacy/dispense/", json={"prescription_id": prescription, "quantity": quantity}, headers=headers)
+
+    assert (await dispense(6)).json()["detail"] == "Insufficient stock"
+    assert (await dispense(0)).status_code == 422
+    assert (await dispense(1, 999999)).status_code == 404
+    assert (await dispense(5)).json()["remaining_stock"] == 0
+
+    # Stock levels are never negative, whether opened or adjusted
+    assert (await client.put(f"{API}/pharmacy/medicines/{medicine_id}", json={"quantity": -1}, headers=headers)).status_code == 422
+    assert (await client.post(
+        f"{API}/pharmacy/medicines/",
+        json={"name": "Amoxicillin", "quantity": -5, "unit_price": 2.5, "expiry_date": "2030-01-31"},
+        headers=headers
+    )).status_code == 422
+
+    await client.put(f"{API}/pharmacy/medicines/{medicine_id}", json={"quantity": 12}, headers=headers)
+    movements = (await client.get(f"{API}/pharmacy/medicines/{medicine_id}/movements", headers=headers)).json()
+    assert [(m["reason"], m["change"], m["quantity_after"]) for m in movements] == [
+        ("received", 5, 5), ("dispensed", -5, 0), ("adjusted", 12, 12),
+    ]
+
+
+@pytest.mark.anyio
+async def test_dispense_allocates_first_expiry_first_out(client: AsyncClient):
+    headers, prescribed_batch, (prescription_id,) = await _pharmacy(client, "HOSP_PHARMACY_FEFO", stock=5, prescriptions=1)
+    # The prescribed batch expires 2030-01-31; add an earlier, a later and an expired batch
+    batches = {}
+    for batch_number, expiry, quantity in (("EARLY", "2029-06-30", 3), ("LATE", "2031-01-31", 10), ("EXPIRED", "2020-01-31", 50)):
+        res = await client.post(
+            f"{API}/pharmacy/medicines/",
+            json={"name": "Amoxicillin", "batch_number": batch_number, "quantity": quantity, "unit_price": 2.5, "expiry_date": expiry},
+            headers=headers
+        )
+        batches[batch_number] = res.json()["id"]
+
+    def dispense(quantity: int):
+        return client.post(f"{API}/pharmacy/dispense/", json={"prescription_id": prescription_id, "quantity": quantity}, headers=headers)
+
+    res = await dispense(6)
+    assert res.status_code == 200
+    assert [(b["medicine_id"], b["quantity"], b["remaining"]) for b in res.json()["batches"]] == [
+        (batches["EARLY"], 3, 0), (prescribed_batch, 3, 2),
+    ]
+    assert res.json()["remaining_stock"] == 12
+
+    # More than the unexpired stock: refused as a whole, nothing taken
+    assert (await dispense(13)).json()["detail"] == "Insufficient stock"
+    res = await dispense(12)
+    assert [(b["medicine_id"], b["quantity"]) for b in res.json()["batches"]] == [(prescribed_batch, 2), (batches["LATE"], 10)]
+    assert res.json()["remaining_stock"] == 0
+
+    expired = await client.get(f"{API}/pharmacy/medicines/", params={"batch_number": "EXPIRED"}, headers=headers)
+    assert expired.json()[0]["quantity"] == 50
+
+
+@pytest.mark.anyio
+async def test_alert_sweep_maintains_alerts_incrementally(client: AsyncClient, session_factory):
+    headers, amoxicillin, _ = await _pharmacy(client, "HOSP_PHARMACY_ALERTS", stock=5, prescriptions=0)
+    for batch_number, expiry, quantity in (("IBU-1", "2031-06-30", 100), ("IBU-OLD", "2029-01-31", 20)):
+        await client.post(
+            f"{API}/pharmacy/medicines/",
+            json={"name": "Ibuprofen", "batch_number": batch_number, "quantity": quantity, "unit_price": 1.0, "expiry_date": expiry},
+            headers=headers
+        )
+    sweeper = AlertSweeper(session_factory, low_stock_threshold=10, warning_days=90)
+
+    async def alerts(**params):
+        res = await client.get(f"{API}/pharmacy/alerts", params=params, headers=headers)
+        assert res.status_code == 200
+        return {(a["kind"], a["name"], a["batch_number"], a["quantity"]): a for a in res.json()}
+
+    await sweeper.sweep(today=date(2029, 12, 1))
+    first = await alerts()
+    assert set(first) == {
+        ("low_stock", "Amoxicillin", None, 5),
+        ("expiring", "Amoxicillin", None, 5),
+        ("expired", "Ibuprofen", "IBU-OLD", 20),
+    }
+
+    # The restocked product is re-evaluated; the still-active alert keeps its detection time
+    await client.put(f"{API}/pharmacy/medicines/{amoxicillin}", json={"quantity": 50}, headers=headers)
+    await sweeper.sweep(today=date(2029, 12, 1))
+    second = await alerts()
+    assert set(second) == {("expiring", "Amoxicillin", None, 50), ("expired", "Ibuprofen", "IBU-OLD", 20)}
+    assert second[("expiring", "Amoxicillin", None, 50)]["detected_at"] == first[("expiring", "Amoxicillin", None, 5)]["detected_at"]
+
+    # A new day: the Amoxicillin batch (expiry 2030-01-31) is picked up by the expiry range scan
+    await sweeper.sweep(today=date(2030, 2, 1))
+    assert set(await alerts(kind="expired")) == {
+        ("expired", "Amoxicillin", None, 50), ("expired", "Ibuprofen", "IBU-OLD", 20),
+    }
+    assert ("low_stock", "Amoxicillin", None, 0) in await alerts()
+
+
+@pytest.mark.anyio
+async def test_batch_dispense_reports_lines_and_honours_strict(client: AsyncClient, session_factory):
+    headers, medicine_id, prescriptions = await _pharmacy(client, "HOSP_PHARMACY_BATCH", stock=10, prescriptions=3)
+    early = await client.post(
+        f"{API}/pharmacy/medicines/",
+        json={"name": "Amoxicillin", "batch_number": "EARLY", "quantity": 2, "unit_price": 2.5, "expiry_date": "2029-06-30"},
+        headers=headers
+    )
+
+    def batch(items, strict=False):
+        return client.post(
+            f"{API}/pharmacy/dispense/batch",
+            json={"items": [{"prescription_id": p, "quantity": q} for p, q in items], "strict": strict},
+            headers=headers
+        )
+
+    # Strict: the unknown prescription refuses the whole round
+    res = await batch([(prescriptions[0], 1), (999999, 1)], strict=True)
+    assert res.status_code == 400
+    assert res.json()["detail"]["results"] == [
+        {"prescription_id": prescriptions[0], "quantity": 1, "status": "not_dispensed"},
+        {"prescription_id": 999999, "quantity": 1, "status": "failed", "status_code": 404, "detail": "Prescription not found"},
+    ]
+
+    # 12 units in stock: the third line no longer fits and is skipped, the fourth still is served
+    res = await batch([(prescriptions[0], 5), (prescriptions[1], 6), (prescriptions[2], 5), (prescriptions[2], 1), (999999, 1)])
+    assert res.status_code == 200
+    body = res.json()
+    assert (body["dispensed"], body["failed"]) == (3, 2)
+    assert [(line["status"], line.get("detail")) for line in body["results"]] == [
+        ("dispensed", None), ("dispensed", None), ("failed", "Insufficient stock"), ("dispensed", None),
+        ("failed", "Prescription not found"),
+    ]
+    assert [(b["medicine_id"], b["quantity"], b["remaining"]) for b in body["results"][0]["batches"]] == [
+        (early.json()["id"], 2, 0), (medicine_id, 3, 7),
+    ]
+    assert body["results"][3]["remaining_stock"] == 0
+
+    async with session_factory() as db:
+        quantities = (await db.execute(
+            select(Medicine.quantity).where(Medicine.hospital_id == "HOSP_PHARMACY_BATCH")
+        )).scalars().all()
+        ledger = (await db.execute(
+            select(func.sum(StockMovement.change), func.min(StockMovement.quantity_after))
+            .where(StockMovement.hospital_id == "HOSP_PHARMACY_BATCH")
+            .where(StockMovement.reason == "dispensed")
+        )).one()
+    assert quantities == [0, 0]
+    assert tuple(ledger) == (-12, 0)
@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy import select
+from app.patients.models import Patient
+from app.appointments.models import Appointment
+from seed_data import SeedSpec, hospital_id, seed_hospital
+
+SPEC = SeedSpec(patients=50, doctors=3, appointments=60, lab_tests=20, medicines=5, prescriptions=20, invoices=10, staff=2)
+
+
+async def _seed(session_factory, prefix: str):
+    async with session_factory() as session:
+        conn = await session.connection()
+        counts = await seed_hospital(conn, 1, SPEC, 7, prefix, "not-a-real-hash")
+        await session.commit()
+    return counts
+
+
+async def _patients(session_factory, prefix: str):
+    async with session_factory() as session:
+        result = await session.execute(
+            select(Patient.first_name, Patient.last_name, Patient.phone_number)
+            .where(Patient.hospital_id == hospital_id(prefix, 1))
+            .order_by(Patient.id)
+        )
+        return result.all()
+
+
+@pytest.mark.anyio
+async def test_seed_hospital_is_deterministic_and_idempotent(session_factory):
+    counts = await _seed(session_factory, "SEEDTEST_A")
+    assert counts["patients"] == 50 and counts["appointments"] == 60 and counts["invoices"] <= 10
+    assert await _seed(session_factory, "SEEDTEST_A") is None
+
+    await _seed(session_factory, "SEEDTEST_B")
+    assert await _patients(session_factory, "SEEDTEST_A") == await _patients(session_factory, "SEEDTEST_B")
+
+    async with session_factory() as session:
+        scheduled = await session.execute(
+            select(Appointment.doctor_id, Appointment.appointment_datetime)
+            .where(Appointment.hospital_id == hospital_id("SEEDTEST_A", 1))
+        )
+        bookings = scheduled.all()
+    assert len(bookings) == len(set(bookings)) == 60
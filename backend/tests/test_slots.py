@@ -0,0 +1,69 @@
+import pytest
+from httpx import AsyncClient
+from app.core import config
+from datetime import datetime, time, timedelta
+from app.doctors.slots import free_intervals
+
+API = config.settings.API_V1_STR
+
+
+@pytest.mark.anyio
+async def test_free_intervals_merges_windows_and_bookings():
+    monday = datetime(2026, 3, 2)
+    windows = {0: [(time(9), time(12)), (time(11), time(13))], 1: [(time(9), time(10))]}
+    booked = [monday.replace(hour=10), monday.replace(hour=10, minute=15), monday.replace(hour=12, minute=40)]
+
+    free = free_intervals(windows, booked, monday, monday + timedelta(days=2), timedelta(minutes=30))
+
+    assert free == [
+        (monday.replace(hour=9), monday.replace(hour=10)),
+        (monday.replace(hour=10, minute=45), monday.replace(hour=12, minute=40)),
+        (monday.replace(day=3, hour=9), monday.replace(day=3, hour=10)),
+    ]
+
+
+@pytest.mark.anyio
+async def test_slot_search_endpoints(client: AsyncClient):
+    email = "admin@slots.com"
+    await client.post(
+        f"{API}/auth/register",
+        json={"email": email, "password": "password", "full_name": "Slots Admin", "role": "admin", "hospital_id": "HOSP_SLOTS"}
+    )
+    login = await client.post(f"{API}/auth/login", data={"username": email, "password": "password"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    patient = await client.post(f"{API}/patients/", json={"first_name": "Free", "last_name": "Slot"}, headers=headers)
+    doctor_ids = []
+    for specialization in ("Dermatology", "Dermatology", "Neurology"):
+        doctor = await client.post(f"{API}/doctors/", json={"full_name": f"Dr. {specialization}", "specialization": specialization}, headers=headers)
+        doctor_ids.append(doctor.json()["id"])
+        await client.post(
+            f"{API}/doctors/{doctor_ids[-1]}/availability",
+            json={"day_of_week": 0, "start_time": "09:00:00", "end_time": "11:00:00"},
+            headers=headers
+        )
+
+    today = datetime.now()
+    monday = (today + timedelta(days=7 - today.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    await client.post(
+        f"{API}/appointments/",
+        json={"patient_id": patient.json()["id"], "doctor_id": doctor_ids[0], "appointment_datetime": monday.replace(hour=9, minute=30).isoformat()},
+        headers=headers
+    )
+    window = {"from": monday.isoformat(), "to": (monday + timedelta(days=7)).isoformat()}
+
+    res = await client.get(f"{API}/doctors/{doctor_ids[0]}/slots", params={**window, "duration": 30}, headers=headers)
+    assert res.status_code == 200
+    assert [(i["start"][11:16], i["end"][11:16]) for i in res.json()["free"]] == [("09:00", "09:30"), ("10:00", "11:00")]
+
+    res = await client.get(f"{API}/doctors/{doctor_ids[0]}/slots", params={**window, "duration": 60}, headers=headers)
+    assert [(i["start"][11:16], i["end"][11:16]) for i in res.json()["free"]] == [("10:00", "11:00")]
+
+    res = await client.get(f"{API}/doctors/slots", params={**window, "specialization": "Dermatology"}, headers=headers)
+    assert [d["doctor_id"] for d in res.json()] == doctor_ids[:2]
+    assert res.json()[1]["free"] == [{"start": monday.replace(hour=9).isoformat(), "end": monday.replace(hour=11).isoformat()}]
+
+    res = await client.get(f"{API}/doctors/999999/slots", params=window, headers=headers)
+    assert res.status_code == 404
+    res = await client.get(f"{API}/doctors/slots", params={"from": window["to"], "to": window["from"]}, headers=headers)
+    assert res.status_code == 400
@@ -0,0 +1,60 @@
+import pytest
+from httpx import AsyncClient
+from app.core import config
+
+API = config.settings.API_V1_STR
+
+
+def keywords(statements):
+    return [statement.split(None, 1)[0].upper() for statement in statements]
+
+
+@pytest.fixture
+async def write_headers(client: AsyncClient) -> dict:
+    email = "admin@writes.com"
+    await client.post(
+        f"{API}/auth/register",
+        json={"email": email, "password": "password", "full_name": "Writes Admin", "role": "admin", "hospital_id": "HOSP_WRITES"}
+    )
+    login = await client.post(f"{API}/auth/login", data={"username": email, "password": "password"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    # Warm the principal cache so the counts below only cover the endpoint itself
+    await client.get(f"{API}/patients/", headers=headers)
+    return headers
+
+
+@pytest.mark.anyio
+async def test_write_endpoints_skip_refresh_round_trips(client: AsyncClient, write_headers: dict, query_budget):
+    with query_budget(2) as statements:
+        res = await client.post(
+            f"{API}/patients/",
+            json={"first_name": "Ada", "last_name": "Byron", "date_of_birth": "1990-01-01", "gender": "female"},
+            headers=write_headers
+        )
+    assert res.status_code == 200, res.text
+    assert keywords(statements) == ["INSERT", "INSERT"]  # patient, audit log
+    patient_id = res.json()["id"]
+
+    with query_budget(2) as statements:
+        res = await client.put(f"{API}/patients/{patient_id}", json={"phone_number": "555-0100"}, headers=write_headers)
+    assert res.status_code == 200, res.text
+    assert res.json()["phone_number"] == "555-0100"
+    assert keywords(statements) == ["UPDATE", "INSERT"]  # UPDATE ... RETURNING, audit log
+
+    with query_budget(2) as statements:
+        res = await client.post(f"{API}/doctors/", json={"full_name": "Dr. Write", "specialization": "General"}, headers=write_headers)
+    assert res.status_code == 200, res.text
+    assert res.json()["availabilities"] == []
+    assert keywords(statements) == ["INSERT", "INSERT"]
+    doctor_id = res.json()["id"]
+
+    with query_budget(3) as statements:
+        res = await client.put(f"{API}/doctors/{doctor_id}", json={"specialization": "Cardiology"}, headers=write_headers)
+    assert res.status_code == 200, res.text
+    assert res.json()["specialization"] == "Cardiology"
+    assert keywords(statements) == ["UPDATE", "SELECT", "INSERT"]  # availabilities are loaded with selectinload
+
+    with query_budget(1) as statements:
+        res = await client.put(f"{API}/doctors/999999", json={"specialization": "Cardiology"}, headers=write_headers)
+    assert res.status_code == 404
+    assert keywords(statements) == ["UPDATE"]